@@ -0,0 +1,225 @@
+"""
+Batch ERP contrast plotting.
+
+Replaces the per-contrast `03_generate_*_contrast_*.py` scripts: every contrast
+is an entry in a YAML file (see `SFN/configs/erp_contrasts_*.yaml`), and one run
+renders any number of them. Each subject's evoked responses are read once (from
+the group tensor store) and shared by all contrasts, so regenerating every
+contrast figure of a dataset is a single pass over the data.
+
+For each contrast, the script saves a figure per subject (unless
+`generate_individual_plots` is false or `--group-only` is given) and a grand
+average figure: the mean ERP over the component's electrode group, with a
+topomap at the detected peak of each condition. Figures keep the folder and
+file names of the former scripts (`03_generate_<analysis_name>_<acc>`).
+"""
+import os
+import sys
+import argparse
+import yaml
+import mne
+import matplotlib.pyplot as plt
+import matplotlib.gridspec as gridspec
+from utils import get_subject_list, ELECTRODE_GROUPS, CONDITION_COLORS, NON_SCALP_CHANNELS, find_peak_times
+
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import group_store
+
+CONDITION_SETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'condition_sets.yaml')
+TOPOMAP_VLIM = (-6, 6)
+# accuracy -> (dataset directory, title suffix, figure name suffix)
+ACCURACY_DATASETS = {'acc1': ("eeg_acc=1", "ACC=1", "acc=1"), 'all': ("eeg_all", "ALL", "all")}
+
+
+def load_contrast_configs(config_paths):
+    """
+    Loads the contrast definitions from one or more YAML files.
+
+    Each file holds a list of contrasts. A contrast's `conditions` may be a
+    mapping of legend name to condition numbers, or the name of a condition set
+    in `condition_sets.yaml`.
+    """
+    with open(CONDITION_SETS_FILE, 'r') as f:
+        condition_sets = yaml.safe_load(f)
+
+    contrasts = []
+    for config_path in config_paths:
+        print(f"--- Loading contrasts from: {config_path} ---")
+        with open(config_path, 'r') as f:
+            entries = yaml.safe_load(f) or []
+        for entry in entries:
+            if isinstance(entry['conditions'], str):
+                entry['conditions'] = condition_sets[entry['conditions']]
+            contrasts.append(entry)
+
+    names = [c['analysis_name'] for c in contrasts]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate analysis_name in contrast configs: {duplicates}")
+    return contrasts
+
+
+def combine_key_evokeds(base_evokeds, conditions):
+    """Averages the base evokeds of each key condition with equal weights, skipping empty ones."""
+    key_evokeds = {}
+    for key_cond, base_conds in conditions.items():
+        evokeds = [base_evokeds[bc] for bc in base_conds if bc in base_evokeds]
+        if evokeds:
+            key_evokeds[key_cond] = mne.combine_evoked(evokeds, 'equal')
+    return key_evokeds
+
+
+def plot_contrast(key_evokeds, contrast, title, is_group):
+    """
+    Draws the mean ERP over the contrast's electrode group and one topomap per
+    key condition at its detected peak.
+
+    Returns:
+        matplotlib.figure.Figure: The figure.
+    """
+    electrode_group = ELECTRODE_GROUPS[contrast['erp_component']][contrast['electrode_group_for_erp']]
+    electrodes = electrode_group['electrodes']
+    colors = {**CONDITION_COLORS, **(contrast.get('colors') or {})}
+    # plot_compare_evokeds needs a color for every condition, otherwise use its defaults
+    plot_colors = {cond: colors[cond] for cond in key_evokeds} if all(c in colors for c in key_evokeds) else None
+
+    fig = plt.figure(figsize=(12, 8))
+    fig.suptitle(title, fontsize=16)
+    gs = gridspec.GridSpec(2, len(key_evokeds), height_ratios=[2, 1.5])
+    ax_erp = fig.add_subplot(gs[0, :])
+
+    erp_title = f"Mean ERP over {electrode_group['description']}"
+    mne.viz.plot_compare_evokeds(
+        key_evokeds, picks=electrodes, combine='mean', axes=ax_erp,
+        title=f"Grand Average {erp_title}" if is_group else erp_title, show=False, legend='upper left',
+        ci=0.95 if is_group else False, colors=plot_colors
+    )
+
+    peak_times = find_peak_times(key_evokeds, electrodes, contrast['peak_detection'])
+    for i, (cond_name, evoked) in enumerate(key_evokeds.items()):
+        ax_topo = fig.add_subplot(gs[1, i])
+        peak_time, peak_found = peak_times[cond_name]
+        color = colors.get(cond_name, 'k')
+        if peak_time is None:
+            ax_topo.set_title(f"{cond_name}\n(No peak found)")
+            ax_topo.axis('off')
+            continue
+
+        if peak_found:
+            topo_title = f"{cond_name}\nPeak at {int(peak_time*1000)} ms"
+            ax_erp.axvline(x=peak_time, color=color, linestyle='--', linewidth=1.5, alpha=0.8)
+        else:
+            topo_title = f"{cond_name}\n({int(peak_time*1000)} ms)"
+            ax_erp.axvline(x=peak_time, color=color, linestyle=':', linewidth=1.5, alpha=0.6)
+
+        scalp_evoked = evoked.copy().pick('eeg', exclude=NON_SCALP_CHANNELS)
+        scalp_evoked.plot_topomap(times=peak_time, axes=ax_topo, show=False, vlim=TOPOMAP_VLIM, colorbar=False)
+        ax_topo.set_title(topo_title, color=colors.get(cond_name, 'black'))
+
+    fig.subplots_adjust(right=0.85, bottom=0.1, top=0.9, hspace=0.4)
+    cbar_ax = fig.add_axes([0.88, 0.15, 0.02, 0.2])
+    plt.colorbar(plt.cm.ScalarMappable(norm=plt.Normalize(vmin=TOPOMAP_VLIM[0], vmax=TOPOMAP_VLIM[1]), cmap='RdBu_r'),
+                 cax=cbar_ax, label='µV')
+    return fig
+
+
+def figure_name(contrast, accuracy):
+    """Figure folder/file stem of a contrast: the name of the 03_generate_* script it replaces."""
+    return f"03_generate_{contrast['analysis_name']}_{ACCURACY_DATASETS[accuracy][2]}"
+
+
+def save_contrast_figure(fig, output_dir, fname):
+    """Saves a figure (replacing any previous version) and closes it."""
+    os.makedirs(output_dir, exist_ok=True)
+    fig_path = os.path.join(output_dir, fname)
+    if os.path.exists(fig_path):
+        os.remove(fig_path)  # Ensure fresh output
+    fig.savefig(fig_path, bbox_inches='tight')
+    plt.close(fig)
+    return fig_path
+
+
+def main(config_paths, accuracy, subjects=None, group_only=False):
+    """
+    Renders every contrast in the given config files for one dataset.
+    """
+    contrasts = load_contrast_configs(config_paths)
+    if not contrasts:
+        print("--- No contrasts defined. Nothing to do. ---")
+        return
+
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    source_dir_name, accuracy_title, _ = ACCURACY_DATASETS[accuracy]
+    derivatives_dir = os.path.join(base_dir, source_dir_name, 'derivatives')
+
+    # --- Load every subject once, for the union of all contrasts' conditions ---
+    base_conditions = []
+    for contrast in contrasts:
+        for conds in contrast['conditions'].values():
+            base_conditions += [c for c in conds if c not in base_conditions]
+    subject_list = subjects or get_subject_list(derivatives_dir)
+    print(f"--- Loading {len(base_conditions)} conditions for {len(subject_list)} subjects from: {source_dir_name} ---")
+    store = group_store.load_group_store(derivatives_dir, base_conditions, subject_list)
+
+    # --- Individual Subject Plots ---
+    individual_contrasts = [c for c in contrasts if c.get('generate_individual_plots', True) and not group_only]
+    if individual_contrasts:
+        for subject_id in subject_list:
+            print(f"\nProcessing Subject {subject_id}...")
+            base_evokeds = store.subject_evokeds(subject_id, base_conditions)
+            if not base_evokeds:
+                print("  - No data found. Skipping.")
+                continue
+            for contrast in individual_contrasts:
+                name = contrast['analysis_name']
+                try:
+                    key_evokeds = combine_key_evokeds(base_evokeds, contrast['conditions'])
+                    if not key_evokeds:
+                        print(f"  - {name}: not enough data for key conditions. Skipping.")
+                        continue
+                    title = f"Subject {subject_id}: {contrast['plot_title']} ({accuracy_title})"
+                    fig = plot_contrast(key_evokeds, contrast, title, is_group=False)
+                    fig_name = figure_name(contrast, accuracy)
+                    fig_path = save_contrast_figure(
+                        fig, os.path.join(derivatives_dir, f'sub-{subject_id}', 'figures', fig_name),
+                        f'sub-{subject_id}_{fig_name}.png')
+                    print(f"  - Saved {name} plot to {fig_path}")
+                except Exception as e:
+                    plt.close('all')
+                    print(f"--- FAILED to generate {name} plot for Subject {subject_id}. Error: {e} ---")
+
+    # --- Group-Level Plots ---
+    print("\n--- Generating group-level grand average contrast plots ---")
+    grand_averages_base = store.grand_averages(base_conditions, subjects=subject_list)
+    if not grand_averages_base:
+        print("--- No data for group plots. ---")
+        return
+    for contrast in contrasts:
+        name = contrast['analysis_name']
+        grand_averages_key = combine_key_evokeds(grand_averages_base, contrast['conditions'])
+        if not grand_averages_key:
+            print(f"  - {name}: not enough data for group key conditions. Skipping.")
+            continue
+        title = f"Grand Average: {contrast['plot_title']} ({accuracy_title})"
+        fig = plot_contrast(grand_averages_key, contrast, title, is_group=True)
+        fig_name = figure_name(contrast, accuracy)
+        fig_path = save_contrast_figure(fig, os.path.join(derivatives_dir, 'group', 'figures', fig_name),
+                                        f'group_{fig_name}.png')
+        print(f"  - Saved group {name} plot to {fig_path}")
+
+    print("\n--- Contrast plot generation complete. ---")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a batch of ERP contrast plots from YAML configuration files.')
+    parser.add_argument('--config', type=str, nargs='+', required=True,
+                        help='Path(s) to YAML files, each holding a list of contrast definitions.')
+    parser.add_argument('--accuracy', type=str, required=True, choices=list(ACCURACY_DATASETS),
+                        help="Specify the dataset to use ('acc1' for correct trials only, 'all' for all trials).")
+    parser.add_argument('--subjects', nargs='*', default=[],
+                        help='Subject IDs to process. If not provided, all subjects will be processed.')
+    parser.add_argument('--group-only', action='store_true',
+                        help='Only generate the grand average figures.')
+    args = parser.parse_args()
+    main(args.config, args.accuracy, subjects=args.subjects, group_only=args.group_only)
@@ -1,5 +1,6 @@
 import mne
 import os
+import sys
 import argparse
 import numpy as np
 import matplotlib.pyplot as plt
@@ -9,6 +10,10 @@ from utils import (
     ELECTRODE_GROUPS, CONDITION_COLORS, NON_SCALP_CHANNELS, ELECTRODE_LOC_FILE
 )
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import group_store
+
 def main(config_path, accuracy):
     """
     Main function to generate plots based on a configuration file.
@@ -27,21 +32,15 @@ def main(config_path, accuracy):
     # --- Step 2: Load All Subject Data ---
     print(f"--- Loading data from: {source_dir_name} ---")
     base_conditions_to_load = sorted(list(set([item for sublist in config['conditions'].values() for item in sublist])))
-    all_subject_evokeds = {cond: [] for cond in base_conditions_to_load}
     
     subject_list = get_subject_list(derivatives_dir)
-    for subject_id in subject_list:
-        subject_dir = os.path.join(derivatives_dir, f'sub-{subject_id}')
-        for cond in base_conditions_to_load:
-            file_path = os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif')
-            if os.path.exists(file_path):
-                # We read epochs and average them to create an Evoked object
-                evoked = mne.read_epochs(file_path, preload=True, verbose=False).average()
-                all_subject_evokeds[cond].append(evoked)
+    # Per-subject averages are stacked in a memory-mapped group store; it is only
+    # rebuilt (from the shared evoked cache) when the epoch files change
+    store = group_store.load_group_store(derivatives_dir, base_conditions_to_load, subject_list)
 
     # --- Step 3: Compute Grand Average and Time Window ---
     print("--- Calculating grand average and analysis window ---")
-    grand_averages_base = {cond: mne.grand_average(evoked_list) for cond, evoked_list in all_subject_evokeds.items() if evoked_list}
+    grand_averages_base = store.grand_averages(base_conditions_to_load, subjects=subject_list)
     if not grand_averages_base:
         print("--- No data found for any condition. Aborting. ---")
         return
@@ -1,10 +1,15 @@
 import os
+import sys
 import glob
 import yaml
 import mne
 import numpy as np
 import matplotlib.pyplot as plt
 
+# Make the shared SFN2 helpers importable from the SFN scripts
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import peak_detection
+
 # --- 1. SHARED CONSTANTS ---
 
 # This dictionary holds all electrode selections for different ERP components.
@@ -121,3 +126,32 @@ def save_figure(fig, analysis_name, output_dir):
     fig.savefig(file_path, bbox_inches='tight')
     plt.close(fig)
     print(f"--- Saved final plot to: {file_path} ---")
+
+# --- 3. PEAK DETECTION ---
+
+def find_peak_times(evokeds, electrodes, peak_config):
+    """
+    Finds the peak latency of the ROI-averaged waveform of each evoked.
+
+    Args:
+        evokeds (dict): Mapping of condition name to `mne.Evoked`.
+        electrodes (list): Channels averaged into the ROI waveform.
+        peak_config (dict): The `peak_detection` block of a contrast config:
+            `method` ('find_peaks' or 'get_peak'), `mode` ('pos', 'neg' or 'abs';
+            'get_peak' only), `time_window` ([start, end] in seconds) and
+            `fallback_time` (seconds, or null to leave the peak unmarked).
+            With 'find_peaks', conditions without a peak fall back to the mean
+            latency of the conditions that have one, then to `fallback_time`.
+
+    Returns:
+        dict: Mapping of condition name to (peak time or None, whether a peak was found).
+    """
+    first = next(iter(evokeds.values()))
+    # All conditions are detected in one call on a (condition, time) stack
+    roi_data = np.stack([evoked.get_data(picks=electrodes).mean(axis=0) for evoked in evokeds.values()])
+    peaks = peak_detection.detect_peaks(
+        roi_data, first.times, first.info['sfreq'], peak_config['time_window'],
+        method=peak_config.get('method', 'get_peak'), mode=peak_config.get('mode', 'pos'),
+        fallback_time=peak_config.get('fallback_time'))
+    return {cond: (None if np.isnan(t) else float(t), bool(found))
+            for cond, t, found in zip(evokeds, peaks['latency'], peaks['found'])}
@@ -0,0 +1,42 @@
+"""
+SFN2 ERP Feature Extraction
+
+Builds the long-format ERP feature table (peak latency, peak amplitude, mean
+amplitude and slope for every subject x condition x component x ROI) of one or
+more datasets, so that the statistics scripts only have to query it.
+"""
+import argparse
+import logging
+
+from SFN2.code.utils import erp_features, preprocessing
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+log = logging.getLogger()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the SFN2 ERP feature table for each dataset")
+    parser.add_argument("--datasets", nargs='+', default=list(preprocessing.DATASET_VARIANTS),
+                        choices=list(preprocessing.DATASET_VARIANTS),
+                        help="Datasets to extract features from (default: all four).")
+    parser.add_argument("--subjects", nargs='*', default=[],
+                        help="Subject IDs to include (default: every subject with epoch data).")
+    parser.add_argument("--rebuild", action='store_true',
+                        help="Rebuild the table even if it is up to date.")
+    args = parser.parse_args()
+
+    for dataset in args.datasets:
+        derivatives_dir = preprocessing.get_derivatives_dir(dataset)
+        log.info(f"Extracting ERP features for {dataset}")
+        try:
+            table = erp_features.load_feature_table(derivatives_dir, subjects=args.subjects, rebuild=args.rebuild)
+        except FileNotFoundError as e:
+            log.warning(f"Skipping {dataset}: {e}")
+            continue
+        log.info(f"{dataset}: {len(table)} rows for {table['subject_id'].nunique()} subjects and "
+                 f"{table['condition'].nunique()} conditions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+SFN2 Preprocessing Pipeline
+
+Builds all four datasets (eeg_all, eeg_acc=1, eeg_ds_all, eeg_ds_acc=1) in a
+single pass: each subject's HAPPE .set file, usable-trials row and behavioral
+CSV are read once and fanned out to every dataset variant.
+"""
+import argparse
+import logging
+from pathlib import Path
+
+from SFN2.code.utils import epochs_store, preprocessing
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+log = logging.getLogger()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run SFN2 Preprocessing Pipeline for all datasets")
+    parser.add_argument("--datasets", nargs='+', default=list(preprocessing.DATASET_VARIANTS),
+                        choices=list(preprocessing.DATASET_VARIANTS),
+                        help="Dataset variants to write (default: all four).")
+    parser.add_argument("--subjects", nargs='*', default=[],
+                        help="Subject IDs to process (default: all participants).")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Number of subjects to process in parallel (<= 0 uses all cores).")
+    parser.add_argument("--lab-data-dir", type=str, default=str(preprocessing.BASE_DATA_DIR),
+                        help="Directory containing the HAPPE and behavioral input files.")
+    parser.add_argument("--force", action='store_true',
+                        help="Rebuild every subject, even if its inputs are unchanged.")
+    parser.add_argument("--layout", default='split', choices=epochs_store.STORAGE_LAYOUTS,
+                        help="Epoch storage layout: one file per condition ('split', default), or 'both' "
+                             "to also write one consolidated file with a condition index.")
+    args = parser.parse_args()
+
+    log.info(f"Preprocessing datasets: {', '.join(args.datasets)}")
+    # Per-subject logs go to the first dataset's derivatives/logs/01_process_lab_data
+    results = preprocessing.run_preprocessing(
+        args.datasets, subjects=args.subjects, jobs=args.jobs,
+        lab_data_dir=Path(args.lab_data_dir), force=args.force, layout=args.layout
+    )
+
+    n_failed = sum(r['status'] == 'failed' for r in results)
+    n_skipped = sum(r['status'] == 'skipped' for r in results)
+    log.info("-" * 80)
+    log.info(f"Preprocessing finished: {len(results) - n_failed - n_skipped} subjects processed, "
+             f"{n_skipped} unchanged, {n_failed} failed.")
+    log.info("-" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,51 @@ logging.basicConfig(level=logging.INFO,
 log = logging.getLogger()
 
 
+def analyze_contrasts(contrasts, config, output_dir):
+    """
+    Runs steps 3-5 of the pipeline on the subjects' contrasts of one config:
+    grand average, group-level cluster statistics, report and plots.
+    """
+    analysis_name = config['analysis_name']
+    output_dir = Path(output_dir)
+
+    # --- 3. Compute Grand Average ---
+    log.info("Computing grand average contrast...")
+    grand_average = mne.grand_average(contrasts)
+    ga_fname = output_dir / f"{analysis_name}_grand_average-ave.fif"
+    grand_average.save(ga_fname, overwrite=True)
+    log.info(f"Grand average saved to {ga_fname}")
+
+    # --- 4. Run Group-Level Cluster Statistics ---
+    # Permutation progress is saved here, so a rerun of the same config resumes (or extends) it
+    checkpoint = output_dir / f"{analysis_name}_permutations.npz"
+    # `stats.p_thresholds` sweeps several cluster-forming thresholds in one permutation pass
+    if cluster_stats.is_sweep(config):
+        sweep_results, ch_names = cluster_stats.run_sensor_cluster_sweep(contrasts, config, checkpoint)
+        runs = [(cluster_stats.sweep_config(config, p), results) for p, results in sweep_results.items()]
+    else:
+        stats_results, ch_names = cluster_stats.run_sensor_cluster_test(contrasts, config, checkpoint)
+        runs = [(config, stats_results)]
+
+    # --- 5. Generate Report and Visualizations ---
+    log.info("Generating report and plots...")
+    # The `times` vector is needed for the report and plots
+    times = grand_average.times
+
+    for run_config, stats_results in runs:
+        # Generate text report
+        reporter.generate_report(stats_results, times, ch_names, run_config, output_dir)
+
+        # Generate ERP plot
+        plotting.plot_contrast_erp(grand_average, stats_results, run_config, output_dir, ch_names)
+
+        # Generate topomap plot
+        plotting.plot_t_value_topomap(grand_average, stats_results, run_config, output_dir, ch_names)
+
+    if cluster_stats.is_sweep(config):
+        reporter.generate_sweep_summary(sweep_results, config, output_dir)
+
+
 def main():
     """
     Main function to orchestrate the sensor-space analysis pipeline.
@@ -47,8 +92,13 @@ def main():
     contrasts = []
     for subject_dir in subject_dirs:
         log.info(f"  - {subject_dir.name}")
-        # Unpack the tuple; we only need the Evoked contrast for sensor analysis
-        contrast_evoked, _ = data_loader.create_subject_contrast(subject_dir, config)
+        # Each subject's condition files are read once; the contrast is built from memory
+        try:
+            subject_data = data_loader.load_subject_data(subject_dir, [config])
+            contrast_evoked = data_loader.compute_contrast_evoked(subject_data, config)
+        except Exception as e:
+            log.error(f"Error creating contrast for {subject_dir.name}: {e}")
+            continue
         if contrast_evoked is not None:
             contrasts.append(contrast_evoked)
 
@@ -57,29 +107,7 @@ def main():
         return
     log.info(f"Successfully created contrasts for {len(contrasts)} subjects.")
 
-    # --- 3. Compute Grand Average ---
-    log.info("Computing grand average contrast...")
-    grand_average = mne.grand_average(contrasts)
-    ga_fname = output_dir / f"{analysis_name}_grand_average-ave.fif"
-    grand_average.save(ga_fname, overwrite=True)
-    log.info(f"Grand average saved to {ga_fname}")
-
-    # --- 4. Run Group-Level Cluster Statistics ---
-    stats_results, ch_names = cluster_stats.run_sensor_cluster_test(contrasts, config)
-
-    # --- 5. Generate Report and Visualizations ---
-    log.info("Generating report and plots...")
-    # The `times` vector is needed for the report and plots
-    times = grand_average.times
-
-    # Generate text report
-    reporter.generate_report(stats_results, times, ch_names, config, output_dir)
-
-    # Generate ERP plot
-    plotting.plot_contrast_erp(grand_average, stats_results, config, output_dir, ch_names)
-
-    # Generate topomap plot
-    plotting.plot_t_value_topomap(grand_average, stats_results, config, output_dir, ch_names)
+    analyze_contrasts(contrasts, config, output_dir)
 
     log.info("-" * 80)
     log.info(f"Pipeline finished successfully for '{analysis_name}'.")
@@ -0,0 +1,125 @@
+"""
+SFN2 Sensor-Space Batch Pipeline
+
+Runs the sensor-space analysis of several configs and datasets in one go.
+Each subject is loaded once per dataset, with the conditions of every config,
+and all contrasts are computed from those shared per-condition evokeds. The
+group statistics of the contrasts (grand average, cluster test, report and
+plots, as in `run_sensor_analysis_pipeline.py`) then run over a process pool.
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from SFN2.code.utils import data_loader
+from SFN2.code.run_sensor_analysis_pipeline import analyze_contrasts
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+log = logging.getLogger()
+
+OUTPUT_ROOT = Path("SFN2/derivatives/sensor")
+
+
+def _analyze(contrasts, config, output_dir):
+    """Runs `analyze_contrasts` for one config and dataset; never raises, so one failure cannot stop the batch."""
+    start = time.time()
+    result = {'status': 'ok', 'message': ''}
+    try:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        analyze_contrasts(contrasts, config, output_dir)
+    except Exception as e:
+        log.exception(f"Analysis '{config['analysis_name']}' failed")
+        result.update(status='failed', message=f"{type(e).__name__}: {e}")
+    result['seconds'] = time.time() - start
+    return result
+
+
+def compute_batch_contrasts(subject_dirs, configs):
+    """
+    Computes every config's contrast for each subject, loading each subject once.
+
+    Returns:
+        dict: {analysis_name: list of contrast Evokeds}.
+    """
+    contrasts = {config['analysis_name']: [] for config in configs}
+    for subject_dir in subject_dirs:
+        log.info(f"  - {subject_dir.name}")
+        try:
+            subject_data = data_loader.load_subject_data(subject_dir, configs)
+        except Exception as e:
+            log.error(f"Error loading {subject_dir.name}: {e}")
+            continue
+        for config in configs:
+            try:
+                contrast_evoked = data_loader.compute_contrast_evoked(subject_data, config)
+            except Exception as e:
+                log.error(f"Error creating contrast '{config['analysis_name']}' for {subject_dir.name}: {e}")
+                continue
+            if contrast_evoked is not None:
+                contrasts[config['analysis_name']].append(contrast_evoked)
+    return contrasts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the SFN2 sensor-space analysis for several configs at once")
+    parser.add_argument("--configs", nargs='+', default=["SFN2/configs/sensor_*.yaml"],
+                        help="Config files, directories or glob patterns (default: all sensor configs).")
+    parser.add_argument("--accuracies", nargs='+', default=['all', 'acc1'], choices=['all', 'acc1'],
+                        help="Datasets to analyze (default: both).")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes for the group statistics (<= 0: all cores).")
+    args = parser.parse_args()
+
+    configs = [config for _, config in data_loader.find_configs(args.configs, domain='sensor')]
+    names = [config['analysis_name'] for config in configs]
+    if not configs:
+        log.error("No sensor configs found. Exiting.")
+        return
+    if len(set(names)) != len(names):
+        log.error(f"Analysis names must be unique within a batch: {names}")
+        return
+    log.info(f"Batch of {len(configs)} configs x {len(args.accuracies)} datasets: {', '.join(names)}")
+
+    jobs = args.jobs if args.jobs > 0 else None
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {}
+        for accuracy in args.accuracies:
+            subject_dirs = data_loader.get_subject_dirs(accuracy)
+            if not subject_dirs:
+                log.error(f"No subject directories found for '{accuracy}'. Skipping.")
+                continue
+            log.info(f"Creating the contrasts of every config for each subject ({accuracy})...")
+            batch_contrasts = compute_batch_contrasts(subject_dirs, configs)
+            # The statistics of this dataset run while the next one is loaded
+            for config in configs:
+                contrasts = batch_contrasts[config['analysis_name']]
+                key = (accuracy, config['analysis_name'])
+                if not contrasts:
+                    results[key] = {'status': 'failed', 'message': "No valid contrasts", 'seconds': 0.}
+                    continue
+                log.info(f"{key[1]} ({accuracy}): contrasts for {len(contrasts)} subjects.")
+                output_dir = OUTPUT_ROOT / config['analysis_name'] / accuracy
+                futures[pool.submit(_analyze, contrasts, config, output_dir)] = key
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. out of memory)
+                results[key] = {'status': 'failed', 'message': f"Worker crashed: {type(e).__name__}: {e}",
+                                'seconds': float('nan')}
+            log.info(f"  - {key[1]} ({key[0]}): {results[key]['status']} ({results[key]['seconds']:.1f} s)")
+
+    log.info("-" * 80)
+    for (accuracy, name), result in sorted(results.items()):
+        log.info(f"{name:<45}{accuracy:<6}{result['status']:<8}{result['seconds']:>8.1f} s  {result['message']}")
+    log.info(f"All outputs are saved under: {OUTPUT_ROOT}/<analysis_name>/<dataset>")
+    log.info("-" * 80)
+
+
+if __name__ == "__main__":
+    main()
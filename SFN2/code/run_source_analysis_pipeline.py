@@ -5,7 +5,6 @@ import argparse
 import logging
 from pathlib import Path
 import mne
-import numpy as np
 
 from SFN2.code.utils import data_loader, cluster_stats, plotting, reporter
 
@@ -14,6 +13,41 @@ logging.basicConfig(level=logging.INFO,
 log = logging.getLogger()
 
 
+def analyze_source_stack(source_stack, fsaverage_src, config, output_dir):
+    """
+    Runs steps 3-5 of the pipeline on the stacked source contrasts of one config
+    (a `SourceStackBuilder`): grand average, group-level cluster statistics,
+    report and plots.
+    """
+    analysis_name = config['analysis_name']
+    output_dir = Path(output_dir)
+
+    # --- 3. Compute Grand Average Source Estimate ---
+    log.info("Computing grand average source estimate...")
+    stc_grand_average = source_stack.mean_stc()
+    ga_fname = output_dir / f"{analysis_name}_grand_average-stc.h5"
+    stc_grand_average.save(ga_fname, overwrite=True)
+
+    # --- 4. Run Group-Level Cluster Statistics ---
+    # Permutation progress is saved here, so a rerun of the same config resumes (or extends) it
+    checkpoint = output_dir / f"{analysis_name}_permutations.npz"
+    # `stats.p_thresholds` sweeps several cluster-forming thresholds in one permutation pass
+    if cluster_stats.is_sweep(config):
+        sweep_results = cluster_stats.run_source_cluster_sweep(source_stack, fsaverage_src, config, checkpoint)
+        runs = [(cluster_stats.sweep_config(config, p), results) for p, results in sweep_results.items()]
+    else:
+        stats_results = cluster_stats.run_source_cluster_test(source_stack, fsaverage_src, config, checkpoint)
+        runs = [(config, stats_results)]
+
+    # --- 5. Generate Report and Visualizations ---
+    log.info("Generating source report and plots...")
+    for run_config, stats_results in runs:
+        reporter.generate_source_report(stats_results, stc_grand_average, run_config, output_dir)
+        plotting.plot_source_clusters(stats_results, stc_grand_average, run_config, output_dir)
+    if cluster_stats.is_sweep(config):
+        reporter.generate_sweep_summary(sweep_results, config, output_dir)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Run SFN2 Source-Space Analysis Pipeline")
     parser.add_argument("--config", type=str, required=True, help="Path to the config YAML file.")
@@ -31,32 +65,22 @@ def main():
     subject_dirs = data_loader.get_subject_dirs(args.accuracy)
     fsaverage_src = data_loader.get_fsaverage_src()
 
-    all_source_contrasts = []
+    # Each subject's contrast goes straight into a preallocated float32 (subject, time, vertex) stack
+    memmap_path = output_dir / f"{analysis_name}_source_stack.npy" if config['stats'].get('memmap') else None
+    source_stack = cluster_stats.SourceStackBuilder(len(subject_dirs), memmap_path=memmap_path)
     log.info("Processing subjects for source analysis...")
     for subject_dir in subject_dirs:
         log.info(f"  - {subject_dir.name}")
-        contrast_evoked, epochs_for_cov = data_loader.create_subject_contrast(subject_dir, config)
+        try:
+            subject_data = data_loader.load_subject_data(subject_dir, [config])
+            contrast_evoked = data_loader.compute_contrast_evoked(subject_data, config)
+        except Exception as e:
+            log.error(f"Error creating contrast for {subject_dir.name}: {e}")
+            continue
         if contrast_evoked is None:
             continue
 
-        inv_operator = None
-        try:
-            inv_operator = data_loader.get_inverse_operator(subject_dir)
-        except FileNotFoundError:
-            log.warning(
-                f"Inverse operator not found for {subject_dir.name}. "
-                "Attempting to generate one using fsaverage template..."
-            )
-            try:
-                inv_operator = data_loader.generate_template_inverse_operator_from_epochs(
-                    epochs_for_cov, subject_dir
-                )
-            except Exception as e:
-                log.error(
-                    f"Failed to generate template inverse operator for {subject_dir.name}: {e}"
-                )
-                continue  # Skip subject if generation fails
-
+        inv_operator = data_loader.load_or_generate_inverse_operator(subject_data, [config])
         if inv_operator is None:
             log.warning(f"Could not load or generate inverse operator for {subject_dir.name}. Skipping subject.")
             continue
@@ -64,28 +88,15 @@ def main():
         stc = data_loader.compute_subject_source_contrast(
             contrast_evoked, inv_operator, config
         )
-        all_source_contrasts.append(stc)
+        source_stack.add(stc)
 
-    if not all_source_contrasts:
+    if not source_stack.n_subjects:
         log.error("No valid source data found for any subject. Cannot proceed.")
         return
-    log.info(f"Successfully created source contrasts for {len(all_source_contrasts)} subjects.")
-
-    # --- 3. Compute Grand Average Source Estimate ---
-    log.info("Computing grand average source estimate...")
-    # Sum all STCs and divide by N for the grand average
-    stc_grand_average = np.sum(all_source_contrasts) / len(all_source_contrasts)
-    ga_fname = output_dir / f"{analysis_name}_grand_average-stc.h5"
-    stc_grand_average.save(ga_fname, overwrite=True)
+    log.info(f"Successfully created source contrasts for {source_stack.n_subjects} subjects.")
 
-    # --- 4. Run Group-Level Cluster Statistics ---
-    stats_results = cluster_stats.run_source_cluster_test(all_source_contrasts, fsaverage_src, config)
+    analyze_source_stack(source_stack, fsaverage_src, config, output_dir)
 
-    # --- 5. Generate Report and Visualizations ---
-    log.info("Generating source report and plots...")
-    reporter.generate_source_report(stats_results, stc_grand_average, config, output_dir)
-    plotting.plot_source_clusters(stats_results, stc_grand_average, config, output_dir)
-    
     log.info("-" * 80)
     log.info(f"Source pipeline finished successfully for '{analysis_name}'.")
     log.info(f"All outputs are saved in: {output_dir}")
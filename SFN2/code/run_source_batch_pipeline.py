@@ -0,0 +1,147 @@
+"""
+SFN2 Source-Space Batch Pipeline
+
+Runs the source-space analysis of several configs and datasets in one pass
+over the subjects. Each subject is loaded once per dataset, with the
+conditions of every config, and its inverse operator is read (or generated)
+once. The inverse is applied to all of the subject's contrasts in a stacked
+product and the estimates are morphed to fsaverage together
+(`data_loader.compute_subject_source_batch`), before each one is streamed into
+its config's `SourceStackBuilder`. The group statistics of every stack (grand
+average, cluster test, report and plots, as in
+`run_source_analysis_pipeline.py`) then run one config at a time, since each
+stack and its permutations already take a large share of memory.
+"""
+import argparse
+import logging
+import time
+from pathlib import Path
+
+from SFN2.code.utils import data_loader, cluster_stats
+from SFN2.code.run_source_analysis_pipeline import analyze_source_stack
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+log = logging.getLogger()
+
+OUTPUT_ROOT = Path("SFN2/derivatives/source")
+
+
+def build_batch_source_stacks(subject_dirs, configs, output_dirs):
+    """
+    Streams every config's source contrast of each subject into its own stack,
+    loading each subject and its inverse operator once.
+
+    Args:
+        subject_dirs (list): The subjects' derivative directories.
+        configs (list): The source configs of the batch.
+        output_dirs (dict): {analysis_name: output directory}, for `stats.memmap` stacks.
+
+    Returns:
+        dict: {analysis_name: SourceStackBuilder}.
+    """
+    stacks = {}
+    for config in configs:
+        name = config['analysis_name']
+        memmap_path = output_dirs[name] / f"{name}_source_stack.npy" if config['stats'].get('memmap') else None
+        stacks[name] = cluster_stats.SourceStackBuilder(len(subject_dirs), memmap_path=memmap_path)
+    configs_by_name = {config['analysis_name']: config for config in configs}
+
+    for subject_dir in subject_dirs:
+        log.info(f"  - {subject_dir.name}")
+        try:
+            subject_data = data_loader.load_subject_data(subject_dir, configs)
+        except Exception as e:
+            log.error(f"Error loading {subject_dir.name}: {e}")
+            continue
+        contrasts = {}
+        for name, config in configs_by_name.items():
+            try:
+                contrast_evoked = data_loader.compute_contrast_evoked(subject_data, config)
+            except Exception as e:
+                log.error(f"Error creating contrast '{name}' for {subject_dir.name}: {e}")
+                continue
+            if contrast_evoked is not None:
+                contrasts[name] = contrast_evoked
+        if not contrasts:
+            continue
+
+        inv_operator = data_loader.load_or_generate_inverse_operator(subject_data, configs)
+        if inv_operator is None:
+            log.warning(f"Could not load or generate inverse operator for {subject_dir.name}. Skipping subject.")
+            continue
+
+        try:
+            stcs = data_loader.compute_subject_source_batch(contrasts, inv_operator, configs_by_name)
+        except Exception as e:
+            log.error(f"Error computing source contrasts for {subject_dir.name}: {e}")
+            continue
+        for name, stc in stcs.items():
+            stacks[name].add(stc)
+    return stacks
+
+
+def _analyze(source_stack, fsaverage_src, config, output_dir):
+    """Runs `analyze_source_stack` for one config and dataset; never raises, so one failure cannot stop the batch."""
+    start = time.time()
+    result = {'status': 'ok', 'message': ''}
+    try:
+        analyze_source_stack(source_stack, fsaverage_src, config, output_dir)
+    except Exception as e:
+        log.exception(f"Analysis '{config['analysis_name']}' failed")
+        result.update(status='failed', message=f"{type(e).__name__}: {e}")
+    result['seconds'] = time.time() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the SFN2 source-space analysis for several configs at once")
+    parser.add_argument("--configs", nargs='+', default=["SFN2/configs/source_*.yaml"],
+                        help="Config files, directories or glob patterns (default: all source configs).")
+    parser.add_argument("--accuracies", nargs='+', default=['all', 'acc1'], choices=['all', 'acc1'],
+                        help="Datasets to analyze (default: both).")
+    args = parser.parse_args()
+
+    configs = [config for _, config in data_loader.find_configs(args.configs, domain='source')]
+    names = [config['analysis_name'] for config in configs]
+    if not configs:
+        log.error("No source configs found. Exiting.")
+        return
+    if len(set(names)) != len(names):
+        log.error(f"Analysis names must be unique within a batch: {names}")
+        return
+    log.info(f"Batch of {len(configs)} configs x {len(args.accuracies)} datasets: {', '.join(names)}")
+
+    fsaverage_src = data_loader.get_fsaverage_src()
+    results = {}
+    for accuracy in args.accuracies:
+        subject_dirs = data_loader.get_subject_dirs(accuracy)
+        if not subject_dirs:
+            log.error(f"No subject directories found for '{accuracy}'. Skipping.")
+            continue
+        output_dirs = {name: OUTPUT_ROOT / name / accuracy for name in names}
+        for output_dir in output_dirs.values():
+            output_dir.mkdir(parents=True, exist_ok=True)
+
+        log.info(f"Processing subjects for every source config ({accuracy})...")
+        stacks = build_batch_source_stacks(subject_dirs, configs, output_dirs)
+        for config in configs:
+            name = config['analysis_name']
+            source_stack = stacks.pop(name)
+            if not source_stack.n_subjects:
+                results[(accuracy, name)] = {'status': 'failed', 'message': "No valid source data", 'seconds': 0.}
+                continue
+            log.info(f"{name} ({accuracy}): source contrasts for {source_stack.n_subjects} subjects.")
+            results[(accuracy, name)] = _analyze(source_stack, fsaverage_src, config, output_dirs[name])
+            # Free this stack before the next config's statistics
+            del source_stack
+
+    log.info("-" * 80)
+    for (accuracy, name), result in sorted(results.items()):
+        log.info(f"{name:<45}{accuracy:<6}{result['status']:<8}{result['seconds']:>8.1f} s  {result['message']}")
+    log.info(f"All outputs are saved under: {OUTPUT_ROOT}/<analysis_name>/<dataset>")
+    log.info("-" * 80)
+
+
+if __name__ == "__main__":
+    main()
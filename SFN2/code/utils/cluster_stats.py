@@ -8,8 +8,13 @@ from scipy.stats import t as t_dist
 from scipy.sparse import csr_matrix
 from scipy.spatial.distance import pdist, squareform
 
+from SFN2.code.utils import fsaverage_assets, permutation_engine
+
 log = logging.getLogger()
 
+# TFCE steps up to the largest observed |t| when `stats.tfce` gives no step
+DEFAULT_TFCE_STEPS = 50
+
 
 def _distance_adjacency(info, threshold=0.04):
     """
@@ -34,10 +39,138 @@ def _distance_adjacency(info, threshold=0.04):
     return adjacency, ch_names
 
 
-def run_sensor_cluster_test(contrasts, config):
+def tfce_params(config):
     """
-    Runs a sensor-space cluster permutation test on a list of evoked contrasts.
+    TFCE settings from `stats.tfce` (None when the test uses a cluster-forming
+    threshold). `tfce: true` uses the defaults: start 0 and `DEFAULT_TFCE_STEPS`
+    steps up to the largest observed |t|.
+    """
+    tfce = config['stats'].get('tfce')
+    if not tfce:
+        return None
+    tfce = {} if tfce is True else dict(tfce)
+    params = {
+        'start': float(tfce.get('start', 0.)),
+        'step': tfce.get('step'),
+        'n_steps': tfce.get('n_steps'),
+        'h_power': float(tfce.get('h_power', 2.)),
+        'e_power': float(tfce.get('e_power', .5)),
+    }
+    if params['step'] is None and params['n_steps'] is None:
+        params['n_steps'] = DEFAULT_TFCE_STEPS
+    return params
+
+
+def is_sweep(config):
+    """Whether the config asks for a cluster-threshold sweep (`stats.p_thresholds`, without TFCE)."""
+    return bool(config['stats'].get('p_thresholds')) and tfce_params(config) is None
+
+
+def _run_1samp_cluster_test(X, adjacency, t_threshold, config, out_type, checkpoint=None):
+    """
+    Runs a one-sample spatio-temporal cluster test on (subject, time, feature) data
+    with the engine chosen by `stats.engine` in the config: 'sign_flip' (default,
+    see `permutation_engine`) or 'mne' (`mne.stats.spatio_temporal_cluster_1samp_test`).
+    With `stats.tfce` the sign-flip engine runs a TFCE test and `t_threshold` is unused.
+    The sign-flip engine saves its progress to (and resumes from) `checkpoint`.
     """
+    stats_cfg = config['stats']
+    engine = stats_cfg.get('engine', 'sign_flip')
+    tfce = tfce_params(config)
+    if tfce is not None:
+        if engine != 'sign_flip':
+            raise ValueError("TFCE (`stats.tfce`) is only supported by the 'sign_flip' engine.")
+        return permutation_engine.permutation_tfce_1samp_test(
+            X,
+            adjacency,
+            tail=stats_cfg['tail'],
+            n_permutations=stats_cfg['n_permutations'],
+            seed=stats_cfg.get('seed', None),
+            alpha=stats_cfg['cluster_alpha'],
+            out_type=out_type,
+            max_memory=int(stats_cfg.get('max_memory_mb', 256)) * 1024 ** 2,
+            checkpoint=checkpoint,
+            checkpoint_interval=float(stats_cfg.get('checkpoint_interval', 60)),
+            **tfce
+        )
+    if engine == 'sign_flip':
+        return permutation_engine.permutation_cluster_1samp_test(
+            X,
+            adjacency,
+            t_threshold,
+            tail=stats_cfg['tail'],
+            n_permutations=stats_cfg['n_permutations'],
+            seed=stats_cfg.get('seed', None),
+            out_type=out_type,
+            max_memory=int(stats_cfg.get('max_memory_mb', 256)) * 1024 ** 2,
+            checkpoint=checkpoint,
+            checkpoint_interval=float(stats_cfg.get('checkpoint_interval', 60)),
+        )
+    if engine == 'mne':
+        return mne.stats.spatio_temporal_cluster_1samp_test(
+            X,
+            adjacency=adjacency,
+            threshold=t_threshold,
+            tail=stats_cfg['tail'],
+            n_permutations=stats_cfg['n_permutations'],
+            out_type=out_type,
+            max_step=1,       # Recommended for spatio-temporal clustering
+            n_jobs=-1,        # Use all available CPU cores
+            seed=stats_cfg.get('seed', None),
+            verbose=False
+        )
+    raise ValueError(f"Invalid stats engine: {engine!r} (expected 'sign_flip' or 'mne').")
+
+
+def _t_threshold(p_threshold, n_subjects):
+    """Two-sided t-threshold for a cluster-forming p-value."""
+    return t_dist.ppf(1.0 - p_threshold / 2., n_subjects - 1)
+
+
+def _sweep_p_thresholds(config):
+    """The p-values of a threshold sweep (`stats.p_thresholds`)."""
+    p_thresholds = config['stats'].get('p_thresholds')
+    if not p_thresholds:
+        raise ValueError("A threshold sweep needs a list of p-values in `stats.p_thresholds`.")
+    if tfce_params(config) is not None:
+        raise ValueError("A threshold sweep cannot be combined with TFCE (`stats.tfce`).")
+    return [float(p) for p in p_thresholds]
+
+
+def sweep_config(config, p_threshold):
+    """
+    Config of one threshold of a sweep: `stats.p_threshold` is set to it and the
+    analysis name gets a `_p-<p_threshold>` suffix, so its report and plots do
+    not overwrite those of the other thresholds.
+    """
+    return dict(config, analysis_name=f"{config['analysis_name']}_p-{p_threshold:g}",
+                stats=dict(config['stats'], p_threshold=p_threshold))
+
+
+def _run_1samp_cluster_sweep(X, adjacency, t_thresholds, config, out_type, checkpoint=None):
+    """
+    Runs `_run_1samp_cluster_test` for several t-thresholds. The sign-flip engine
+    shares one permutation pass between them; the MNE engine runs once per threshold.
+    """
+    stats_cfg = config['stats']
+    if stats_cfg.get('engine', 'sign_flip') == 'sign_flip':
+        return permutation_engine.permutation_cluster_1samp_sweep(
+            X,
+            adjacency,
+            t_thresholds,
+            tail=stats_cfg['tail'],
+            n_permutations=stats_cfg['n_permutations'],
+            seed=stats_cfg.get('seed', None),
+            out_type=out_type,
+            max_memory=int(stats_cfg.get('max_memory_mb', 256)) * 1024 ** 2,
+            checkpoint=checkpoint,
+            checkpoint_interval=float(stats_cfg.get('checkpoint_interval', 60)),
+        )
+    return [_run_1samp_cluster_test(X, adjacency, t, config, out_type) for t in t_thresholds]
+
+
+def _prepare_sensor_data(contrasts, config):
+    """Stacks the contrasts into (n_subjects, n_times, n_channels) and finds the channel adjacency."""
     # 1. Prepare data for MNE stats function
     log.info("Preparing data for sensor-space cluster analysis...")
     X = np.array([c.get_data() for c in contrasts])
@@ -57,66 +190,210 @@ def run_sensor_cluster_test(contrasts, config):
         )
     else:
         raise ValueError(f"Invalid connectivity configuration: {conn_cfg!r}")
+    return X, adjacency, ch_names
+
+
+def run_sensor_cluster_test(contrasts, config, checkpoint=None):
+    """
+    Runs a sensor-space cluster permutation test on a list of evoked contrasts.
+
+    With the sign-flip engine, progress is saved to `checkpoint` (a `.npz` path)
+    and a rerun on the same data and settings resumes from it.
+    """
+    X, adjacency, ch_names = _prepare_sensor_data(contrasts, config)
 
     # 3. Define the statistical threshold
     p_threshold = config['stats']['p_threshold']
-    t_threshold = t_dist.ppf(1.0 - p_threshold / 2., len(contrasts) - 1)
-    log.info(f"Calculated t-threshold for cluster formation: {t_threshold:.3f} (for p < {p_threshold})")
+    t_threshold = _t_threshold(p_threshold, len(contrasts))
+    if tfce_params(config) is not None:
+        log.info(f"Using threshold-free cluster enhancement: {tfce_params(config)}")
+    else:
+        log.info(f"Calculated t-threshold for cluster formation: {t_threshold:.3f} (for p < {p_threshold})")
 
     # 4. Run the cluster permutation test
     log.info(f"Running cluster permutation test with {config['stats']['n_permutations']} permutations...")
-    stat_results = mne.stats.spatio_temporal_cluster_1samp_test(
-        X,
-        adjacency=adjacency,
-        threshold=t_threshold,
-        tail=config['stats']['tail'],
-        n_permutations=config['stats']['n_permutations'],
-        out_type='mask',  # Return boolean masks for easy visualization
-        n_jobs=-1,        # Use all available CPU cores
-        verbose=False
-    )
+    stat_results = _run_1samp_cluster_test(X, adjacency, t_threshold, config, out_type='mask', checkpoint=checkpoint)
     log.info("Cluster analysis complete.")
 
     t_obs, clusters, cluster_p_values, H0 = stat_results
     return (t_obs, clusters, cluster_p_values, H0), ch_names
 
 
-def run_source_cluster_test(stcs, fsaverage_src, config):
+def run_sensor_cluster_sweep(contrasts, config, checkpoint=None):
     """
-    Runs a spatio-temporal cluster 1-sample t-test on source-space contrasts.
+    Runs the sensor-space cluster test at every cluster-forming p-value in
+    `stats.p_thresholds`, sharing one permutation pass.
+
+    Returns:
+        tuple: ({p_threshold: stats_results}, ch_names).
     """
-    if len(stcs) < 2:
-        raise ValueError("Cannot run source cluster test with fewer than 2 subjects.")
+    X, adjacency, ch_names = _prepare_sensor_data(contrasts, config)
+    p_thresholds = _sweep_p_thresholds(config)
+    t_thresholds = [_t_threshold(p, len(contrasts)) for p in p_thresholds]
+    for p, t in zip(p_thresholds, t_thresholds):
+        log.info(f"Calculated t-threshold for cluster formation: {t:.3f} (for p < {p})")
+
+    log.info(f"Running cluster permutation sweep over {len(p_thresholds)} thresholds with "
+             f"{config['stats']['n_permutations']} permutations...")
+    sweep_results = _run_1samp_cluster_sweep(X, adjacency, t_thresholds, config, out_type='mask',
+                                             checkpoint=checkpoint)
+    log.info("Cluster sweep complete.")
+    return dict(zip(p_thresholds, sweep_results)), ch_names
+
+
+def _restrict_adjacency(adjacency, src, vertices):
+    """
+    Restricts a source space adjacency to the vertices a source estimate holds
+    (e.g. after restricting it to a label).
+    """
+    if sum(len(v) for v in vertices) == adjacency.shape[0]:
+        return adjacency
+    indices, offset = [], 0
+    for s, vert in zip(src, vertices):
+        if not np.isin(vert, s['vertno']).all():
+            raise ValueError("The source estimates hold vertices that are not in the source space.")
+        indices.append(np.searchsorted(s['vertno'], vert) + offset)
+        offset += len(s['vertno'])
+    indices = np.concatenate(indices)
+    return csr_matrix(adjacency)[indices][:, indices]
+
+
+class SourceStackBuilder:
+    """
+    Streams per-subject source estimates into one preallocated array in the
+    (subject, time, vertex) layout of the cluster tests.
+
+    Each subject's data (or contrast of two estimates) is written straight into
+    its row as float32, so the stack is never held as float64 or transposed in
+    a second copy, and the source estimates can be dropped as soon as they are
+    added. With `memmap_path` the array lives in a `.npy` file on disk instead.
+    """
+
+    def __init__(self, max_subjects, dtype=np.float32, memmap_path=None):
+        self.max_subjects = max_subjects
+        self.dtype = np.dtype(dtype)
+        self.memmap_path = memmap_path
+        self.n_subjects = 0
+        self._X = None
+        self.vertices = self.tmin = self.tstep = self.subject = None
+        self._stc_class = None
+
+    def _allocate(self, stc):
+        shape = (self.max_subjects, stc.data.shape[1], stc.data.shape[0])
+        if self.memmap_path is not None:
+            self._X = np.lib.format.open_memmap(self.memmap_path, mode='w+', dtype=self.dtype, shape=shape)
+        else:
+            self._X = np.empty(shape, dtype=self.dtype)
+        log.info(f"Allocated source stack of shape {shape} ({self._X.nbytes / 1e9:.2f} GB, {self.dtype}).")
+        self.vertices = [v.copy() for v in stc.vertices]
+        self.tmin, self.tstep, self.subject = stc.tmin, stc.tstep, stc.subject
+        self._stc_class = type(stc)
+
+    def add(self, stc, minus=None):
+        """Writes `stc` (or `stc - minus`) as the next subject's row."""
+        if self._X is None:
+            self._allocate(stc)
+        if self.n_subjects >= self.max_subjects:
+            raise ValueError(f"The source stack only holds {self.max_subjects} subjects.")
+        for other in (stc, minus):
+            if other is None:
+                continue
+            if (other.data.shape != (self._X.shape[2], self._X.shape[1])
+                    or not all(np.array_equal(v, w) for v, w in zip(other.vertices, self.vertices))):
+                raise ValueError("All source estimates must share the same vertices and times.")
+        row = self._X[self.n_subjects]
+        if minus is None:
+            row[...] = stc.data.T
+        else:
+            np.subtract(stc.data.T, minus.data.T, out=row, casting='same_kind')
+        self.n_subjects += 1
+
+    @property
+    def data(self):
+        """The (subject, time, vertex) stack of the subjects added so far."""
+        if self._X is None:
+            return np.empty((0, 0, 0), dtype=self.dtype)
+        return self._X[:self.n_subjects]
+
+    def to_stc(self, data):
+        """Wraps (vertex, time) data as a source estimate on the stack's vertices and times."""
+        return self._stc_class(data, [v.copy() for v in self.vertices], self.tmin, self.tstep, subject=self.subject)
+
+    def mean_stc(self):
+        """Grand average over the subjects added so far (accumulated in float64)."""
+        return self.to_stc(self.data.mean(axis=0, dtype=np.float64).T)
 
+
+def stack_source_data(stcs, dtype=np.float32, memmap_path=None):
+    """Stacks a list of source estimates into a (subject, time, vertex) array (see `SourceStackBuilder`)."""
+    builder = SourceStackBuilder(len(stcs), dtype=dtype, memmap_path=memmap_path)
+    for stc in stcs:
+        builder.add(stc)
+    return builder
+
+
+def _prepare_source_data(stcs, fsaverage_src):
+    """Stacks the source estimates (unless already a `SourceStackBuilder`) and gets their adjacency."""
     log.info("Preparing data for source-space cluster analysis...")
-    # Stack data into a (n_subjects, n_times, n_vertices) array
-    # Data is transposed from (n_vertices, n_times) to (n_times, n_vertices)
-    X = np.stack([stc.data.T for stc in stcs], axis=0)
+    # Stack data into a float32 (n_subjects, n_times, n_vertices) array
+    builder = stcs if isinstance(stcs, SourceStackBuilder) else stack_source_data(stcs)
+    if builder.n_subjects < 2:
+        raise ValueError("Cannot run source cluster test with fewer than 2 subjects.")
+    X = builder.data
     log.info(f"Data stacked into shape: {X.shape}")
 
     # Get source space adjacency
     log.info("Calculating source space adjacency for fsaverage...")
-    source_adjacency = mne.spatial_src_adjacency(fsaverage_src)
+    source_adjacency = fsaverage_assets.get_source_adjacency(fsaverage_src)
+    source_adjacency = _restrict_adjacency(source_adjacency, fsaverage_src, builder.vertices)
+    return X, source_adjacency
+
+
+def run_source_cluster_test(stcs, fsaverage_src, config, checkpoint=None):
+    """
+    Runs a spatio-temporal cluster 1-sample t-test on source-space contrasts.
+
+    `stcs` is a list of source estimates or a `SourceStackBuilder` already
+    holding them. With the sign-flip engine, progress is saved to `checkpoint`
+    (a `.npz` path) and a rerun on the same data and settings resumes from it.
+    """
+    X, source_adjacency = _prepare_source_data(stcs, fsaverage_src)
 
     # Calculate t-threshold from the p-value in the config
     n_subjects = X.shape[0]
     p_init = config['stats']['p_threshold']
-    t_threshold = t_dist.ppf(1 - p_init / 2, df=n_subjects - 1)
-    log.info(f"Calculated t-threshold for cluster formation: {t_threshold:.3f} (for p < {p_init})")
+    t_threshold = _t_threshold(p_init, n_subjects)
+    if tfce_params(config) is not None:
+        log.info(f"Using threshold-free cluster enhancement: {tfce_params(config)}")
+    else:
+        log.info(f"Calculated t-threshold for cluster formation: {t_threshold:.3f} (for p < {p_init})")
 
     # Run the cluster permutation test
     log.info(f"Running source cluster permutation test with {config['stats']['n_permutations']} permutations...")
-    stat_results = mne.stats.spatio_temporal_cluster_1samp_test(
-        X,
-        adjacency=source_adjacency,
-        threshold=t_threshold,
-        tail=config['stats']['tail'],
-        n_permutations=config['stats']['n_permutations'],
-        out_type='indices',  # Ensure output is indices for plotting
-        max_step=1,          # Recommended for spatio-temporal clustering
-        n_jobs=-1,
-        seed=config['stats'].get('seed', None),
-        verbose=False
-    )
+    # 'indices' output is what the source plots and report expect
+    stat_results = _run_1samp_cluster_test(X, source_adjacency, t_threshold, config, out_type='indices',
+                                           checkpoint=checkpoint)
     log.info("Source cluster analysis complete.")
     return stat_results
+
+
+def run_source_cluster_sweep(stcs, fsaverage_src, config, checkpoint=None):
+    """
+    Runs the source-space cluster test at every cluster-forming p-value in
+    `stats.p_thresholds`, sharing one permutation pass.
+
+    Returns:
+        dict: {p_threshold: stats_results}.
+    """
+    X, source_adjacency = _prepare_source_data(stcs, fsaverage_src)
+    p_thresholds = _sweep_p_thresholds(config)
+    t_thresholds = [_t_threshold(p, X.shape[0]) for p in p_thresholds]
+    for p, t in zip(p_thresholds, t_thresholds):
+        log.info(f"Calculated t-threshold for cluster formation: {t:.3f} (for p < {p})")
+
+    log.info(f"Running source cluster permutation sweep over {len(p_thresholds)} thresholds with "
+             f"{config['stats']['n_permutations']} permutations...")
+    sweep_results = _run_1samp_cluster_sweep(X, source_adjacency, t_thresholds, config, out_type='indices',
+                                             checkpoint=checkpoint)
+    log.info("Source cluster sweep complete.")
+    return dict(zip(p_thresholds, sweep_results))
@@ -1,14 +1,17 @@
 """
 SFN2 Data Loading Utilities
 """
+import functools
+import glob
 import logging
 import os
 from pathlib import Path
 import yaml
 import mne
-from mne.datasets import fetch_fsaverage
 from mne.minimum_norm import make_inverse_operator, write_inverse_operator
 
+from SFN2.code.utils import epochs_store, evoked_cache, fsaverage_assets, source_inverse
+
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
@@ -34,6 +37,30 @@ def load_config(config_path):
     return config
 
 
+def find_configs(patterns, domain=None):
+    """
+    Loads every config matching the given paths, directories (all `*.yaml`
+    files in them) or glob patterns, optionally keeping only one `domain`.
+
+    Returns:
+        list: (config path, config dict) pairs, sorted by path and without duplicates.
+    """
+    paths = set()
+    for pattern in patterns:
+        if Path(pattern).is_dir():
+            paths.update(Path(pattern).glob("*.yaml"))
+        else:
+            paths.update(Path(p) for p in glob.glob(str(pattern)))
+    configs = []
+    for path in sorted(paths):
+        config = load_config(path)
+        if domain is not None and config.get('domain') != domain:
+            log.info(f"Skipping {path}: domain is {config.get('domain')!r}, not {domain!r}.")
+            continue
+        configs.append((path, config))
+    return configs
+
+
 def get_subject_dirs(accuracy, project_root="."):
     """
     Finds all subject directories (e.g., 'sub-02') for a given accuracy dataset.
@@ -52,29 +79,149 @@ def get_subject_dirs(accuracy, project_root="."):
     return subject_dirs
 
 
+def get_condition_numbers(condition_set_name):
+    """
+    Flattens a named condition set from `condition_sets.yaml` into its list of
+    condition numbers (the CellNumber labels used in the epoch file names).
+    """
+    condition_set = CONDITION_SETS.get(condition_set_name)
+    if not condition_set:
+        log.warning(f"Condition set '{condition_set_name}' not found.")
+        return []
+    # The values of the condition set dict are the lists of condition numbers.
+    return [num for sublist in condition_set.values() for num in sublist]
+
+
+def get_config_condition_numbers(config):
+    """
+    Returns every condition number a contrast config needs, in a stable order.
+    """
+    numbers = []
+    for key in ('condition_A', 'condition_B'):
+        for num in get_condition_numbers(config['contrast'][key]['condition_set_name']):
+            if num not in numbers:
+                numbers.append(num)
+    return numbers
+
+
+class SubjectData:
+    """
+    All condition data for one subject, read from disk at most once per run.
+
+    Per-condition evokeds are built up front (through the shared evoked cache,
+    so a warm cache means no epoch file is opened at all). Epochs are only read
+    when first requested, e.g. for a noise covariance, and are kept so that
+    later requests for overlapping condition sets reuse them.
+    """
+
+    def __init__(self, subject_dir, conditions=None, use_cache=True):
+        self.subject_dir = Path(subject_dir)
+        self.name = self.subject_dir.name
+        self.use_cache = use_cache
+        available = epochs_store.available_conditions(self.subject_dir)
+        if conditions is None:
+            conditions = available
+        self.conditions = [c for c in conditions if c in available]
+        self.evokeds = {
+            cond: evoked_cache.get_condition_evoked(self.subject_dir, cond, use_cache=use_cache)
+            for cond in self.conditions
+        }
+        self._epochs = {}
+        self._concatenated = {}
+
+    def get_condition_epochs(self, cond):
+        """Returns the Epochs of a single condition, reading its file on first use."""
+        if cond not in self._epochs:
+            self._epochs[cond] = epochs_store.read_epochs(self.subject_dir, cond)
+        return self._epochs[cond]
+
+    def get_evokeds(self, condition_numbers):
+        """Returns the per-condition evokeds available for the given condition numbers."""
+        return [self.evokeds[c] for c in condition_numbers if c in self.evokeds]
+
+    def get_epochs(self, condition_numbers=None):
+        """
+        Lazily concatenates the epochs of the given conditions (all by default).
+        Returns None if the subject has none of them.
+        """
+        conds = tuple(c for c in (condition_numbers or self.conditions) if c in self.evokeds)
+        if not conds:
+            return None
+        if conds not in self._concatenated:
+            # A subject stored in the consolidated layout gives the whole set in one sliced read
+            if not any(c in self._epochs or evoked_cache.epoch_fname(self.subject_dir, c).exists()
+                       for c in conds):
+                epochs = epochs_store.read_condition_epochs(self.subject_dir, conds)
+                if epochs is not None:
+                    self._concatenated[conds] = epochs
+                    return epochs
+            epochs_list = [self.get_condition_epochs(c) for c in conds]
+            if len(epochs_list) == 1:
+                self._concatenated[conds] = epochs_list[0].copy()
+            else:
+                self._concatenated[conds] = mne.concatenate_epochs(epochs_list, verbose=False)
+        return self._concatenated[conds]
+
+
+def load_subject_data(subject_dir, configs=None, use_cache=True):
+    """
+    Builds a SubjectData for every condition needed by the given contrast configs
+    (or for all conditions on disk if no configs are given).
+    """
+    conditions = None
+    if configs:
+        conditions = []
+        for config in configs:
+            conditions += [n for n in get_config_condition_numbers(config) if n not in conditions]
+    return SubjectData(subject_dir, conditions=conditions, use_cache=use_cache)
+
+
 def load_and_concatenate_subject_epochs(subject_dir):
     """
     Loads all condition-specific epoch files for a subject and concatenates them.
     """
-    epoch_files = sorted(list(subject_dir.glob("*-epo.fif")))
-    if not epoch_files:
-        log.warning(f"No epoch files found for subject {subject_dir.name}")
-        return None
-    
-    log.debug(f"Loading and concatenating {len(epoch_files)} epoch files for {subject_dir.name}...")
     try:
-        # MNE's read_epochs can take a list of files to concatenate them
-        epochs = mne.read_epochs(epoch_files, preload=True, verbose=False)
-        return epochs
+        epochs = SubjectData(subject_dir).get_epochs()
     except Exception as e:
-        log.error(f"Error reading epochs for {subject_dir.name}: {e}")
+        log.error(f"Error reading epochs for {Path(subject_dir).name}: {e}")
         return None
+    if epochs is None:
+        log.warning(f"No epoch files found for subject {Path(subject_dir).name}")
+    return epochs
+
+
+def compute_contrast_evoked(subject_data, config):
+    """
+    Computes one subject's contrast Evoked from already-loaded per-condition evokeds.
+
+    Returns:
+        mne.Evoked | None: The contrast, or None if either condition set is empty.
+    """
+    evoked_A = subject_data.get_evokeds(
+        get_condition_numbers(config['contrast']['condition_A']['condition_set_name']))
+    evoked_B = subject_data.get_evokeds(
+        get_condition_numbers(config['contrast']['condition_B']['condition_set_name']))
+    if not evoked_A or not evoked_B:
+        log.warning(f"Missing condition data for {subject_data.name}; no contrast created.")
+        return None
+
+    # Average the evoked responses for each condition set
+    grand_average_A = mne.grand_average(evoked_A)
+    grand_average_B = mne.grand_average(evoked_B)
+
+    # Create the contrast
+    return mne.combine_evoked(
+        [grand_average_A, grand_average_B],
+        weights=config['contrast']['combination_weights']
+    )
 
 
-def create_subject_contrast(subject_dir, config):
+def create_subject_contrast(subject_dir, config, subject_data=None):
     """
     Creates a contrast between two conditions for a single subject.
 
+    Pass a preloaded `subject_data` to avoid reading the subject's files again.
+
     Returns:
         tuple: A tuple containing the contrast Evoked object and the concatenated
                Epochs object used for covariance computation. Returns (None, None)
@@ -82,30 +229,15 @@ def create_subject_contrast(subject_dir, config):
     """
     log.debug(f"Creating contrast for subject {subject_dir.name}")
     try:
-        evoked_A, epochs_A = get_evoked_for_condition(
-            subject_dir, config['contrast']['condition_A']
-        )
-        evoked_B, epochs_B = get_evoked_for_condition(
-            subject_dir, config['contrast']['condition_B']
-        )
-
-        if not evoked_A or not evoked_B:
+        if subject_data is None:
+            subject_data = load_subject_data(subject_dir, [config])
+        contrast_evoked = compute_contrast_evoked(subject_data, config)
+        if contrast_evoked is None:
             return None, None
-
-        # Average the evoked responses for each condition set
-        grand_average_A = mne.grand_average(evoked_A)
-        grand_average_B = mne.grand_average(evoked_B)
-
-        # Create the contrast
-        contrast_evoked = mne.combine_evoked(
-            [grand_average_A, grand_average_B],
-            weights=config['contrast']['combination_weights']
-        )
         log.debug(f"Successfully created contrast for {subject_dir.name}")
 
         # Concatenate all epochs for covariance calculation
-        all_epochs = mne.concatenate_epochs(epochs_A + epochs_B, verbose=False)
-
+        all_epochs = subject_data.get_epochs(get_config_condition_numbers(config))
         return contrast_evoked, all_epochs
 
     except Exception as e:
@@ -113,7 +245,7 @@ def create_subject_contrast(subject_dir, config):
         return None, None
 
 
-def get_evoked_for_condition(subject_dir, condition_info):
+def get_evoked_for_condition(subject_dir, condition_info, subject_data=None):
     """
     Loads all epoch files for a given condition set and averages them.
 
@@ -121,31 +253,19 @@ def get_evoked_for_condition(subject_dir, condition_info):
         tuple: A list of Evoked objects and a list of Epochs objects.
     """
     condition_set_name = condition_info['condition_set_name']
-    condition_set = CONDITION_SETS.get(condition_set_name)
-    if not condition_set:
-        log.warning(f"Condition set '{condition_set_name}' not found.")
+    condition_numbers = get_condition_numbers(condition_set_name)
+    if not condition_numbers:
         return [], []
 
-    # The values of the condition set dict are the lists of condition numbers.
-    # We need to flatten them into a single list.
-    condition_numbers = [num for sublist in condition_set.values() for num in sublist]
-
-    evoked_list = []
-    epochs_list = []
-    for cond_num in condition_numbers:
-        # NOTE: The bug was here. The real files use '_epo.fif'.
-        fname = subject_dir / f"{subject_dir.name}_task-numbers_cond-{cond_num}_epo.fif"
-        if fname.exists():
-            epochs = mne.read_epochs(fname, preload=True, verbose=False)
-            epochs_list.append(epochs)
-            evoked_list.append(epochs.average())
-        else:
-            log.debug(f"Epoch file not found, skipping: {fname}")
-
+    if subject_data is None:
+        subject_data = SubjectData(subject_dir, conditions=condition_numbers)
+    evoked_list = subject_data.get_evokeds(condition_numbers)
     if not evoked_list:
         log.warning(f"No epoch files found for condition set {condition_set_name}")
         return [], []
 
+    epochs_list = [subject_data.get_condition_epochs(c) for c in condition_numbers
+                   if c in subject_data.evokeds]
     return evoked_list, epochs_list
 
 
@@ -158,29 +278,40 @@ def get_inverse_operator(subject_dir):
     return mne.minimum_norm.read_inverse_operator(inv_fname, verbose=False)
 
 
-def get_fsaverage_src(project_root="."):
+def load_or_generate_inverse_operator(subject_data, configs):
     """
-    Gets the fsaverage source space. MNE will download this if not found.
-    We assume the 'fsaverage' directory will live in the root of the first dataset.
+    Reads a subject's inverse operator, or generates an fsaverage template one
+    from the epochs of the configs' conditions if none exists yet.
+
+    Returns:
+        InverseOperator | None: None if no operator could be read or generated.
     """
-    subjects_dir_str = mne.get_config('SUBJECTS_DIR')
-    if subjects_dir_str is None:
-        # If not configured, default to MNE's downloader logic
-        subjects_dir = Path(project_root) / "eeg_all" / "derivatives"
-        log.warning("SUBJECTS_DIR not set. Trying to find fsaverage in project derivatives.")
-    else:
-        subjects_dir = Path(subjects_dir_str)
+    subject_dir = subject_data.subject_dir
+    try:
+        return get_inverse_operator(subject_dir)
+    except FileNotFoundError:
+        log.warning(
+            f"Inverse operator not found for {subject_dir.name}. "
+            "Attempting to generate one using fsaverage template..."
+        )
+    condition_numbers = []
+    for config in configs:
+        condition_numbers += [n for n in get_config_condition_numbers(config) if n not in condition_numbers]
+    try:
+        # Epochs are only read from disk here, when a covariance is needed
+        epochs_for_cov = subject_data.get_epochs(condition_numbers)
+        return generate_template_inverse_operator_from_epochs(epochs_for_cov, subject_dir)
+    except Exception as e:
+        log.error(f"Failed to generate template inverse operator for {subject_dir.name}: {e}")
+        return None
 
-    fsaverage_src_path = subjects_dir / "fsaverage" / "bem" / "fsaverage-ico-5-src.fif"
-    if not fsaverage_src_path.exists():
-         # Fallback to MNE's default download mechanism if not found in project structure
-        log.warning(f"fsaverage source space not found at {fsaverage_src_path}, relying on MNE's downloader.")
-        # This will trigger the download if fsaverage is not found at all
-        mne.datasets.fetch_fsaverage(verbose=False)
-        subjects_dir_str = mne.get_config('SUBJECTS_DIR')
-        fsaverage_src_path = Path(subjects_dir_str) / "fsaverage" / "bem" / "fsaverage-ico-5-src.fif"
 
-    return mne.read_source_spaces(fsaverage_src_path, verbose=False)
+def get_fsaverage_src(project_root="."):
+    """
+    Gets the fsaverage ico5 source space from the shared fsaverage asset store
+    (downloaded and computed once for all datasets).
+    """
+    return fsaverage_assets.get_source_space('ico5')
 
 
 def generate_template_inverse_operator_from_epochs(epochs, subject_dir):
@@ -193,25 +324,14 @@ def generate_template_inverse_operator_from_epochs(epochs, subject_dir):
     """
     log.info(f"Generating fsaverage template inverse operator for {subject_dir.name}")
 
-    # Drop non-scalp channels for source modeling using the modern pick_types method
-    epochs.pick_types(eeg=True)
+    # Drop non-scalp channels for source modeling using the modern pick_types method.
+    # Work on a copy: the epochs may be shared through a SubjectData instance.
+    epochs = epochs.copy().pick_types(eeg=True)
 
-    # 2. Setup fsaverage paths
-    subjects_dir = mne.get_config('SUBJECTS_DIR')
-    if subjects_dir is None:
-        mne.datasets.fetch_fsaverage(verbose=False)
-        subjects_dir = mne.get_config('SUBJECTS_DIR')
-
-    fs_dir = Path(subjects_dir) / "fsaverage"
-    trans = "fsaverage"
-    src = fs_dir / "bem" / "fsaverage-ico-5-src.fif"
-    bem = fs_dir / "bem" / "fsaverage-5120-5120-5120-bem-sol.fif"
-
-    # 3. Make forward solution
-    log.info("Computing forward solution...")
-    fwd = mne.make_forward_solution(
-        epochs.info, trans=trans, src=src, bem=bem, eeg=True, mindist=5.0, verbose=False
-    )
+    # 2-3. Forward solution for these channels, from the shared fsaverage asset store
+    # (ico4 BEM with the default conductivity, i.e. the 5120-5120-5120 solution shipped with fsaverage)
+    fwd = fsaverage_assets.get_forward(info=epochs.info, spacing='ico5', ico=4,
+                                       conductivity=(0.3, 0.006, 0.3), mindist=5.0)
 
     # 4. Compute noise covariance
     log.info("Computing noise covariance...")
@@ -230,27 +350,112 @@ def generate_template_inverse_operator_from_epochs(epochs, subject_dir):
     return inv
 
 
-def compute_subject_source_contrast(evoked, inv_operator, config):
-    """
-    Computes the source estimate for a contrast of evoked responses.
-    """
-    method = config['source']['method']
-    lambda2 = 1.0 / (config['source']['snr'] ** 2)
-    
-    # Compute source estimate
-    stc = mne.minimum_norm.apply_inverse(evoked, inv_operator, lambda2,
-                                         method=method, pick_ori=None, verbose=False)
-    
-    # Morph to fsaverage
+@functools.lru_cache(maxsize=None)
+def _source_label(names, parc):
+    """The fsaverage label a source analysis is restricted to (read once per run)."""
+    return fsaverage_assets.read_label(list(names), parc=parc)
+
+
+def _crop_for_source(evokeds, source_cfg):
+    """Restricts the evoked responses to the `stats_window` and `decim` of a `source` config section."""
+    stats_window = source_cfg.get('stats_window') or [None, None]
+    decim = int(source_cfg.get('decim', 1))
+    if stats_window != [None, None] or decim > 1:
+        evokeds = source_inverse.crop_evokeds(evokeds, tmin=stats_window[0], tmax=stats_window[1], decim=decim)
+    return evokeds
+
+
+def _morph_to_fsaverage(stcs, inv_operator):
+    """Morphs source estimates of one subject to fsaverage in a single sparse product."""
     # The subject_from is extracted from the inverse operator's source space info
-    subject_from = stc.subject
+    subject_from = stcs[0].subject
     if subject_from is None:
         # Fallback for older MNE versions if subject info is not in STC
         subject_from = inv_operator['src'][0]['subject_his_id']
 
-    subjects_dir = mne.get_config('SUBJECTS_DIR')
-    morph = mne.compute_source_morph(stc, subject_from=subject_from, subject_to='fsaverage',
-                                     subjects_dir=subjects_dir, verbose=False)
-    stc_fsaverage = morph.apply(stc, verbose=False)
-    
-    return stc_fsaverage
+    # The morph matrix is computed once per source space and cached with the fsaverage assets
+    morph = fsaverage_assets.get_morph_matrix(stcs[0], subject_from, subject_to='fsaverage')
+    return fsaverage_assets.morph_source_estimates(stcs, morph)
+
+
+def _restrict_to_labels(stcs, source_cfg):
+    """Restricts morphed source estimates to the `labels` of a `source` config section, if any."""
+    if source_cfg.get('labels'):
+        label = _source_label(tuple(source_cfg['labels']), source_cfg.get('parc', 'aparc'))
+        stcs = [stc.in_label(label) for stc in stcs]
+    return stcs
+
+
+def compute_subject_source_contrasts(evokeds, inv_operator, config):
+    """
+    Computes the source estimates of several evoked responses (e.g. contrasts)
+    of one subject at once, morphed to fsaverage.
+
+    The inverse operator is prepared once and its kernel is applied to all
+    evoked responses in a single matrix product (see `source_inverse`); the
+    cached morph matrix is then applied to all of them in one sparse product.
+
+    Optional `source` config keys shrink the estimates to what the cluster test
+    needs: `stats_window` ([tmin, tmax], cropped before the inverse), `decim`
+    (keep every n-th sample) and `labels` (fsaverage label names of the `parc`
+    parcellation, default 'aparc', to restrict the vertices to).
+    """
+    source_cfg = config['source']
+    method = source_cfg['method']
+    lambda2 = 1.0 / (source_cfg['snr'] ** 2)
+
+    # Restrict the data to the analysis window before the inverse
+    evokeds = _crop_for_source(evokeds, source_cfg)
+
+    # Compute source estimates
+    stcs = source_inverse.apply_inverse_stacked(evokeds, inv_operator, lambda2, method=method, pick_ori=None)
+
+    # Morph to fsaverage
+    stcs = _morph_to_fsaverage(stcs, inv_operator)
+    return _restrict_to_labels(stcs, source_cfg)
+
+
+def compute_subject_source_batch(contrasts, inv_operator, configs):
+    """
+    Computes one subject's source contrasts for several configs at once.
+
+    Contrasts of configs with the same inverse settings (`method`, `snr`)
+    share one prepared kernel, and those that also share the `stats_window`
+    and `decim` go through the inverse in one stacked product. All estimates
+    are then morphed to fsaverage together, before each config's `labels`
+    are applied.
+
+    Args:
+        contrasts (dict): {analysis_name: contrast Evoked} of one subject.
+        inv_operator (InverseOperator): The subject's inverse operator.
+        configs (dict): {analysis_name: config} for every key of `contrasts`.
+
+    Returns:
+        dict: {analysis_name: SourceEstimate on fsaverage}.
+    """
+    groups = {}
+    for name in contrasts:
+        source_cfg = configs[name]['source']
+        inverse_key = (source_cfg['method'], float(source_cfg['snr']))
+        window_key = (tuple(source_cfg.get('stats_window') or [None, None]), int(source_cfg.get('decim', 1)))
+        groups.setdefault(inverse_key, {}).setdefault(window_key, []).append(name)
+
+    stcs = {}
+    for (method, snr), windows in groups.items():
+        lambda2 = 1.0 / (snr ** 2)
+        kernel = source_inverse.prepare_kernel(inv_operator, lambda2, method, pick_ori=None)
+        for names in windows.values():
+            evokeds = _crop_for_source({name: contrasts[name] for name in names}, configs[names[0]]['source'])
+            stcs.update(source_inverse.apply_inverse_stacked(evokeds, inv_operator, lambda2, method=method,
+                                                             pick_ori=None, kernel=kernel))
+
+    names = list(stcs)
+    morphed = dict(zip(names, _morph_to_fsaverage([stcs[name] for name in names], inv_operator)))
+    return {name: _restrict_to_labels([stc], configs[name]['source'])[0] for name, stc in morphed.items()}
+
+
+def compute_subject_source_contrast(evoked, inv_operator, config):
+    """
+    Computes the source estimate for a contrast of evoked responses.
+    """
+    return compute_subject_source_contrasts([evoked], inv_operator, config)[0]
@@ -0,0 +1,170 @@
+"""
+SFN2 Epoch Storage Layouts
+
+Subjects can be stored in two layouts, written by the preprocessing engine:
+
+    split         one `sub-XX_task-numbers_cond-NN_epo.fif` (+ `_metadata.h5`)
+                  per condition label (the original layout)
+    consolidated  a single `sub-XX_task-numbers_epo.fif` holding every epoch and
+                  the full metadata, with epochs sorted by condition label, plus a
+                  `sub-XX_task-numbers_epo-index.json` mapping each condition
+                  label to its [start, stop) row range
+
+Readers use the split file of a condition when it exists and fall back to the
+consolidated file otherwise, where a condition set is pulled with one file
+open and a sliced read of just the rows it needs.
+
+The preprocessing engine writes 'split' or 'both', never the consolidated file
+alone: many per-dataset scripts (the `03_*` plot scripts, the `04_*` LORETA
+scripts, `SFN/code/topography_analysis.py`, ...) still open the split files
+directly and silently skip a condition whose file is missing.
+"""
+import json
+import logging
+import os
+from pathlib import Path
+import numpy as np
+import mne
+
+log = logging.getLogger(__name__)
+
+# Layouts the preprocessing engine can write ('both' adds the consolidated file to the split ones)
+STORAGE_LAYOUTS = ('split', 'both')
+
+
+def epoch_fname(subject_dir, cond):
+    """
+    Builds the path of a subject's epoch file for one condition label (split layout).
+    """
+    subject_dir = Path(subject_dir)
+    return subject_dir / f"{subject_dir.name}_task-numbers_cond-{cond}_epo.fif"
+
+
+def consolidated_fname(subject_dir):
+    """Path of a subject's consolidated epochs file."""
+    subject_dir = Path(subject_dir)
+    return subject_dir / f"{subject_dir.name}_task-numbers_epo.fif"
+
+
+def index_fname(subject_dir):
+    """Path of the condition index belonging to the consolidated epochs file."""
+    subject_dir = Path(subject_dir)
+    return subject_dir / f"{subject_dir.name}_task-numbers_epo-index.json"
+
+
+def write_consolidated(epochs, subject_dir, label_column='condition_label'):
+    """
+    Writes all of a subject's epochs to one file, grouped by condition label,
+    together with the label -> row-range index.
+
+    Returns:
+        list: The names of the files written, relative to `subject_dir`.
+    """
+    subject_dir = Path(subject_dir)
+    subject_dir.mkdir(parents=True, exist_ok=True)
+
+    labels = epochs.metadata[label_column].astype(str).to_numpy()
+    # A stable sort keeps the original trial order within each condition
+    order = np.argsort(labels, kind='stable')
+    sorted_epochs = epochs[order]
+    sorted_labels = labels[order]
+
+    conditions = {}
+    for label in np.unique(sorted_labels):
+        rows = np.flatnonzero(sorted_labels == label)
+        conditions[str(label)] = [int(rows[0]), int(rows[-1]) + 1]
+
+    fif_path = consolidated_fname(subject_dir)
+    sorted_epochs.save(fif_path, overwrite=True)
+
+    index = {'n_epochs': len(sorted_epochs), 'label_column': label_column, 'conditions': conditions}
+    json_path = index_fname(subject_dir)
+    tmp_path = json_path.with_name(json_path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, json_path)
+    print(f"  - Saved {len(sorted_epochs)} epochs in {len(conditions)} conditions to {fif_path}")
+    return [fif_path.name, json_path.name]
+
+
+def read_condition_index(subject_dir):
+    """
+    Reads the condition index of a consolidated file.
+
+    Returns:
+        dict | None: Mapping of condition label to (start, stop), or None if the
+            subject has no consolidated file.
+    """
+    if not consolidated_fname(subject_dir).exists():
+        return None
+    try:
+        with open(index_fname(subject_dir), 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError) as e:
+        log.warning(f"Consolidated epochs of {Path(subject_dir).name} have no readable index: {e}")
+        return None
+    return {label: tuple(rows) for label, rows in index['conditions'].items()}
+
+
+def get_condition_rows(index, conditions):
+    """Returns the sorted row numbers of the given conditions in a consolidated file."""
+    rows = [np.arange(*index[c]) for c in conditions if c in index]
+    return np.concatenate(rows) if rows else np.array([], dtype=int)
+
+
+def read_condition_epochs(subject_dir, conditions, preload=True):
+    """
+    Reads the epochs of several conditions from a subject's consolidated file
+    with a single open. Only the selected rows are loaded.
+
+    Returns:
+        mne.Epochs | None: The selected epochs, or None if none are available.
+    """
+    index = read_condition_index(subject_dir)
+    if index is None:
+        return None
+    rows = get_condition_rows(index, conditions)
+    if not rows.size:
+        return None
+    epochs = mne.read_epochs(consolidated_fname(subject_dir), preload=False, verbose=False)
+    selected = epochs[rows]
+    if preload:
+        selected.load_data()
+    return selected
+
+
+def available_conditions(subject_dir):
+    """
+    Lists the condition labels a subject has data for, in either layout.
+    """
+    subject_dir = Path(subject_dir)
+    conditions = {
+        f.name.split('_cond-')[1][:-len('_epo.fif')]
+        for f in subject_dir.glob(f"{subject_dir.name}_task-numbers_cond-*_epo.fif")
+    }
+    index = read_condition_index(subject_dir)
+    if index:
+        conditions.update(index)
+    return sorted(conditions)
+
+
+def has_condition(subject_dir, cond):
+    """Checks whether a subject has data for a condition label, in either layout."""
+    if epoch_fname(subject_dir, cond).exists():
+        return True
+    index = read_condition_index(subject_dir)
+    return bool(index) and cond in index
+
+
+def read_epochs(subject_dir, cond, preload=True):
+    """
+    Reads the epochs of one condition, from its split file if present and from
+    the consolidated file otherwise.
+    """
+    fname = epoch_fname(subject_dir, cond)
+    if fname.exists():
+        return mne.read_epochs(fname, preload=preload, verbose=False)
+    epochs = read_condition_epochs(subject_dir, [cond], preload=preload)
+    if epochs is None:
+        raise FileNotFoundError(f"No epochs for condition '{cond}' in {subject_dir}")
+    return epochs
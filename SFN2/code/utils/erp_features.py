@@ -0,0 +1,285 @@
+"""
+Long-format ERP feature table.
+
+The P1/N1 statistics scripts each re-read the epoch files of their own few
+conditions and called `get_peak` per subject and condition. This module
+measures every component on every ROI of `ELECTRODE_GROUPS` for every subject
+and condition in one pass over the group tensor store, and saves the result as
+`<derivatives>/group/features/group_task-numbers_erp-features.parquet` with
+one row per subject x condition x component x ROI:
+
+    subject_id, condition, component, roi, nave,
+    peak_latency (s), peak_amplitude (V), mean_amplitude (V), slope (V/s),
+    channel_peak_latency (s), channel_peak_amplitude (V), channel_slope (V/s)
+
+Peaks are found on the ROI-averaged waveform, as with `get_peak` on a mean ROI
+channel. `mean_amplitude` is the mean over the component window, and `slope`
+is the least-squares slope of the ROI waveform from the peak of the preceding
+component (P1 on its own ROI) to this component's peak; it is NaN for
+components without one. The `channel_*` columns use the channel-wise peak
+instead, the largest value on any single ROI channel, as with `get_peak` on
+an Evoked picked to the ROI channels; `channel_slope` still fits the
+ROI-averaged waveform, between the channel-wise peaks.
+
+Besides the single condition labels (CellNumbers), the table can hold
+condition groups (e.g. "Landing on 1" = 21, 31, 41), measured on the
+equal-weight average of their conditions like `mne.combine_evoked(..., 'equal')`.
+A group's condition label is its conditions joined with '+', e.g. '21+31+41'.
+"""
+import json
+import logging
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from SFN.code.utils import ELECTRODE_GROUPS
+from SFN2.code.utils import epochs_store, group_store, peak_detection
+
+log = logging.getLogger(__name__)
+
+# Bump this if the definition of a feature changes.
+FEATURES_VERSION = 2
+FEATURES_SUBDIR = Path("group") / "features"
+FEATURES_STEM = "group_task-numbers_erp-features"
+
+# Peak polarity and measurement window of each component
+COMPONENTS = {
+    'P1': {'mode': 'pos', 'time_window': (0.080, 0.130)},
+    'N1': {'mode': 'neg', 'time_window': (0.150, 0.200), 'slope_from': ('P1', 'Oz')},
+    'P3b': {'mode': 'pos', 'time_window': (0.435, 0.535)},
+}
+
+FEATURE_COLUMNS = ['peak_latency', 'peak_amplitude', 'mean_amplitude', 'slope',
+                   'channel_peak_latency', 'channel_peak_amplitude', 'channel_slope']
+
+
+def get_rois():
+    """Returns {ROI name: electrodes} for every electrode group of every component."""
+    rois = {}
+    for groups in ELECTRODE_GROUPS.values():
+        for roi, group in groups.items():
+            if rois.setdefault(roi, group['electrodes']) != group['electrodes']:
+                raise ValueError(f"ROI '{roi}' is defined with different electrodes for different components.")
+    return rois
+
+
+def group_label(conditions):
+    """Condition label of the equal-weight average of several conditions."""
+    conditions = list(conditions)
+    return conditions[0] if len(conditions) == 1 else '+'.join(conditions)
+
+
+def _features_paths(derivatives_dir):
+    features_dir = Path(derivatives_dir) / FEATURES_SUBDIR
+    return features_dir / f"{FEATURES_STEM}.parquet", features_dir / f"{FEATURES_STEM}.json"
+
+
+def _combined_nave(nave, cond_index):
+    """nave of the equal-weight average of the available conditions, as `mne.combine_evoked` reports it."""
+    available = nave[:, cond_index] > 0
+    n = available.sum(axis=1)
+    inv_nave = np.where(available, 1 / np.maximum(nave[:, cond_index], 1), 0).sum(axis=1)
+    return np.where(n > 0, np.round(n ** 2 / np.where(n > 0, inv_nave, 1)), 0).astype(int)
+
+
+def _combine_conditions(waveforms, nave, cond_index):
+    """
+    Equal-weight average of a (subject, condition, ..., time) array over the
+    conditions in `cond_index` that each subject has data for.
+    """
+    available = nave[:, cond_index] > 0
+    n = available.sum(axis=1)
+    weights = available / np.maximum(n, 1)[:, np.newaxis]
+    weights = weights.reshape(weights.shape + (1,) * (waveforms.ndim - 2))
+    combined = (np.nan_to_num(waveforms[:, cond_index]) * weights).sum(axis=1)
+    combined[n == 0] = np.nan
+    return combined
+
+
+def _segment_slopes(waveforms, times, sfreq, t_start, t_stop):
+    """
+    Least-squares slopes (like `np.polyfit(..., 1)`) of each waveform between
+    two latencies, inclusive. NaN where the segment is shorter than two samples.
+    """
+    idx = np.arange(len(times))
+    # Latencies to samples by truncation, as `mne.Evoked.time_as_index` does
+    start = ((np.nan_to_num(t_start) - times[0]) * sfreq).astype(int)[..., np.newaxis]
+    stop = ((np.nan_to_num(t_stop) - times[0]) * sfreq).astype(int)[..., np.newaxis]
+    segment = (idx >= start) & (idx <= stop)
+    n = segment.sum(axis=-1, keepdims=True)
+    t_mean = (segment * times).sum(axis=-1, keepdims=True) / np.maximum(n, 1)
+    x_mean = np.where(segment, waveforms, 0).sum(axis=-1, keepdims=True) / np.maximum(n, 1)
+    t_dev = np.where(segment, times - t_mean, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slopes = (t_dev * np.where(segment, waveforms - x_mean, 0)).sum(axis=-1) / (t_dev ** 2).sum(axis=-1)
+    valid = (n[..., 0] >= 2) & np.isfinite(t_start) & np.isfinite(t_stop)
+    return np.where(valid, slopes, np.nan)
+
+
+def extract_features(store, subjects=None, conditions=None, condition_groups=None):
+    """
+    Measures every component on every ROI for the given subjects and conditions.
+
+    Args:
+        store (group_store.GroupStore): The dataset's group tensor store.
+        subjects (list | None): Subject IDs. Defaults to all subjects in the store.
+        conditions (list | None): Condition labels. Defaults to all conditions in the store.
+        condition_groups (list | None): Lists of condition labels to measure on
+            their equal-weight average.
+
+    Returns:
+        pd.DataFrame: The long-format feature table.
+    """
+    subjects = list(subjects or store.subjects)
+    conditions = list(conditions or store.conditions)
+    condition_groups = [list(g) for g in condition_groups or [] if len(g) > 1]
+    s_index = [store.subjects.index(s) for s in subjects]
+    c_index = [store.conditions.index(c) for c in conditions]
+    labels = conditions + [group_label(g) for g in condition_groups]
+
+    nave = store.nave[s_index]
+    group_index = [[store.conditions.index(c) for c in group] for group in condition_groups]
+    naves = np.column_stack([nave[:, c_index]] + [_combined_nave(nave, g) for g in group_index])
+
+    sfreq = store.info['sfreq']
+    tables = []
+    roi_channels = {}
+    for roi, electrodes in get_rois().items():
+        # Only the ROI channels are read from the memory-mapped store
+        picks = [store.ch_names.index(ch) for ch in electrodes]
+        channel_data = np.asarray(store.data[:, :, picks], dtype=np.float64)[s_index]
+        # (subject, condition + group, channel, time) ROI channels
+        roi_channels[roi] = np.concatenate(
+            [channel_data[:, c_index]]
+            + [_combine_conditions(channel_data, nave, g)[:, np.newaxis] for g in group_index],
+            axis=1)
+
+    peaks, channel_peaks = {}, {}
+    for component, params in COMPONENTS.items():
+        tmin, tmax = params['time_window']
+        window = (store.times >= tmin) & (store.times <= tmax)
+        for roi, channels in roi_channels.items():
+            waveforms = channels.mean(axis=-2)
+            peaks[component, roi] = peak_detection.detect_peaks(
+                waveforms, store.times, sfreq, params['time_window'], method='get_peak', mode=params['mode'])
+            channel_peaks[component, roi] = peak_detection.channel_peaks(
+                channels, store.times, sfreq, params['time_window'], mode=params['mode'])
+            slope = channel_slope = np.full(waveforms.shape[:-1], np.nan)
+            if 'slope_from' in params:
+                slope = _segment_slopes(waveforms, store.times, sfreq, peaks[params['slope_from']]['latency'],
+                                        peaks[component, roi]['latency'])
+                channel_slope = _segment_slopes(waveforms, store.times, sfreq,
+                                                channel_peaks[params['slope_from']]['latency'],
+                                                channel_peaks[component, roi]['latency'])
+            tables.append(pd.DataFrame({
+                'subject_id': np.repeat(subjects, len(labels)),
+                'condition': np.tile(labels, len(subjects)),
+                'component': component,
+                'roi': roi,
+                'nave': naves.ravel(),
+                'peak_latency': peaks[component, roi]['latency'].ravel(),
+                'peak_amplitude': peaks[component, roi]['amplitude'].ravel(),
+                'mean_amplitude': waveforms[..., window].mean(axis=-1).ravel(),
+                'slope': slope.ravel(),
+                'channel_peak_latency': channel_peaks[component, roi]['latency'].ravel(),
+                'channel_peak_amplitude': channel_peaks[component, roi]['amplitude'].ravel(),
+                'channel_slope': channel_slope.ravel(),
+            }))
+
+    table = pd.concat(tables, ignore_index=True)
+    return table[table['nave'] > 0].reset_index(drop=True)
+
+
+def _is_current(sidecar, store, subjects, conditions, condition_groups):
+    if sidecar.get('version') != FEATURES_VERSION:
+        return False
+    if sidecar['store_sources'] != {s: store.sidecar['sources'].get(s) for s in sidecar['subjects']}:
+        return False
+    return (set(subjects) <= set(sidecar['subjects']) and set(conditions) <= set(sidecar['conditions'])
+            and {group_label(g) for g in condition_groups} <= set(sidecar['groups']))
+
+
+def load_feature_table(derivatives_dir, condition_groups=None, subjects=None, rebuild=False):
+    """
+    Reads a dataset's ERP feature table, (re)building it first if it is
+    missing, stale or lacks the requested subjects or condition groups.
+
+    Args:
+        derivatives_dir (str | Path): The dataset's derivatives directory.
+        condition_groups (list | None): Lists of condition labels that must be
+            in the table as groups (see `group_label`).
+        subjects (list | None): Subject IDs. Defaults to every subject with epoch data.
+        rebuild (bool): Rebuild even if the table is current.
+
+    Returns:
+        pd.DataFrame: The long-format feature table.
+    """
+    derivatives_dir = Path(derivatives_dir)
+    table_fname, sidecar_fname = _features_paths(derivatives_dir)
+    condition_groups = [list(g) for g in condition_groups or [] if len(g) > 1]
+    if not subjects:
+        subjects = sorted(d.name.split('-')[1] for d in derivatives_dir.glob('sub-*')
+                          if d.is_dir() and epochs_store.available_conditions(d))
+    conditions = sorted({c for s in subjects for c in epochs_store.available_conditions(derivatives_dir / f"sub-{s}")}
+                        | {c for g in condition_groups for c in g})
+
+    sidecar = None
+    if sidecar_fname.exists() and table_fname.exists() and not rebuild:
+        with open(sidecar_fname, 'r') as f:
+            sidecar = json.load(f)
+    store = group_store.load_group_store(derivatives_dir, conditions, subjects)
+    if sidecar is not None and _is_current(sidecar, store, subjects, conditions, condition_groups):
+        return pd.read_parquet(table_fname)
+    if sidecar is not None:
+        log.info("ERP feature table is stale or incomplete, rebuilding.")
+        # Keep the groups other scripts asked for
+        known = {group_label(g) for g in condition_groups}
+        condition_groups += [g.split('+') for g in sidecar['groups'] if g not in known]
+        subjects = sorted(set(subjects) | (set(sidecar['subjects']) & set(store.subjects)))
+
+    print(f"--- Extracting ERP features for {len(subjects)} subjects x {len(conditions)} conditions "
+          f"(+ {len(condition_groups)} groups) ---")
+    conditions = [c for c in conditions if c in store.conditions]
+    table = extract_features(store, subjects, conditions, condition_groups)
+
+    table_fname.parent.mkdir(parents=True, exist_ok=True)
+    tmp_table_fname = table_fname.with_name(f".{os.getpid()}.tmp{table_fname.name}")
+    table.to_parquet(tmp_table_fname, index=False)
+    os.replace(tmp_table_fname, table_fname)
+    sidecar = {
+        'version': FEATURES_VERSION,
+        'subjects': list(subjects),
+        'conditions': conditions,
+        'groups': [group_label(g) for g in condition_groups],
+        'store_sources': {s: store.sidecar['sources'].get(s) for s in subjects},
+    }
+    tmp_sidecar_fname = sidecar_fname.with_name(sidecar_fname.name + '.tmp')
+    with open(tmp_sidecar_fname, 'w') as f:
+        json.dump(sidecar, f)
+    os.replace(tmp_sidecar_fname, sidecar_fname)
+    print(f"  - Saved {len(table)} feature rows to {table_fname}")
+    return table
+
+
+def get_key_condition_features(table, key_conditions_map, component, roi, subjects=None):
+    """
+    Selects the features of one component and ROI for named condition groups.
+
+    Args:
+        table (pd.DataFrame): The feature table.
+        key_conditions_map (dict): Mapping of key condition name to condition labels.
+        component (str), roi (str): The component and ROI to select.
+        subjects (list | None): Restrict to these subject IDs.
+
+    Returns:
+        pd.DataFrame: Columns subject_id, condition (the key condition name),
+            nave and the feature columns.
+    """
+    key_names = {group_label(conds): name for name, conds in key_conditions_map.items()}
+    selected = table[(table['component'] == component) & (table['roi'] == roi)
+                     & table['condition'].isin(key_names)]
+    if subjects:
+        selected = selected[selected['subject_id'].isin(subjects)]
+    selected = selected.assign(condition=selected['condition'].map(key_names))
+    return selected[['subject_id', 'condition', 'nave'] + FEATURE_COLUMNS].reset_index(drop=True)
@@ -0,0 +1,205 @@
+"""
+Persistent, content-addressed cache of per-subject/per-condition Evoked objects.
+
+Every plotting script used to call `mne.read_epochs(..., preload=True).average()`
+on the same `sub-XX_task-numbers_cond-NN_epo.fif` files. This module averages
+each epoch file once and stores the result as an `_ave.fif` next to the
+subject's data (`sub-XX/cache/evoked/`). Entries are keyed on the epoch file's
+size, mtime and SHA-256 plus the averaging parameters, so a rewrite by
+`01_process_lab_data.py` invalidates them automatically.
+
+Subjects stored in the consolidated layout (see `epochs_store`) are averaged
+from their row range of the consolidated file instead; those entries are keyed
+on the consolidated file's fingerprint and the row range.
+"""
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import mne
+from SFN2.code.utils import epochs_store
+from SFN2.code.utils.epochs_store import epoch_fname  # noqa: F401 (re-exported)
+
+log = logging.getLogger(__name__)
+
+# Bump this if the layout or the contents of a cache entry change.
+CACHE_VERSION = 1
+CACHE_SUBDIR = Path("cache") / "evoked"
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_sha256(fname):
+    """Computes the SHA-256 hex digest of a file, reading it in chunks."""
+    digest = hashlib.sha256()
+    with open(fname, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint_file(fname, previous=None):
+    """
+    Returns a {size, mtime_ns, sha256} fingerprint for a file.
+
+    If `previous` (an earlier fingerprint of the same file) still matches the
+    file's size and mtime, its hash is reused instead of re-reading the file.
+    """
+    st = os.stat(fname)
+    fingerprint = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    if (previous and previous.get('size') == st.st_size
+            and previous.get('mtime_ns') == st.st_mtime_ns and previous.get('sha256')):
+        fingerprint['sha256'] = previous['sha256']
+    else:
+        fingerprint['sha256'] = file_sha256(fname)
+    return fingerprint
+
+
+def _cache_key(fingerprint, params):
+    """Hashes the epoch content digest together with the averaging parameters."""
+    payload = json.dumps(
+        {'version': CACHE_VERSION, 'sha256': fingerprint['sha256'], 'params': params},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _read_json(fname):
+    try:
+        with open(fname, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(fname, write_fn):
+    """Writes to a temporary sibling file and renames it into place."""
+    fname = Path(fname)
+    # Keep the MNE-compliant suffix (e.g. '_ave.fif') on the temporary file
+    tmp_fname = fname.with_name(f".{os.getpid()}.tmp{fname.name}")
+    try:
+        write_fn(tmp_fname)
+        os.replace(tmp_fname, fname)
+    finally:
+        if tmp_fname.exists():
+            tmp_fname.unlink()
+
+
+def _cached_average(source_fname, stem, params, read_fn, cache_dir):
+    """
+    Returns `read_fn().average(method=params['method'])`, caching the result in
+    `cache_dir` under `stem`, keyed on the content of `source_fname` and `params`.
+    """
+    index_fname = cache_dir / f"{stem}.json"
+
+    index = _read_json(index_fname) or {}
+    fingerprint = fingerprint_file(source_fname, previous=index.get('fingerprint'))
+    key = _cache_key(fingerprint, params)
+    ave_fname = cache_dir / f"{stem}_desc-{key}_ave.fif"
+
+    if ave_fname.exists():
+        try:
+            evoked = mne.read_evokeds(ave_fname, condition=0, verbose=False)
+            log.debug(f"Evoked cache hit: {ave_fname.name}")
+            return evoked
+        except Exception as e:
+            log.warning(f"Discarding unreadable evoked cache entry {ave_fname}: {e}")
+
+    log.debug(f"Evoked cache miss, averaging {stem}")
+    evoked = read_fn().average(method=params['method'])
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    _write_atomic(ave_fname, lambda tmp: evoked.save(tmp, overwrite=True, verbose=False))
+
+    # Entries built with other averaging parameters stay valid as long as the
+    # epoch content is unchanged; everything else is stale and removed.
+    entries = {k: v for k, v in index.get('entries', {}).items()
+               if _cache_key(fingerprint, v) == k}
+    entries[key] = params
+    for entry in cache_dir.glob(f"{stem}_desc-*_ave.fif"):
+        if entry.name[len(f"{stem}_desc-"):-len('_ave.fif')] not in entries:
+            entry.unlink(missing_ok=True)
+
+    def _dump(tmp):
+        with open(tmp, 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'entries': entries}, f, indent=2, sort_keys=True)
+    _write_atomic(index_fname, _dump)
+    return evoked
+
+
+def get_evoked(fname, method='mean', cache_dir=None, use_cache=True):
+    """
+    Returns the average of an epoch file, using the on-disk cache when possible.
+
+    Args:
+        fname (str | Path): The `_epo.fif` file to average.
+        method (str): Averaging method passed to `Epochs.average` ('mean' or 'median').
+        cache_dir (str | Path | None): Where to store cache entries. Defaults to
+            `<subject_dir>/cache/evoked`.
+        use_cache (bool): If False, read and average the epochs without caching.
+
+    Returns:
+        mne.Evoked: The averaged response.
+    """
+    fname = Path(fname)
+    if not use_cache:
+        return mne.read_epochs(fname, preload=True, verbose=False).average(method=method)
+
+    cache_dir = Path(cache_dir) if cache_dir is not None else fname.parent / CACHE_SUBDIR
+    stem = fname.name[:-len('_epo.fif')] if fname.name.endswith('_epo.fif') else fname.stem
+    return _cached_average(fname, stem, {'method': method},
+                           lambda: mne.read_epochs(fname, preload=True, verbose=False), cache_dir)
+
+
+def get_condition_evoked(subject_dir, cond, method='mean', use_cache=True):
+    """
+    Returns the (cached) evoked response of one condition of a subject, read
+    from its split epoch file if present and from the consolidated file otherwise.
+
+    Raises:
+        FileNotFoundError: If the subject has no epochs for `cond` in either layout.
+    """
+    fname = epoch_fname(subject_dir, cond)
+    if fname.exists():
+        return get_evoked(fname, method=method, use_cache=use_cache)
+
+    index = epochs_store.read_condition_index(subject_dir)
+    if not index or cond not in index:
+        raise FileNotFoundError(f"No epochs for condition '{cond}' in {subject_dir}")
+
+    def read_fn():
+        return epochs_store.read_condition_epochs(subject_dir, [cond])
+
+    if not use_cache:
+        return read_fn().average(method=method)
+    params = {'method': method, 'rows': list(index[cond])}
+    return _cached_average(epochs_store.consolidated_fname(subject_dir), fname.name[:-len('_epo.fif')],
+                           params, read_fn, Path(subject_dir) / CACHE_SUBDIR)
+
+
+def load_subject_evokeds(subject_dir, conditions, method='mean', use_cache=True):
+    """
+    Loads the (cached) evoked response for each condition a subject has data for.
+
+    Conditions without epochs (in either storage layout) are silently left out,
+    matching the behavior of the plotting scripts this replaces.
+
+    Returns:
+        dict: Mapping of condition label to `mne.Evoked`.
+    """
+    evokeds = {}
+    for cond in conditions:
+        if epochs_store.has_condition(subject_dir, cond):
+            evokeds[cond] = get_condition_evoked(subject_dir, cond, method=method, use_cache=use_cache)
+    return evokeds
+
+
+def clear_subject_cache(subject_dir):
+    """Removes every cached evoked entry for a subject."""
+    cache_dir = Path(subject_dir) / CACHE_SUBDIR
+    if not cache_dir.exists():
+        return
+    for fname in cache_dir.iterdir():
+        if fname.is_file():
+            fname.unlink()
+    log.info(f"Cleared evoked cache in {cache_dir}")
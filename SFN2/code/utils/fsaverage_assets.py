@@ -0,0 +1,350 @@
+"""
+Shared fsaverage template assets.
+
+Every source script used to build its own ico5 source space, BEM solution and
+forward model in its own derivatives folder, although all datasets use the
+same template head and net. This store computes each asset once for the whole
+project, under `<project>/derivatives/fsaverage/`:
+
+    fs_subjects_dir/                      the fsaverage subject (downloaded once)
+    src/fsaverage-<spacing>-src.fif       source spaces, by spacing
+    bem/fsaverage-ico<N>-<key>-bem-sol.fif  BEM solutions, by ico and conductivity
+    fwd/fsaverage-<key>-fwd.fif           forward models, by every parameter
+    fwd/fsaverage-<key>-fwd.json          the parameters behind <key>
+    morph/<subject>-to-<subject>-<key>-morph.npz  surface morph matrices (+ .json)
+    adjacency/<subject>-<key>-adjacency.npz  source space adjacency (+ .json)
+
+A forward model is keyed on the montage (name and channel positions), sfreq,
+source spacing, BEM ico, conductivity and mindist, so any dataset or pipeline
+asking for the same model gets the same file. A morph matrix is keyed on the
+source vertices, both subjects, the subjects directory, spacing and smoothing,
+and an adjacency on the source vertices (and the number of times, for a
+spatio-temporal adjacency). Deleting the folder is always
+safe; assets are rebuilt on demand.
+"""
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import numpy as np
+from scipy import sparse
+import mne
+
+log = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+ASSETS_DIR = PROJECT_ROOT / "derivatives" / "fsaverage"
+
+# Bump this if the way an asset is computed changes.
+ASSETS_VERSION = 1
+SUBJECT = 'fsaverage'
+DEFAULT_MONTAGE = 'GSN-HydroCel-128'
+DEFAULT_SFREQ = 250.
+DEFAULT_SPACING = 'ico5'
+DEFAULT_BEM_ICO = 3
+DEFAULT_CONDUCTIVITY = (0.3, 0.006, 0.3)  # scalp, skull, brain
+DEFAULT_MINDIST = 5.0
+
+# BEM solutions that ship with the fsaverage download (MNE's default conductivity)
+_SHIPPED_BEM_SOLUTIONS = {4: "fsaverage-5120-5120-5120-bem-sol.fif"}
+
+
+def _digest(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _tmp_fname(fname):
+    # Keep MNE's file name suffix (-src.fif, -fwd.fif, ...) on the temporary file
+    return fname.with_name(f".{os.getpid()}.tmp{fname.name}")
+
+
+def get_subjects_dir(assets_dir=None):
+    """Returns the FreeSurfer subjects directory holding fsaverage, downloading it on first use."""
+    subjects_dir = Path(assets_dir or ASSETS_DIR) / "fs_subjects_dir"
+    if not (subjects_dir / SUBJECT / "bem").is_dir():
+        subjects_dir.mkdir(parents=True, exist_ok=True)
+        log.info(f"Fetching fsaverage into {subjects_dir}")
+        mne.datasets.fetch_fsaverage(subjects_dir=subjects_dir, verbose=False)
+    return subjects_dir
+
+
+def get_source_space(spacing=DEFAULT_SPACING, assets_dir=None):
+    """Reads (or computes once) the fsaverage surface source space."""
+    assets_dir = Path(assets_dir or ASSETS_DIR)
+    fname = assets_dir / "src" / f"{SUBJECT}-{spacing}-src.fif"
+    if fname.exists():
+        return mne.read_source_spaces(fname, verbose=False)
+
+    log.info(f"Computing fsaverage {spacing} source space...")
+    src = mne.setup_source_space(SUBJECT, spacing=spacing, add_dist=False,
+                                 subjects_dir=get_subjects_dir(assets_dir), verbose=False)
+    fname.parent.mkdir(parents=True, exist_ok=True)
+    mne.write_source_spaces(_tmp_fname(fname), src, overwrite=True, verbose=False)
+    os.replace(_tmp_fname(fname), fname)
+    log.info(f"Saved source space to {fname}")
+    return src
+
+
+def get_bem_solution(ico=DEFAULT_BEM_ICO, conductivity=DEFAULT_CONDUCTIVITY, assets_dir=None):
+    """Reads (or computes once) a 3-layer fsaverage BEM solution."""
+    assets_dir = Path(assets_dir or ASSETS_DIR)
+    conductivity = tuple(float(c) for c in conductivity)
+    subjects_dir = get_subjects_dir(assets_dir)
+    shipped = _SHIPPED_BEM_SOLUTIONS.get(ico)
+    if shipped and conductivity == DEFAULT_CONDUCTIVITY:
+        return mne.read_bem_solution(subjects_dir / SUBJECT / "bem" / shipped, verbose=False)
+
+    fname = assets_dir / "bem" / f"{SUBJECT}-ico{ico}-{_digest(conductivity)}-bem-sol.fif"
+    if fname.exists():
+        return mne.read_bem_solution(fname, verbose=False)
+
+    log.info(f"Computing fsaverage BEM solution (ico={ico}, conductivity={conductivity})...")
+    model = mne.make_bem_model(subject=SUBJECT, ico=ico, conductivity=conductivity,
+                               subjects_dir=subjects_dir, verbose=False)
+    bem = mne.make_bem_solution(model, verbose=False)
+    fname.parent.mkdir(parents=True, exist_ok=True)
+    mne.write_bem_solution(_tmp_fname(fname), bem, overwrite=True, verbose=False)
+    os.replace(_tmp_fname(fname), fname)
+    log.info(f"Saved BEM solution to {fname}")
+    return bem
+
+
+def make_montage_info(montage=DEFAULT_MONTAGE, sfreq=DEFAULT_SFREQ):
+    """Builds an EEG info holding every channel of a standard montage."""
+    montage = mne.channels.make_standard_montage(montage)
+    info = mne.create_info(ch_names=montage.ch_names, sfreq=sfreq, ch_types='eeg')
+    info.set_montage(montage)
+    return info
+
+
+def _montage_fingerprint(info):
+    """Digest of the EEG channel names and positions of an info."""
+    picks = mne.pick_types(info, meg=False, eeg=True, exclude=[])
+    channels = [[info['ch_names'][p], np.round(info['chs'][p]['loc'][:3], 6).tolist()] for p in picks]
+    return _digest(channels)
+
+
+def forward_params(info=None, montage=DEFAULT_MONTAGE, sfreq=DEFAULT_SFREQ, spacing=DEFAULT_SPACING,
+                   ico=DEFAULT_BEM_ICO, conductivity=DEFAULT_CONDUCTIVITY, mindist=DEFAULT_MINDIST):
+    """The parameters a forward model is keyed on (see `get_forward`)."""
+    return {
+        'version': ASSETS_VERSION,
+        'montage': montage if info is None else 'data',
+        'channels': _montage_fingerprint(info if info is not None else make_montage_info(montage, sfreq)),
+        'sfreq': float(sfreq if info is None else info['sfreq']),
+        'spacing': spacing,
+        'bem_ico': int(ico),
+        'conductivity': [float(c) for c in conductivity],
+        'mindist': float(mindist),
+    }
+
+
+def get_forward(info=None, montage=DEFAULT_MONTAGE, sfreq=DEFAULT_SFREQ, spacing=DEFAULT_SPACING,
+                ico=DEFAULT_BEM_ICO, conductivity=DEFAULT_CONDUCTIVITY, mindist=DEFAULT_MINDIST,
+                assets_dir=None):
+    """
+    Reads (or computes once) the fsaverage EEG forward model.
+
+    Args:
+        info (mne.Info | None): Data info whose EEG channels and positions to
+            model. If None, every channel of `montage` at `sfreq` is used.
+        montage (str), sfreq (float): Standard montage and sampling frequency
+            used when `info` is None.
+        spacing (str): Source space spacing, e.g. 'ico5'.
+        ico (int): BEM surface subdivision.
+        conductivity (tuple): Scalp, skull and brain conductivities.
+        mindist (float): Minimum source distance to the inner skull (mm).
+
+    Returns:
+        mne.Forward: The forward solution (its source space is `fwd['src']`).
+    """
+    assets_dir = Path(assets_dir or ASSETS_DIR)
+    params = forward_params(info, montage, sfreq, spacing, ico, conductivity, mindist)
+    key = _digest(params)
+    fname = assets_dir / "fwd" / f"{SUBJECT}-{key}-fwd.fif"
+    if fname.exists():
+        log.info(f"Loading shared forward solution {fname.name}")
+        return mne.read_forward_solution(fname, verbose=False)
+
+    if info is None:
+        info = make_montage_info(montage, sfreq)
+    else:
+        info = info.copy().pick('eeg', exclude=[])
+    src = get_source_space(spacing, assets_dir)
+    bem = get_bem_solution(ico, conductivity, assets_dir)
+    log.info(f"Computing fsaverage forward solution {key}...")
+    fwd = mne.make_forward_solution(info, trans=SUBJECT, src=src, bem=bem, eeg=True,
+                                    mindist=mindist, verbose=False)
+
+    fname.parent.mkdir(parents=True, exist_ok=True)
+    mne.write_forward_solution(_tmp_fname(fname), fwd, overwrite=True, verbose=False)
+    os.replace(_tmp_fname(fname), fname)
+    with open(fname.with_suffix('.json'), 'w') as f:
+        json.dump(params, f, indent=2)
+    log.info(f"Saved forward solution to {fname}")
+    return fwd
+
+
+def _source_vertices(src):
+    """Vertices of a surface SourceSpaces or SourceEstimate, as a list of two arrays."""
+    if isinstance(src, mne.SourceSpaces):
+        if src.kind != 'surface':
+            raise ValueError(f"Morph matrices are only cached for surface source spaces, got '{src.kind}'.")
+        return [np.asarray(s['vertno']) for s in src]
+    if not isinstance(src, mne.SourceEstimate):
+        raise ValueError(f"Morph matrices are only cached for surface source estimates, got {type(src).__name__}.")
+    return [np.asarray(v) for v in src.vertices]
+
+
+def get_morph_matrix(src, subject_from, subject_to=SUBJECT, spacing=5, smooth=None,
+                     subjects_dir=None, assets_dir=None):
+    """
+    Reads (or computes once) the sparse surface morph matrix from a source space to fsaverage.
+
+    `mne.compute_source_morph` is deterministic for a given source space, pair
+    of subjects and subjects directory, so its matrix is stored as a `.npz`
+    file and reused by every later run.
+
+    Args:
+        src (SourceSpaces | SourceEstimate): The surface source space to morph from
+            (or a source estimate defined on it).
+        subject_from, subject_to (str): Subjects to morph from and to.
+        spacing, smooth: As in `mne.compute_source_morph`.
+        subjects_dir (str | Path | None): FreeSurfer subjects directory
+            (default: the shared fsaverage one).
+
+    Returns:
+        dict: 'morph_mat' (sparse, shape (vertex_to, vertex_from)),
+            'vertices_from', 'vertices_to', 'subject_from' and 'subject_to'.
+    """
+    assets_dir = Path(assets_dir or ASSETS_DIR)
+    subjects_dir = Path(subjects_dir or get_subjects_dir(assets_dir)).resolve()
+    vertices_from = _source_vertices(src)
+    params = {
+        'version': ASSETS_VERSION,
+        'subject_from': subject_from,
+        'subject_to': subject_to,
+        'subjects_dir': str(subjects_dir),
+        'vertices_from': _digest([v.tolist() for v in vertices_from]),
+        'spacing': spacing,
+        'smooth': smooth,
+    }
+    fname = assets_dir / "morph" / f"{subject_from}-to-{subject_to}-{_digest(params)}-morph.npz"
+
+    if not fname.exists():
+        log.info(f"Computing source morph {subject_from} -> {subject_to}...")
+        morph = mne.compute_source_morph(src, subject_from=subject_from, subject_to=subject_to,
+                                         subjects_dir=subjects_dir, spacing=spacing, smooth=smooth,
+                                         verbose=False)
+        morph_mat = sparse.csr_matrix(morph.morph_mat)
+        fname.parent.mkdir(parents=True, exist_ok=True)
+        tmp_fname = fname.with_name(f".{os.getpid()}.tmp{fname.name}")
+        with open(tmp_fname, 'wb') as f:
+            np.savez(f, data=morph_mat.data, indices=morph_mat.indices, indptr=morph_mat.indptr,
+                     shape=np.array(morph_mat.shape), vertices_to_lh=morph.vertices_to[0],
+                     vertices_to_rh=morph.vertices_to[1])
+        os.replace(tmp_fname, fname)
+        with open(fname.with_suffix('.json'), 'w') as f:
+            json.dump(params, f, indent=2)
+        log.info(f"Saved source morph to {fname}")
+
+    with np.load(fname) as npz:
+        morph_mat = sparse.csr_matrix((npz['data'], npz['indices'], npz['indptr']), shape=tuple(npz['shape']))
+        vertices_to = [npz['vertices_to_lh'], npz['vertices_to_rh']]
+    return {'morph_mat': morph_mat, 'vertices_from': vertices_from, 'vertices_to': vertices_to,
+            'subject_from': subject_from, 'subject_to': subject_to}
+
+
+def morph_source_estimates(stcs, morph):
+    """
+    Morphs surface source estimates with a cached morph matrix.
+
+    All source estimates are stacked along time and morphed with a single
+    sparse matrix product.
+
+    Args:
+        stcs (list): SourceEstimates on `morph['vertices_from']`.
+        morph (dict): Output of `get_morph_matrix`.
+
+    Returns:
+        list: The morphed SourceEstimates.
+    """
+    for stc in stcs:
+        if (len(stc.vertices) != len(morph['vertices_from'])
+                or not all(np.array_equal(v, w) for v, w in zip(stc.vertices, morph['vertices_from']))):
+            raise ValueError("The source estimate's vertices do not match those of the morph matrix.")
+    if not stcs:
+        return []
+    data = morph['morph_mat'] @ np.concatenate([stc.data for stc in stcs], axis=1)
+    splits = np.cumsum([stc.data.shape[1] for stc in stcs])[:-1]
+    return [mne.SourceEstimate(d, [v.copy() for v in morph['vertices_to']], stc.tmin, stc.tstep,
+                               subject=morph['subject_to'])
+            for d, stc in zip(np.split(data, splits, axis=1), stcs)]
+
+
+def read_label(names, parc='aparc', subject=SUBJECT, assets_dir=None):
+    """
+    Reads and combines labels of an fsaverage parcellation.
+
+    Args:
+        names (list): Label names, e.g. ['lateraloccipital-lh', 'lateraloccipital-rh'].
+        parc (str): Parcellation (annotation) name.
+
+    Returns:
+        Label | BiHemiLabel: The union of the labels.
+    """
+    labels = mne.read_labels_from_annot(subject, parc=parc, subjects_dir=get_subjects_dir(assets_dir),
+                                        verbose=False)
+    by_name = {label.name: label for label in labels}
+    missing = [name for name in names if name not in by_name]
+    if missing:
+        raise ValueError(f"Labels not found in the '{parc}' parcellation: {missing}")
+    combined = by_name[names[0]]
+    for name in names[1:]:
+        combined = combined + by_name[name]
+    return combined
+
+
+def get_source_adjacency(src, n_times=None, assets_dir=None):
+    """
+    Reads (or computes once) the sparse adjacency of a source space.
+
+    Args:
+        src (SourceSpaces): The source space.
+        n_times (int | None): If given, the spatio-temporal adjacency over that
+            many time points (time-major, as `mne.spatio_temporal_src_adjacency`);
+            otherwise the spatial adjacency (`mne.spatial_src_adjacency`).
+
+    Returns:
+        scipy.sparse.coo_matrix: The adjacency.
+    """
+    assets_dir = Path(assets_dir or ASSETS_DIR)
+    subject = src[0].get('subject_his_id') or 'unknown'
+    params = {
+        'version': ASSETS_VERSION,
+        'subject': subject,
+        'kind': src.kind,
+        'vertices': _digest([np.asarray(s['vertno']).tolist() for s in src]),
+        'n_times': None if n_times is None else int(n_times),
+    }
+    fname = assets_dir / "adjacency" / f"{subject}-{_digest(params)}-adjacency.npz"
+    if fname.exists():
+        return sparse.load_npz(fname).tocoo()
+
+    log.info(f"Computing {'spatial' if n_times is None else f'spatio-temporal ({n_times} times)'} "
+             f"source adjacency...")
+    if n_times is None:
+        adjacency = mne.spatial_src_adjacency(src, verbose=False)
+    else:
+        adjacency = mne.spatio_temporal_src_adjacency(src, n_times, verbose=False)
+    adjacency = sparse.coo_matrix(adjacency)
+    fname.parent.mkdir(parents=True, exist_ok=True)
+    tmp_fname = fname.with_name(f".{os.getpid()}.tmp{fname.name}")
+    with open(tmp_fname, 'wb') as f:
+        sparse.save_npz(f, adjacency)
+    os.replace(tmp_fname, fname)
+    with open(fname.with_suffix('.json'), 'w') as f:
+        json.dump(params, f, indent=2)
+    log.info(f"Saved source adjacency to {fname}")
+    return adjacency
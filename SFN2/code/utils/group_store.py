@@ -0,0 +1,235 @@
+"""
+Memory-mapped group tensor of per-subject evoked responses.
+
+Group scripts only need the per-subject averages to compute grand averages,
+yet used to hold a full `mne.Evoked` object for every subject and condition.
+This module stacks those averages once into a float32 array of shape
+(subject, condition, channel, time), saved as a `.npy` file that is opened
+with `mmap_mode='r'`. A small JSON sidecar holds the subject and condition
+labels, channel names, times and nave, and a `-info.fif` holds the measurement
+info, so grand averages are a NumPy slice-and-mean over the mapped file.
+
+The store lives in `<derivatives>/group/cache/evoked_tensor/`. It is rebuilt
+(through the evoked cache, so only changed epoch files are re-averaged) when a
+requested subject or condition is missing or a subject's epoch files changed.
+"""
+import json
+import logging
+import os
+from pathlib import Path
+import numpy as np
+import mne
+
+from SFN2.code.utils import epochs_store, evoked_cache
+
+log = logging.getLogger(__name__)
+
+# Bump this if the layout of the store changes.
+STORE_VERSION = 1
+STORE_SUBDIR = Path("group") / "cache" / "evoked_tensor"
+STORE_STEM = "group_task-numbers_evokeds"
+
+
+def _store_paths(derivatives_dir):
+    store_dir = Path(derivatives_dir) / STORE_SUBDIR
+    return (store_dir / f"{STORE_STEM}.npy", store_dir / f"{STORE_STEM}.json",
+            store_dir / f"{STORE_STEM}-info.fif")
+
+
+def _subject_sources(subject_dir):
+    """Returns {file name: [size, mtime_ns]} for the epoch files of a subject (either layout)."""
+    sources = {}
+    for fname in sorted(Path(subject_dir).glob("*_epo.fif")):
+        st = fname.stat()
+        sources[fname.name] = [st.st_size, st.st_mtime_ns]
+    return sources
+
+
+class GroupStore:
+    """
+    Read-only view of a group tensor store.
+
+    Attributes:
+        data (np.memmap): float32 array of shape (subject, condition, channel, time), in volts.
+            Entries for subjects without a condition are NaN.
+        nave (np.ndarray): int array of shape (subject, condition); 0 where data is missing.
+        subjects, conditions, ch_names (list), times (np.ndarray), info (mne.Info).
+    """
+
+    def __init__(self, derivatives_dir):
+        data_fname, sidecar_fname, info_fname = _store_paths(derivatives_dir)
+        with open(sidecar_fname, 'r') as f:
+            sidecar = json.load(f)
+        self.derivatives_dir = Path(derivatives_dir)
+        self.sidecar = sidecar
+        self.subjects = sidecar['subjects']
+        self.conditions = sidecar['conditions']
+        self.ch_names = sidecar['ch_names']
+        self.times = np.asarray(sidecar['times'])
+        self.nave = np.asarray(sidecar['nave'], dtype=int)
+        self.data = np.load(data_fname, mmap_mode='r')
+        self.info = mne.io.read_info(info_fname, verbose=False)
+
+    def _subject_index(self, subjects):
+        if subjects is None:
+            return list(range(len(self.subjects)))
+        return [self.subjects.index(s) for s in subjects]
+
+    def _evoked(self, data, nave, comment):
+        return mne.EvokedArray(data.astype(np.float64), self.info, tmin=self.times[0],
+                               nave=int(nave), comment=comment, verbose=False)
+
+    def get_evoked(self, subject, cond):
+        """Returns one subject's evoked response, or None if the subject has no data for `cond`."""
+        s, c = self.subjects.index(subject), self.conditions.index(cond)
+        if not self.nave[s, c]:
+            return None
+        return self._evoked(np.asarray(self.data[s, c]), self.nave[s, c], cond)
+
+    def subject_evokeds(self, subject, conditions=None):
+        """Returns {condition: Evoked} for the conditions a subject has data for."""
+        evokeds = {}
+        for cond in conditions or self.conditions:
+            evoked = self.get_evoked(subject, cond)
+            if evoked is not None:
+                evokeds[cond] = evoked
+        return evokeds
+
+    def grand_average(self, cond, subjects=None):
+        """
+        Averages one condition over subjects with equal weights, like
+        `mne.grand_average`. Returns None if no subject has data for `cond`.
+        """
+        c = self.conditions.index(cond)
+        rows = [s for s in self._subject_index(subjects) if self.nave[s, c]]
+        if not rows:
+            return None
+        data = self.data[rows, c].mean(axis=0, dtype=np.float64)
+        return self._evoked(data, len(rows), f"Grand average (n = {len(rows)})")
+
+    def grand_averages(self, conditions=None, subjects=None):
+        """Returns {condition: grand average Evoked} for every condition with data."""
+        grand_averages = {}
+        for cond in conditions or self.conditions:
+            evoked = self.grand_average(cond, subjects=subjects)
+            if evoked is not None:
+                grand_averages[cond] = evoked
+        return grand_averages
+
+
+def _is_current(sidecar, derivatives_dir, subjects, conditions):
+    if sidecar.get('version') != STORE_VERSION:
+        return False
+    if not set(subjects) <= set(sidecar['subjects']) or not set(conditions) <= set(sidecar['conditions']):
+        return False
+    return all(_subject_sources(Path(derivatives_dir) / f"sub-{s}") == sidecar['sources'].get(s)
+               for s in sidecar['subjects'])
+
+
+def build_group_store(derivatives_dir, subjects, conditions, use_cache=True):
+    """
+    Averages (or reads from the evoked cache) every subject/condition pair and
+    writes them to the memory-mapped store.
+
+    Raises:
+        ValueError: If the subjects' evokeds do not share channels and times.
+    """
+    derivatives_dir = Path(derivatives_dir)
+    data_fname, sidecar_fname, info_fname = _store_paths(derivatives_dir)
+    data_fname.parent.mkdir(parents=True, exist_ok=True)
+    log.info(f"--- Building group tensor store for {len(subjects)} subjects x {len(conditions)} conditions ---")
+
+    # Data, info and sidecar are all written to temporary files first and only
+    # then moved into place, sidecar last, so a failed rebuild never pairs new
+    # data with an old sidecar
+    tmp_data_fname = data_fname.with_name(f".{os.getpid()}.tmp{data_fname.name}")
+    tmp_info_fname = info_fname.with_name(f".{os.getpid()}.tmp{info_fname.name}")
+    tmp_sidecar_fname = sidecar_fname.with_name(f".{os.getpid()}.tmp{sidecar_fname.name}")
+    data, nave, ref, sources = None, np.zeros((len(subjects), len(conditions)), dtype=int), None, {}
+    try:
+        for s, subject in enumerate(subjects):
+            subject_dir = derivatives_dir / f"sub-{subject}"
+            sources[subject] = _subject_sources(subject_dir)
+            evokeds = evoked_cache.load_subject_evokeds(subject_dir, conditions, use_cache=use_cache)
+            for c, cond in enumerate(conditions):
+                evoked = evokeds.get(cond)
+                if evoked is None:
+                    continue
+                if ref is None:
+                    ref = evoked
+                    data = np.lib.format.open_memmap(
+                        tmp_data_fname, mode='w+', dtype=np.float32,
+                        shape=(len(subjects), len(conditions), len(ref.ch_names), len(ref.times)))
+                    data[:] = np.nan
+                elif evoked.ch_names != ref.ch_names or not np.allclose(evoked.times, ref.times):
+                    raise ValueError(f"sub-{subject} cond-{cond} does not share channels/times with the "
+                                     f"rest of the group.")
+                data[s, c] = evoked.data
+                nave[s, c] = evoked.nave
+        if ref is None:
+            raise FileNotFoundError(f"No epoch data for any of the requested subjects in {derivatives_dir}")
+        data.flush()
+        del data
+
+        mne.io.write_info(tmp_info_fname, ref.info, overwrite=True)
+        sidecar = {
+            'version': STORE_VERSION,
+            'subjects': list(subjects),
+            'conditions': list(conditions),
+            'ch_names': ref.ch_names,
+            'times': ref.times.tolist(),
+            'sfreq': ref.info['sfreq'],
+            'nave': nave.tolist(),
+            'sources': sources,
+        }
+        with open(tmp_sidecar_fname, 'w') as f:
+            json.dump(sidecar, f)
+
+        # Without a sidecar the store counts as missing, so an interruption
+        # between the moves below just means a rebuild on the next run
+        if sidecar_fname.exists():
+            sidecar_fname.unlink()
+        os.replace(tmp_data_fname, data_fname)
+        os.replace(tmp_info_fname, info_fname)
+        os.replace(tmp_sidecar_fname, sidecar_fname)
+    finally:
+        for tmp_fname in (tmp_data_fname, tmp_info_fname, tmp_sidecar_fname):
+            if tmp_fname.exists():
+                tmp_fname.unlink()
+    log.info(f"  - Saved group tensor store to {data_fname}")
+
+
+def load_group_store(derivatives_dir, conditions, subjects=None, rebuild=False, use_cache=True):
+    """
+    Opens the group tensor store of a dataset, (re)building it first if it is
+    missing, stale or does not cover the requested subjects and conditions.
+
+    Args:
+        derivatives_dir (str | Path): The dataset's derivatives directory.
+        conditions (list): Condition labels that must be in the store.
+        subjects (list | None): Subject IDs (without 'sub-'). Defaults to every
+            `sub-*` directory with epoch data.
+        rebuild (bool): Rebuild even if the store is current.
+
+    Returns:
+        GroupStore: The opened store.
+    """
+    derivatives_dir = Path(derivatives_dir)
+    if not subjects:
+        subjects = sorted(d.name.split('-')[1] for d in derivatives_dir.glob('sub-*')
+                          if d.is_dir() and epochs_store.available_conditions(d))
+    _, sidecar_fname, _ = _store_paths(derivatives_dir)
+
+    sidecar = None
+    if sidecar_fname.exists() and not rebuild:
+        with open(sidecar_fname, 'r') as f:
+            sidecar = json.load(f)
+        if not _is_current(sidecar, derivatives_dir, subjects, conditions):
+            log.info("Group tensor store is stale or incomplete, rebuilding.")
+            # Keep everything that was already stored so other scripts' requests stay covered
+            subjects = sorted(set(subjects) | set(sidecar['subjects']))
+            conditions = list(sidecar['conditions']) + [c for c in conditions if c not in sidecar['conditions']]
+            sidecar = None
+    if sidecar is None:
+        build_group_store(derivatives_dir, list(subjects), list(conditions), use_cache=use_cache)
+    return GroupStore(derivatives_dir)
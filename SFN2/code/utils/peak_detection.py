@@ -0,0 +1,260 @@
+"""
+Batched ERP peak detection.
+
+The contrast scripts used to find peaks one waveform at a time: average the
+ROI channels of a condition, run `scipy.signal.find_peaks` on it (or build an
+`EvokedArray` for `get_peak`) and filter the peaks to the component window in
+a Python loop, once per subject and again for the group. `detect_peaks` does
+the same for a whole stack of ROI waveforms of shape (..., condition, time),
+e.g. (subject, condition, time) sliced from the group tensor store, with NumPy
+operations over all waveforms at once.
+
+The `find_peaks` method follows the scipy rules used by the scripts: local
+maxima (plateaus resolved to their middle sample) with `height`, a minimum
+`distance` between peaks (higher peaks win) and a minimum `prominence`; of the
+peaks inside the window the most prominent is taken. Waveforms without a peak
+fall back to the mean latency of the conditions that have one (along the
+condition axis), then to `fallback_time`. The `get_peak` method follows
+`mne.Evoked.get_peak` on a single channel, and `channel_peaks` follows it on
+several channels at once (the largest value on any one of them).
+"""
+import numpy as np
+
+PEAK_METHODS = ('find_peaks', 'get_peak')
+
+# Upper bound on the (peak, time) masks built per chunk
+_MAX_CHUNK_ELEMENTS = 4_000_000
+
+
+def roi_average(data, ch_names, electrodes):
+    """
+    Averages the ROI channels of an array of shape (..., channel, time).
+
+    Returns:
+        np.ndarray: Array of shape (..., time).
+    """
+    picks = [ch_names.index(ch) for ch in electrodes]
+    return np.asarray(data)[..., picks, :].mean(axis=-2, dtype=np.float64)
+
+
+def _local_maxima(x):
+    """Boolean mask of the local maxima along the last axis, like scipy's `_local_maxima_1d`."""
+    n_times = x.shape[-1]
+    idx = np.arange(n_times)
+    # Last sample of the run of equal values that each sample belongs to
+    run_ends_here = np.concatenate([np.diff(x, axis=-1) != 0, np.ones(x.shape[:-1] + (1,), dtype=bool)], axis=-1)
+    run_end = np.minimum.accumulate(np.where(run_ends_here, idx, n_times)[..., ::-1], axis=-1)[..., ::-1]
+
+    rising = np.zeros(x.shape, dtype=bool)
+    rising[..., 1:] = x[..., :-1] < x[..., 1:]
+    after_run = np.take_along_axis(x, np.minimum(run_end + 1, n_times - 1), axis=-1)
+    starts = rising & (run_end < n_times - 1) & (after_run < x)
+
+    peaks = np.zeros(x.shape, dtype=bool)
+    start_index = np.nonzero(starts)
+    peaks[start_index[:-1] + ((start_index[-1] + run_end[starts]) // 2,)] = True
+    return peaks
+
+
+def _select_by_distance(x, peaks, distance):
+    """
+    Drops peaks closer than `distance` samples to a higher kept peak, like
+    scipy's `_select_by_peak_distance` (the later peak wins ties).
+    """
+    # Work on the peaks of each row, packed to the left of a (row, peak) array
+    rows, cols = np.nonzero(peaks)
+    counts = peaks.sum(axis=-1)
+    n_peaks = counts.max(initial=0)
+    slots = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    valid = np.zeros((len(x), n_peaks), dtype=bool)
+    valid[rows, slots] = True
+    position = np.full(valid.shape, 2 * x.shape[-1])
+    position[rows, slots] = cols
+    height = np.zeros(valid.shape)
+    height[rows, slots] = x[rows, cols]
+
+    # For each offset k, whether peak j + k outranks a close peak j (`right`) and vice versa (`left`)
+    outranks = []
+    for k in range(1, n_peaks):
+        close = position[:, k:] - position[:, :-k] < distance
+        if not close.any():
+            break
+        outranks.append((close & (height[:, k:] >= height[:, :-k]), close & (height[:, :-k] > height[:, k:])))
+
+    keep = valid
+    # A peak's fate only depends on higher peaks, so this settles within as
+    # many passes as there are chains of ever higher close peaks
+    while True:
+        blocked = np.zeros(valid.shape, dtype=bool)
+        for k, (right, left) in enumerate(outranks, start=1):
+            blocked[:, :-k] |= right & keep[:, k:]
+            blocked[:, k:] |= left & keep[:, :-k]
+        new_keep = valid & ~blocked
+        if np.array_equal(new_keep, keep):
+            break
+        keep = new_keep
+
+    kept = np.zeros(peaks.shape, dtype=bool)
+    kept[rows, cols] = keep[rows, slots]
+    return kept
+
+
+def _prominences(x, rows, positions):
+    """
+    Prominences of the peaks at (`rows`, `positions`) of a 2-D waveform array,
+    like scipy's `peak_prominences` without `wlen`.
+    """
+    n_times = x.shape[-1]
+    idx = np.arange(n_times)
+    prominences = np.empty(len(rows))
+    chunk = max(1, _MAX_CHUNK_ELEMENTS // n_times)
+    for start in range(0, len(rows), chunk):
+        waveforms = x[rows[start:start + chunk]]
+        peak = positions[start:start + chunk, np.newaxis]
+        heights = waveforms[np.arange(len(waveforms)), peak[:, 0]][:, np.newaxis]
+        higher = waveforms > heights
+        # The bases lie between the peak and the nearest higher sample on either side
+        left_stop = np.where(higher & (idx < peak), idx, -1).max(axis=-1, keepdims=True)
+        right_stop = np.where(higher & (idx > peak), idx, n_times).min(axis=-1, keepdims=True)
+        left_base = np.where((idx > left_stop) & (idx <= peak), waveforms, np.inf).min(axis=-1)
+        right_base = np.where((idx < right_stop) & (idx >= peak), waveforms, np.inf).min(axis=-1)
+        prominences[start:start + chunk] = heights[:, 0] - np.maximum(left_base, right_base)
+    return prominences
+
+
+def _find_peaks(x, times, sfreq, time_window, height, distance, prominence):
+    """Vectorized `find_peaks` + window filter + most-prominent choice over 2-D rows."""
+    peaks = _local_maxima(x) & (x >= height)
+    peaks = _select_by_distance(x, peaks, int(np.ceil(distance * sfreq)))
+
+    positions = np.flatnonzero((times >= time_window[0]) & (times <= time_window[1]))
+    if not positions.size:
+        return np.zeros(x.shape[0], dtype=int), np.full(x.shape[0], np.nan), np.zeros(x.shape[0], dtype=bool)
+    # Only the peaks inside the window can be chosen, so only they need a prominence
+    rows, cols = np.nonzero(peaks[:, positions])
+    prominences = np.full((x.shape[0], len(positions)), -np.inf)
+    prominences[rows, cols] = _prominences(x, rows, positions[cols])
+    prominences[prominences < prominence] = -np.inf
+
+    best = prominences.argmax(axis=1)
+    best_prominence = prominences[np.arange(len(best)), best]
+    found = np.isfinite(best_prominence)
+    return positions[best], np.where(found, best_prominence, np.nan), found
+
+
+def _window_positions(times, sfreq, time_window):
+    """Sample indices of a peak window."""
+    # Same sample rounding as MNE's time masks
+    tmin = round(time_window[0] * sfreq) / sfreq - 0.5 / sfreq
+    tmax = round(time_window[1] * sfreq) / sfreq + 0.5 / sfreq
+    positions = np.flatnonzero((times >= tmin) & (times <= tmax))
+    if not positions.size:
+        raise ValueError(f"No samples in the peak window {time_window}.")
+    return positions
+
+
+def _get_peak(x, times, sfreq, time_window, mode):
+    """Vectorized single-channel `mne.Evoked.get_peak` over 2-D rows."""
+    positions = _window_positions(times, sfreq, time_window)
+    window = x[:, positions]
+    if mode == 'pos':
+        best, found = window.argmax(axis=1), (window > 0).any(axis=1)
+    elif mode == 'neg':
+        best, found = window.argmin(axis=1), (window < 0).any(axis=1)
+    elif mode == 'abs':
+        best, found = np.abs(window).argmax(axis=1), np.ones(len(window), dtype=bool)
+    else:
+        raise ValueError(f"Unknown peak mode '{mode}'. Use 'pos', 'neg' or 'abs'.")
+    return positions[best], np.full(len(best), np.nan), found
+
+
+def detect_peaks(roi_data, times, sfreq, time_window, method='find_peaks', mode='pos',
+                 height=0, prominence=1.2, distance=0.05, fallback_time=None):
+    """
+    Finds the component peak of every ROI waveform in a stack.
+
+    Args:
+        roi_data (np.ndarray): ROI waveforms of shape (..., condition, time),
+            e.g. (subject, condition, time).
+        times (np.ndarray): Sample times in seconds.
+        sfreq (float): Sampling frequency.
+        time_window (list): [start, end] of the component window in seconds.
+        method (str): 'find_peaks' or 'get_peak'.
+        mode (str): 'pos', 'neg' or 'abs' ('get_peak' only).
+        height, prominence (float): Minimum peak height and prominence ('find_peaks' only).
+        distance (float): Minimum distance between peaks in seconds ('find_peaks' only).
+        fallback_time (float | None): Latency used where no peak can be found.
+
+    Returns:
+        dict: Arrays of shape (..., condition): 'latency' (s; NaN if there is
+            neither a peak nor a fallback), 'amplitude' (the waveform at
+            'latency'), 'prominence' (NaN unless found with 'find_peaks') and
+            'found' (bool).
+    """
+    if method not in PEAK_METHODS:
+        raise ValueError(f"Unknown peak detection method '{method}'. Use 'find_peaks' or 'get_peak'.")
+    roi_data = np.asarray(roi_data, dtype=np.float64)
+    times = np.asarray(times)
+    shape = roi_data.shape[:-1]
+    x = roi_data.reshape(-1, roi_data.shape[-1])
+
+    if method == 'find_peaks':
+        index, prominences, found = _find_peaks(x, times, sfreq, time_window, height, distance, prominence)
+    else:
+        index, prominences, found = _get_peak(x, times, sfreq, time_window, mode)
+    index, prominences, found = index.reshape(shape), prominences.reshape(shape), found.reshape(shape)
+
+    latency = np.where(found, times[index], np.nan)
+    fallback = np.full(shape[:-1] + (1,), np.nan if fallback_time is None else float(fallback_time))
+    if method == 'find_peaks':
+        # Mean latency of the conditions (of the same subject) that do have a peak
+        n_found = found.sum(axis=-1, keepdims=True)
+        mean_latency = np.nansum(latency, axis=-1, keepdims=True) / np.maximum(n_found, 1)
+        fallback = np.where(n_found > 0, mean_latency, fallback)
+    latency = np.where(found, latency, fallback)
+
+    fallback_index = np.abs(times - np.nan_to_num(latency)[..., np.newaxis]).argmin(axis=-1)
+    index = np.where(found, index, fallback_index)
+    amplitude = np.take_along_axis(roi_data, index[..., np.newaxis], axis=-1)[..., 0]
+    amplitude[np.isnan(latency)] = np.nan
+    return {'latency': latency, 'amplitude': amplitude, 'prominence': prominences, 'found': found}
+
+
+def channel_peaks(data, times, sfreq, time_window, mode='pos'):
+    """
+    Finds the peak over all channels of every multi-channel waveform in a stack,
+    like `mne.Evoked.get_peak` on an Evoked holding just the ROI channels.
+
+    Args:
+        data (np.ndarray): Waveforms of shape (..., channel, time).
+        times (np.ndarray): Sample times in seconds.
+        sfreq (float): Sampling frequency.
+        time_window (list): [start, end] of the component window in seconds.
+        mode (str): 'pos', 'neg' or 'abs'.
+
+    Returns:
+        dict: Arrays of shape (...): 'latency' (s), 'amplitude' (the value on
+            the peak channel) and 'channel' (its index); NaN (-1 for 'channel')
+            where `mode` finds no peak, e.g. no positive value for 'pos'.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    times = np.asarray(times)
+    positions = _window_positions(times, sfreq, time_window)
+    window = data[..., positions]
+    # Flattened (channel, time) per waveform, so ties resolve like get_peak's argmax
+    flat = window.reshape(window.shape[:-2] + (-1,))
+    if mode == 'pos':
+        best, found = flat.argmax(axis=-1), (flat > 0).any(axis=-1)
+    elif mode == 'neg':
+        best, found = flat.argmin(axis=-1), (flat < 0).any(axis=-1)
+    elif mode == 'abs':
+        best, found = np.abs(flat).argmax(axis=-1), np.isfinite(flat).any(axis=-1)
+    else:
+        raise ValueError(f"Unknown peak mode '{mode}'. Use 'pos', 'neg' or 'abs'.")
+    channel, index = np.divmod(best, len(positions))
+    amplitude = np.take_along_axis(flat, best[..., np.newaxis], axis=-1)[..., 0]
+    return {
+        'latency': np.where(found, times[positions[index]], np.nan),
+        'amplitude': np.where(found, amplitude, np.nan),
+        'channel': np.where(found, channel, -1),
+    }
@@ -0,0 +1,579 @@
+"""
+Sign-flip permutation engine for one-sample cluster tests.
+
+`mne.stats.spatio_temporal_cluster_1samp_test` recomputes the t-map of every
+permutation on its own. For a one-sample test a permutation only flips the
+sign of some subjects, and the sum of squares of each feature does not change:
+the t-map of a sign vector `s` follows from the flipped mean `s @ X / n` alone.
+This module therefore computes the t-maps of a whole chunk of permutations as
+one matrix product between a (permutation, subject) sign matrix and the
+(subject, feature) data. It then clusters each map with
+`scipy.sparse.csgraph.connected_components` on the supra-threshold part of
+the spatio-temporal adjacency.
+
+Sign vectors are handled through their +/- symmetry. Flipping every subject
+only negates the t-map, so each sign vector is coded by the signs of the first
+n - 1 subjects, and the last subject keeps its sign. For a two-sided test,
+`s` and `-s` give the same maximum absolute cluster sum, so only these
+2**(n - 1) codes are tested, as in MNE. For a one-sided test, each t-map also
+gives the H0 entry of `-s` by negation, so every matrix product counts twice.
+When the requested number of permutations covers all sign vectors (or
+`n_permutations='all'`), the test is exact and enumerates each vector once.
+Otherwise the codes are drawn without replacement from a seeded generator
+(`DEFAULT_SEED` without a seed). Draws are made in fixed-size batches, so a
+run is deterministic and its sign vectors are a prefix of those of a longer
+run.
+
+Chunks are sized so that the chunk's t-maps fit in `max_memory` bytes. The
+results follow the conventions of MNE's one-sample test: cluster sums of t,
+H0 with the observed maximum as its first entry, and p-values as the fraction
+of H0 at least as extreme as each observed cluster. Only the random sign
+vectors differ from MNE's, so p-values agree up to Monte Carlo error (and
+exactly for exact tests).
+
+`permutation_cluster_1samp_sweep` clusters each t-map at several thresholds
+in the same pass, so a threshold sweep costs one set of matrix products.
+
+With a `checkpoint` path, the pass saves the sign vector codes done so far
+and the partial H0 at regular intervals. A `.npz` file holds them, and a
+`.json` sidecar holds the seed and a digest of the data and test settings.
+The codes of a run are a prefix of those of any longer run with the same
+seed. A rerun can therefore resume where the last one stopped, or extend
+`n_permutations`, without repeating any t-map.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+log = logging.getLogger(__name__)
+
+# Default memory budget for the t-maps of one chunk of permutations
+DEFAULT_MAX_MEMORY = 256 * 1024 ** 2
+# Seed of the sign vectors when none is given, so that runs are reproducible
+DEFAULT_SEED = 0
+# Upper bound on the t-maps of one chunk
+_MAX_CHUNK = 256
+# Codes are drawn in batches of this size (keeps the draws prefix-stable)
+_CODE_BATCH = 1024
+# Bump this if the layout of the checkpoint files changes.
+CHECKPOINT_VERSION = 1
+# Seconds between two checkpoint writes
+DEFAULT_CHECKPOINT_INTERVAL = 60
+
+
+def combine_adjacency(adjacency, n_times):
+    """
+    Builds the spatio-temporal adjacency of (time, feature) data flattened in
+    time-major order. A feature is adjacent to its spatial neighbours at the
+    same time and to itself at the neighbouring time points (MNE's max_step=1).
+
+    Args:
+        adjacency (sparse matrix): Spatial adjacency of shape (feature, feature).
+        n_times (int): Number of time points.
+
+    Returns:
+        scipy.sparse.csr_matrix: Adjacency of shape (n_times * n_features,) * 2.
+    """
+    adjacency = sparse.csr_matrix(adjacency, dtype=bool)
+    n_features = adjacency.shape[0]
+    time_chain = sparse.diags([np.ones(n_times - 1), np.ones(n_times - 1)], [-1, 1],
+                              shape=(n_times, n_times), dtype=bool)
+    combined = (sparse.kron(sparse.identity(n_times, dtype=bool), adjacency)
+                + sparse.kron(time_chain, sparse.identity(n_features, dtype=bool)))
+    return sparse.csr_matrix(combined, dtype=bool)
+
+
+def _as_flat(X):
+    """Returns X as (subject, feature) and the (time, feature) sample shape."""
+    X = np.asarray(X)
+    if X.ndim == 2:
+        X = X[:, np.newaxis, :]
+    if X.ndim != 3:
+        raise ValueError(f"X must have shape (subject, time, feature), got {X.shape}.")
+    if not np.issubdtype(X.dtype, np.floating):
+        X = X.astype(np.float64)
+    return X.reshape(X.shape[0], -1), X.shape[1:]
+
+
+def sign_flip_t_maps(X_flat, sum_squares, signs):
+    """
+    Computes one-sample t-maps for several sign vectors in one matrix product.
+
+    Args:
+        X_flat (np.ndarray): Data of shape (subject, feature).
+        sum_squares (np.ndarray): Per-feature sum of squares of X_flat (float64).
+        signs (np.ndarray): Sign vectors (+1/-1) of shape (permutation, subject).
+
+    Returns:
+        np.ndarray: t-values of shape (permutation, feature), in the data's dtype.
+    """
+    n = X_flat.shape[0]
+    t = signs.astype(X_flat.dtype) @ X_flat
+    t /= n
+    # var = (sum(x**2) - n * mean**2) / (n - 1), the same for every sign vector
+    var = sum_squares.astype(X_flat.dtype) - n * np.square(t)
+    var /= n - 1
+    np.maximum(var, np.finfo(X_flat.dtype).tiny, out=var)
+    var /= n
+    t /= np.sqrt(var, out=var)
+    return t
+
+
+def _cluster_labels(t, adjacency, threshold, tail):
+    """
+    Finds the supra-threshold clusters of one t-map.
+
+    Returns:
+        list: (feature indices, cluster labels) per sign that is tested.
+    """
+    out = []
+    if tail >= 0:
+        out.append(np.flatnonzero(t > threshold))
+    if tail <= 0:
+        out.append(np.flatnonzero(t < -threshold))
+    labelled = []
+    for idx in out:
+        if not idx.size:
+            continue
+        _, labels = connected_components(adjacency[idx][:, idx], directed=False)
+        labelled.append((idx, labels))
+    return labelled
+
+
+def find_clusters(t, adjacency, threshold, tail=0):
+    """
+    Clusters one t-map.
+
+    Args:
+        t (np.ndarray): Flat t-map of shape (feature,).
+        adjacency (scipy.sparse.csr_matrix): Spatio-temporal adjacency (see `combine_adjacency`).
+        threshold (float): Cluster-forming threshold (a positive t-value).
+        tail (int): 0 for two-sided, 1 for positive and -1 for negative clusters.
+
+    Returns:
+        tuple: (list of sorted flat feature indices per cluster, array of cluster sums of t).
+    """
+    clusters, sums = [], []
+    for idx, labels in _cluster_labels(t, adjacency, threshold, tail):
+        order = np.argsort(labels, kind='stable')
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        for members in np.split(idx[order], bounds):
+            clusters.append(members)
+            sums.append(t[members].sum())
+    return clusters, np.array(sums, dtype=np.float64)
+
+
+def max_cluster_sum(t, adjacency, threshold, tail=0):
+    """Returns the largest cluster sum of one t-map (signed; 0 without clusters), as in MNE's H0."""
+    best = 0.
+    for idx, labels in _cluster_labels(t, adjacency, threshold, tail):
+        sums = np.bincount(labels, weights=t[idx])
+        extreme = sums[np.argmax(np.abs(sums))]
+        if abs(extreme) > abs(best):
+            best = extreme
+    return best
+
+
+def _chunk_size(n_features, itemsize, n_permutations, max_memory):
+    # Larger chunks gain little over clustering each map, and would delay progress checkpoints
+    return int(max(1, min(n_permutations, _MAX_CHUNK, max_memory // max(1, 3 * n_features * itemsize))))
+
+
+def _sample_codes(rng, n_codes, n_half):
+    """Draws `n_codes` distinct codes from [1, n_half) in fixed-size batches."""
+    seen, codes = set(), []
+    while len(codes) < n_codes:
+        for code in rng.integers(1, n_half, size=_CODE_BATCH).tolist():
+            if code not in seen:
+                seen.add(code)
+                codes.append(code)
+                if len(codes) == n_codes:
+                    break
+    return np.array(codes, dtype=np.int64)
+
+
+def sign_flip_plan(n_subjects, n_permutations, tail=0, seed=None):
+    """
+    Chooses the sign vectors of a one-sample test.
+
+    Args:
+        n_subjects (int): Number of subjects.
+        n_permutations (int | 'all'): Requested size of H0, including the observed data.
+        tail (int): 0 for two-sided, 1 or -1 for one-sided tests.
+        seed (int | None): Seed of the random codes (None: `DEFAULT_SEED`).
+
+    Returns:
+        dict: 'codes' (int64 codes of the sign vectors besides the observed data,
+            see `decode_signs`), 'mirror' (each code also stands for its negation),
+            'exact' and 'n_permutations' (the size of H0).
+    """
+    if not 2 <= n_subjects <= 63:
+        raise ValueError(f"The sign-flip engine supports 2 to 63 subjects, got {n_subjects}.")
+    mirror = tail != 0
+    n_half = 2 ** (n_subjects - 1)
+    n_total = 2 * n_half if mirror else n_half
+    if isinstance(n_permutations, str):
+        if n_permutations != 'all':
+            raise ValueError(f"n_permutations as a string must be 'all', got {n_permutations!r}.")
+        n_permutations = n_total
+    n_permutations = int(n_permutations)
+    if n_permutations >= n_total:
+        return {'codes': np.arange(1, n_half, dtype=np.int64), 'mirror': mirror,
+                'exact': True, 'n_permutations': n_total}
+    # H0 holds the observed data (and its negation if mirrored) plus one or two entries per code
+    n_codes = -(-(n_permutations - 1 - mirror) // (1 + mirror))
+    rng = np.random.default_rng(DEFAULT_SEED if seed is None else seed)
+    return {'codes': _sample_codes(rng, max(0, n_codes), n_half), 'mirror': mirror,
+            'exact': False, 'n_permutations': n_permutations}
+
+
+def decode_signs(codes, n_subjects):
+    """Sign vectors (permutation, subject) of codes: bit i set flips subject i; the last subject keeps its sign."""
+    bits = (np.asarray(codes, dtype=np.int64)[:, np.newaxis] >> np.arange(n_subjects - 1)) & 1
+    signs = np.ones((len(codes), n_subjects))
+    signs[:, :-1] -= 2 * bits
+    return signs
+
+
+def _pvalues(cluster_sums, H0, tail):
+    if tail == -1:
+        return np.array([np.mean(H0 <= s) for s in cluster_sums])
+    if tail == 1:
+        return np.array([np.mean(H0 >= s) for s in cluster_sums])
+    return np.array([np.mean(np.abs(H0) >= abs(s)) for s in cluster_sums])
+
+
+def _format_clusters(clusters, sample_shape, out_type):
+    if out_type == 'indices':
+        return [np.unravel_index(c, sample_shape) for c in clusters]
+    masks = []
+    for c in clusters:
+        mask = np.zeros(int(np.prod(sample_shape)), dtype=bool)
+        mask[c] = True
+        masks.append(mask.reshape(sample_shape))
+    return masks
+
+
+def _observed_max(cluster_sums, tail):
+    """The observed entry of H0, as in MNE."""
+    if tail == -1:
+        return cluster_sums.min()
+    if tail == 1:
+        return cluster_sums.max()
+    return cluster_sums[np.argmax(np.abs(cluster_sums))]
+
+
+def permutation_cluster_1samp_test(X, adjacency, threshold, tail=0, n_permutations=1024, seed=None,
+                                   out_type='indices', max_memory=DEFAULT_MAX_MEMORY, checkpoint=None,
+                                   checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+    """
+    One-sample spatio-temporal cluster permutation test by sign flipping.
+
+    Args:
+        X (np.ndarray): Data of shape (subject, time, feature), e.g. the float32
+            stack of `cluster_stats.SourceStackBuilder`.
+        adjacency (sparse matrix): Spatial adjacency of shape (feature, feature), or
+            a precomputed spatio-temporal one of shape (time * feature,) * 2.
+        threshold (float): Cluster-forming threshold (a positive t-value).
+        tail (int): 0 for two-sided, 1 for positive and -1 for negative clusters.
+        n_permutations (int | 'all'): Size of H0, including the observed data. Tests
+            are exact when this covers every sign vector (see `sign_flip_plan`).
+        seed (int | None): Seed of the random sign vectors (None: `DEFAULT_SEED`).
+        out_type ('indices' | 'mask'): Cluster format, as in MNE.
+        max_memory (int): Memory budget in bytes for the t-maps of one chunk.
+        checkpoint (str | Path | None): `.npz` file to save progress to and resume from.
+        checkpoint_interval (float): Seconds between two checkpoint writes.
+
+    Returns:
+        tuple: (t_obs of shape (time, feature), clusters, cluster_p_values, H0), as
+            returned by `mne.stats.spatio_temporal_cluster_1samp_test`.
+    """
+    return permutation_cluster_1samp_sweep(X, adjacency, [threshold], tail=tail, n_permutations=n_permutations,
+                                           seed=seed, out_type=out_type, max_memory=max_memory,
+                                           checkpoint=checkpoint, checkpoint_interval=checkpoint_interval)[0]
+
+
+def _prepare_test(X, adjacency):
+    """Flattens X, combines the adjacency over time and computes the observed t-map."""
+    X_flat, sample_shape = _as_flat(X)
+    n_subjects, n_features = X_flat.shape
+    if n_subjects < 2:
+        raise ValueError("A one-sample test needs at least 2 subjects.")
+    if adjacency.shape[0] != n_features:
+        adjacency = combine_adjacency(adjacency, sample_shape[0])
+    adjacency = sparse.csr_matrix(adjacency)
+    if adjacency.shape != (n_features, n_features):
+        raise ValueError(f"Adjacency of shape {adjacency.shape} does not match {sample_shape} features.")
+    sum_squares = np.einsum('ij,ij->j', X_flat, X_flat, dtype=np.float64)
+    t_obs_flat = sign_flip_t_maps(X_flat, sum_squares, np.ones((1, n_subjects)))[0].astype(np.float64)
+    return X_flat, sample_shape, adjacency, sum_squares, t_obs_flat
+
+
+def _array_digest(*arrays):
+    """sha256 (16 hex digits) of the dtype, shape and bytes of arrays, hashed row by row."""
+    h = hashlib.sha256()
+    for a in arrays:
+        a = np.asarray(a)
+        h.update(f"{a.dtype.str}{a.shape}".encode())
+        for row in a.reshape(len(a), -1) if a.ndim else [a.reshape(1)]:
+            h.update(np.ascontiguousarray(row))
+    return h.hexdigest()[:16]
+
+
+def _checkpoint_params(X_flat, adjacency, **params):
+    """Identifies a test: its data, adjacency and settings (see `_permutation_pass`)."""
+    return dict(params, data=_array_digest(X_flat), adjacency=_array_digest(adjacency.indptr, adjacency.indices),
+                version=CHECKPOINT_VERSION)
+
+
+def _read_checkpoint(fname, params):
+    """Returns (codes, H0) of a checkpoint made with the same params, or None."""
+    fname = Path(fname)
+    try:
+        with open(fname.with_suffix('.json'), 'r') as f:
+            sidecar = json.load(f)
+        with np.load(fname) as saved:
+            codes, H0 = saved['codes'], saved['H0']
+    except (OSError, ValueError, KeyError):
+        return None
+    if sidecar.get('params') != params or sidecar.get('n_codes') != len(codes):
+        log.info(f"Ignoring checkpoint {fname}: it belongs to other data or test settings.")
+        return None
+    return codes, H0
+
+
+def _write_checkpoint(fname, params, codes, H0):
+    fname = Path(fname)
+    fname.parent.mkdir(parents=True, exist_ok=True)
+    tmp_fname = fname.with_name(f".{os.getpid()}.tmp{fname.name}")
+    with open(tmp_fname, 'wb') as f:
+        np.savez(f, codes=codes, H0=np.array(H0, dtype=np.float64))
+    # The sidecar is written last; a reader checks its code count against the .npz
+    tmp_sidecar = fname.with_name(f".{os.getpid()}.tmp{fname.stem}.json")
+    with open(tmp_sidecar, 'w') as f:
+        json.dump({'params': params, 'n_codes': int(len(codes)), 'n_entries': len(H0[0]),
+                   'updated': time.strftime('%Y-%m-%d %H:%M:%S')}, f, indent=2)
+    os.replace(tmp_fname, fname)
+    os.replace(tmp_sidecar, fname.with_suffix('.json'))
+
+
+def _permutation_pass(X_flat, sum_squares, plan, map_stats, H0_start, max_memory, label,
+                      checkpoint=None, checkpoint_params=None, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+    """
+    Runs the sign vectors of `plan` chunk by chunk.
+
+    Args:
+        map_stats (callable): Maps one flat t-map to its H0 entries (one per series).
+        H0_start (list of list): The observed entries of each series.
+        label (str): Description of the test for the progress log.
+        checkpoint (str | Path | None): `.npz` file to resume from and save progress to.
+        checkpoint_params (dict): Identifies the test (see `_checkpoint_params`).
+        checkpoint_interval (float): Seconds between two checkpoint writes.
+
+    Returns:
+        list of np.ndarray: The H0 distribution of each series.
+    """
+    n_subjects, n_features = X_flat.shape
+    codes, mirror = plan['codes'], plan['mirror']
+    H0 = [list(h) for h in H0_start]
+    n_resumed = 0
+    if checkpoint is not None:
+        saved = _read_checkpoint(checkpoint, checkpoint_params)
+        if saved is not None:
+            saved_codes, saved_H0 = saved
+            n_use = min(len(saved_codes), len(codes))
+            if len(saved_H0) == len(H0) and np.array_equal(saved_codes[:n_use], codes[:n_use]):
+                H0 = [list(h[:len(h0) + n_use * (1 + mirror)]) for h, h0 in zip(saved_H0, H0_start)]
+                n_resumed = n_use
+                log.info(f"Resuming from checkpoint {checkpoint}: {n_use}/{len(codes)} t-maps already done.")
+            else:
+                log.info(f"Ignoring checkpoint {checkpoint}: its sign vectors differ from this run's.")
+
+    chunk = _chunk_size(n_features, X_flat.dtype.itemsize, max(1, len(codes)), max_memory)
+    log.info(f"Sign-flip engine: {plan['n_permutations']} permutations{' (exact test)' if plan['exact'] else ''} "
+             f"of {n_subjects} subjects x {n_features} features ({label}), "
+             f"{len(codes)} t-maps in chunks of {chunk}.")
+    n_logged, t_start = n_resumed * 10 // max(1, len(codes)), time.time()
+    t_saved, n_saved = t_start, n_resumed
+    for start in range(n_resumed, len(codes), chunk):
+        t_maps = sign_flip_t_maps(X_flat, sum_squares, decode_signs(codes[start:start + chunk], n_subjects))
+        for t in t_maps:
+            for h, value in zip(H0, map_stats(t)):
+                h.append(value)
+            if mirror:
+                for h, value in zip(H0, map_stats(-t)):
+                    h.append(value)
+        n_done = start + len(t_maps)
+        if checkpoint is not None and time.time() - t_saved >= checkpoint_interval:
+            _write_checkpoint(checkpoint, checkpoint_params, codes[:n_done], H0)
+            t_saved, n_saved = time.time(), n_done
+        if n_done * 10 // len(codes) > n_logged:
+            n_logged = n_done * 10 // len(codes)
+            elapsed = time.time() - t_start
+            log.info(f"  {n_done}/{len(codes)} t-maps done ({elapsed:.0f} s elapsed, "
+                     f"~{elapsed * (len(codes) - n_done) / (n_done - n_resumed):.0f} s left)")
+    if checkpoint is not None and len(codes) > n_saved:
+        _write_checkpoint(checkpoint, checkpoint_params, codes, H0)
+    return [np.array(h[:plan['n_permutations']], dtype=np.float64) for h in H0]
+
+
+def permutation_cluster_1samp_sweep(X, adjacency, thresholds, tail=0, n_permutations=1024, seed=None,
+                                    out_type='indices', max_memory=DEFAULT_MAX_MEMORY, checkpoint=None,
+                                    checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+    """
+    Runs `permutation_cluster_1samp_test` for several cluster-forming thresholds
+    in one pass: every permutation t-map is computed once and clustered at each
+    threshold, so all thresholds share the same sign vectors.
+
+    Args:
+        thresholds (list of float): Cluster-forming thresholds (positive t-values).
+        Other arguments: As in `permutation_cluster_1samp_test`.
+
+    Returns:
+        list: One (t_obs, clusters, cluster_p_values, H0) tuple per threshold.
+    """
+    if out_type not in ('indices', 'mask'):
+        raise ValueError(f"out_type must be 'indices' or 'mask', got {out_type!r}.")
+    X_flat, sample_shape, adjacency, sum_squares, t_obs_flat = _prepare_test(X, adjacency)
+    t_obs = t_obs_flat.reshape(sample_shape)
+    observed = [find_clusters(t_obs_flat, adjacency, threshold, tail) for threshold in thresholds]
+    results = [(t_obs, [], np.array([]), np.array([]))] * len(thresholds)
+    active = [i for i, (clusters, _) in enumerate(observed) if clusters]
+    for i in set(range(len(thresholds))) - set(active):
+        log.warning(f"No clusters found at threshold {thresholds[i]:.3f}, returning empty H0, clusters, and cluster_pv")
+    if not active:
+        return results
+
+    def map_stats(t):
+        return [max_cluster_sum(t, adjacency, thresholds[i], tail) for i in active]
+
+    plan = sign_flip_plan(X_flat.shape[0], n_permutations, tail, seed)
+    H0_start = [[_observed_max(observed[i][1], tail)] for i in active]
+    if plan['mirror']:
+        for h, value in zip(H0_start, map_stats(-t_obs_flat)):
+            h.append(value)
+    params = None if checkpoint is None else _checkpoint_params(
+        X_flat, adjacency, test='clusters', thresholds=[float(thresholds[i]) for i in active], tail=tail,
+        seed=seed)
+    H0 = _permutation_pass(X_flat, sum_squares, plan, map_stats, H0_start, max_memory,
+                           f"{len(active)} cluster threshold(s)", checkpoint, params, checkpoint_interval)
+
+    for h, i in zip(H0, active):
+        clusters, cluster_sums = observed[i]
+        results[i] = (t_obs, _format_clusters(clusters, sample_shape, out_type), _pvalues(cluster_sums, h, tail), h)
+    return results
+
+
+def tfce_scores(t, adjacency, start, step, tail=0, h_power=2., e_power=.5):
+    """
+    Threshold-free cluster enhancement of one t-map, as in MNE: the score of a
+    feature is the sum, over the thresholds start, start + step, ... below the
+    map's largest value, of threshold**h_power * dh * extent**e_power of the
+    cluster holding it.
+
+    Each higher threshold only keeps part of the features of the previous
+    one, so the supra-threshold subgraph is cut down step by step instead of
+    being extracted from the full adjacency every time.
+
+    Args:
+        t (np.ndarray): Flat t-map of shape (feature,).
+        adjacency (scipy.sparse.csr_matrix): Spatio-temporal adjacency.
+        start, step (float): First threshold and step (positive; `tail` sets the sign).
+        tail (int): 0 for two-sided, 1 for positive and -1 for negative effects.
+        h_power, e_power (float): Height and extent exponents.
+
+    Returns:
+        np.ndarray: Non-negative TFCE scores of shape (feature,).
+    """
+    scores = np.zeros(t.size)
+    signed = ([t] if tail >= 0 else []) + ([-t] if tail <= 0 else [])
+    stop = max(x.max() for x in signed)
+    thresholds = np.arange(start, stop, step, dtype=float)
+    for x in signed:
+        idx = np.flatnonzero(x > start)
+        sub = adjacency[idx][:, idx]
+        previous = 0.
+        for thresh in thresholds:
+            keep = x[idx] > thresh
+            if not keep.all():
+                idx = idx[keep]
+                sub = sub[keep][:, keep]
+            if not idx.size:
+                break
+            _, labels = connected_components(sub, directed=False)
+            extent = np.bincount(labels)
+            scores[idx] += thresh ** h_power * (thresh - previous) * extent[labels] ** e_power
+            previous = thresh
+    return scores
+
+
+def permutation_tfce_1samp_test(X, adjacency, start=0., step=None, n_steps=None, tail=0, h_power=2., e_power=.5,
+                                n_permutations=1024, seed=None, alpha=0.05, out_type='indices',
+                                max_memory=DEFAULT_MAX_MEMORY, checkpoint=None,
+                                checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+    """
+    One-sample TFCE permutation test by sign flipping.
+
+    The t-maps are computed chunk by chunk as in `permutation_cluster_1samp_test`,
+    so memory stays within `max_memory` plus one score map per t-map. H0 holds the
+    largest TFCE score of every permutation, and each feature's p-value is the
+    fraction of H0 at least as large as its score.
+
+    Args:
+        start (float): First TFCE threshold (a positive t-value, usually 0).
+        step (float | None): Threshold step.
+        n_steps (int | None): Number of steps up to the largest observed |t|, used
+            to derive `step` when it is not given.
+        h_power, e_power (float): Height and extent exponents (MNE's defaults).
+        alpha (float): Features with p < alpha are grouped into connected
+            components, which are returned as the clusters.
+        Other arguments: As in `permutation_cluster_1samp_test`.
+
+    Returns:
+        tuple: (signed TFCE scores of shape (time, feature), clusters of significant
+            features, the smallest feature p-value of each cluster, H0). Unlike MNE,
+            the clusters are the connected significant regions rather than one entry
+            per feature, so the reports and plots of cluster tests apply unchanged.
+    """
+    if out_type not in ('indices', 'mask'):
+        raise ValueError(f"out_type must be 'indices' or 'mask', got {out_type!r}.")
+    X_flat, sample_shape, adjacency, sum_squares, t_obs_flat = _prepare_test(X, adjacency)
+    if step is None:
+        if not n_steps:
+            raise ValueError("TFCE needs either `step` or `n_steps`.")
+        stop = np.abs(t_obs_flat).max() if tail == 0 else (tail * t_obs_flat).max()
+        step = (stop - start) / int(n_steps)
+    if step <= 0:
+        raise ValueError(f"The TFCE step must be positive, got {step}.")
+    log.info(f"TFCE from {start:.2f} in steps of {step:.3f} (h_power={h_power}, e_power={e_power}).")
+
+    def map_stats(t):
+        return [tfce_scores(t, adjacency, start, step, tail, h_power, e_power).max()]
+
+    scores = tfce_scores(t_obs_flat, adjacency, start, step, tail, h_power, e_power)
+    plan = sign_flip_plan(X_flat.shape[0], n_permutations, tail, seed)
+    H0_start = [[scores.max()] + (map_stats(-t_obs_flat) if plan['mirror'] else [])]
+    params = None if checkpoint is None else _checkpoint_params(
+        X_flat, adjacency, test='tfce', start=float(start), step=float(step), h_power=float(h_power),
+        e_power=float(e_power), tail=tail, seed=seed)
+    H0 = _permutation_pass(X_flat, sum_squares, plan, map_stats, H0_start, max_memory, "TFCE",
+                           checkpoint, params, checkpoint_interval)[0]
+
+    # p = fraction of H0 >= score, for every feature at once
+    p_values = 1. - np.searchsorted(np.sort(H0), scores, side='left') / len(H0)
+    clusters, cluster_p_values = [], []
+    significant = p_values < alpha
+    for idx, labels in _cluster_labels(np.where(significant, t_obs_flat, 0.), adjacency, 0., tail):
+        order = np.argsort(labels, kind='stable')
+        for members in np.split(idx[order], np.flatnonzero(np.diff(labels[order])) + 1):
+            clusters.append(members)
+            cluster_p_values.append(p_values[members].min())
+    log.info(f"TFCE: {int(significant.sum())} significant features in {len(clusters)} region(s).")
+    t_tfce = (scores * np.sign(t_obs_flat)).reshape(sample_shape)
+    return t_tfce, _format_clusters(clusters, sample_shape, out_type), np.array(cluster_p_values), H0
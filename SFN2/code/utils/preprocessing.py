@@ -0,0 +1,427 @@
+"""
+SFN2 Preprocessing Engine
+
+Turns the HAPPE-cleaned EEGLAB `.set` files and the E-Prime behavioral logs
+into the per-condition epoch files used by every analysis. A subject's raw
+inputs (the `.set` file, its `HAPPE_Usable_Trials.csv` row and its behavioral
+CSV) are loaded once and fanned out to all requested dataset variants:
+
+    eeg_all       all trials,     labeled by CellNumber
+    eeg_acc=1     correct trials, labeled by CellNumber
+    eeg_ds_all    all trials,     labeled by CONDITION_MAP group (iSS, dSS, ...)
+    eeg_ds_acc=1  correct trials, labeled by CONDITION_MAP group
+
+Each variant is written in the original split layout (one file per condition
+label), optionally together with one consolidated file with a condition index;
+see `epochs_store`.
+
+The per-dataset `01_process_lab_data.py` scripts and
+`SFN2/code/run_preprocessing_pipeline.py` are thin entry points around this module.
+"""
+import datetime
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import mne
+
+from SFN2.code.utils import epochs_store, evoked_cache, subject_runner
+
+# --- Paths ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+BASE_DATA_DIR = PROJECT_ROOT / "lab_data"
+BEHAVIORAL_SUBDIR = Path("Final Behavioral Data Files") / "data_UTF8"
+HAPPE_SET_SUBDIR = Path("5 - processed")
+HAPPE_USABLE_TRIALS_NAME = "HAPPE_Usable_Trials.csv"
+ELECTRODE_LOC_FILE = (PROJECT_ROOT / "assets" / "Channel Location - Net128_v1.sfp"
+                      / "AdultAverageNet128_v1.sfp")
+
+# List of participants to process
+PARTICIPANT_LIST = [
+    "02", "03", "04", "05", "08", "09", "10", "11", "12", "13", "14", "15",
+    "17", "21", "22", "23", "25", "26", "27", "28", "29", "31", "32", "33"
+]
+
+# --- Condition Mapping ---
+# This dictionary maps the higher-level condition groups to the specific CellNumbers.
+CONDITION_MAP = {
+    'iSS':   ['12', '13', '23'],
+    'dSS':   ['31', '32', '21'],
+    'iLL':   ['45', '46', '56'],
+    'dLL':   ['65', '64', '54'],
+    'iSL':   ['14', '24', '25', '34', '35', '36'],
+    'dLS':   ['41', '42', '43', '52', '53', '63'],
+    'NoChg': ['11', '22', '33', '44', '55', '66']
+}
+
+# Invert the map for efficient lookup (CellNumber -> Condition)
+CELL_TO_CONDITION = {cell: cond for cond, cells in CONDITION_MAP.items() for cell in cells}
+
+# Bump this whenever a change to this module alters the files it writes, so
+# that incremental runs rebuild every subject.
+PREPROCESSING_VERSION = 1
+
+# --- Dataset Variants ---
+# 'correct_only' keeps only trials with a Target.ACC column equal to 1.
+# 'labeling' is either 'cell' (CellNumber) or 'group' (CONDITION_MAP).
+DATASET_VARIANTS = {
+    'eeg_all':      {'correct_only': False, 'labeling': 'cell'},
+    'eeg_acc=1':    {'correct_only': True,  'labeling': 'cell'},
+    'eeg_ds_all':   {'correct_only': False, 'labeling': 'group'},
+    'eeg_ds_acc=1': {'correct_only': True,  'labeling': 'group'},
+}
+
+
+def get_derivatives_dir(dataset, project_root=PROJECT_ROOT):
+    """Returns the derivatives directory of a dataset variant."""
+    if dataset not in DATASET_VARIANTS:
+        raise ValueError(f"Unknown dataset '{dataset}'. Choose from {list(DATASET_VARIANTS)}")
+    return Path(project_root) / dataset / "derivatives"
+
+
+def load_usable_trials(lab_data_dir=BASE_DATA_DIR):
+    """Loads the HAPPE usable trials master file."""
+    usable_trials_df = pd.read_csv(Path(lab_data_dir) / HAPPE_USABLE_TRIALS_NAME)
+    usable_trials_df.rename(columns={usable_trials_df.columns[0]: 'SessionInfo'}, inplace=True)
+    return usable_trials_df
+
+
+def get_happe_row(subject_id, usable_trials_df):
+    """Returns the `HAPPE_Usable_Trials.csv` row of one subject."""
+    pattern = re.compile(f'(?:Subject|Subj){int(subject_id)}')
+    matches = usable_trials_df[usable_trials_df['SessionInfo'].str.contains(pattern, na=False)]
+    if matches.empty:
+        raise LookupError(f"Could not find entry for Subject {subject_id} in {HAPPE_USABLE_TRIALS_NAME}")
+    return matches.iloc[0]
+
+
+def get_kept_indices(subject_id, usable_trials_df):
+    """Parses the 1-based HAPPE `Kept_Segs_Indxs` of one subject."""
+    kept_indices_str = get_happe_row(subject_id, usable_trials_df)['Kept_Segs_Indxs']
+    return [int(i.strip()) for i in kept_indices_str.split(',')]
+
+
+def load_subject_inputs(subject_id, usable_trials_df, lab_data_dir=BASE_DATA_DIR):
+    """
+    Loads one subject's raw inputs exactly once.
+
+    Returns:
+        mne.Epochs: The HAPPE-cleaned epochs, baseline corrected, with the
+            matching behavioral rows attached as metadata and the electrode
+            montage and average reference applied.
+    """
+    lab_data_dir = Path(lab_data_dir)
+
+    # --- Find and Parse Usable Trial Indices from HAPPE file ---
+    print("Step 1: Finding usable trials from HAPPE output...")
+    kept_indices_1based = get_kept_indices(subject_id, usable_trials_df)
+    print(f"Found {len(kept_indices_1based)} usable trials kept by HAPPE.")
+
+    # --- Load and Process Behavioral Data ---
+    print("Step 2: Loading and processing behavioral data...")
+    behavioral_file = lab_data_dir / BEHAVIORAL_SUBDIR / f"Subject{subject_id}.csv"
+    behavioral_df = pd.read_csv(behavioral_file)
+
+    # Filter out practice trials
+    behavioral_df = behavioral_df[behavioral_df['Procedure[Block]'] != "Practiceproc"].copy()
+    behavioral_df.reset_index(drop=True, inplace=True)
+
+    # Replicate R script logic to create continuous trial numbers (1-300)
+    block_correction = (behavioral_df.index // 60) * 60
+    behavioral_df['Trial_Continuous'] = behavioral_df['Trial'] + block_correction
+
+    # Filter behavioral data to only include trials that were kept by HAPPE
+    behavioral_df_kept = behavioral_df[behavioral_df['Trial_Continuous'].isin(kept_indices_1based)].copy()
+    behavioral_df_kept.reset_index(drop=True, inplace=True)
+    print(f"Matched {len(behavioral_df_kept)} trials in the behavioral file.")
+
+    # --- Load EEG Data (.set file) ---
+    print("Step 3: Loading cleaned EEG data (.set file)...")
+    set_file_path = lab_data_dir / HAPPE_SET_SUBDIR / f"Subject{subject_id}.set"
+    epochs = mne.io.read_epochs_eeglab(set_file_path, verbose=False)
+    epochs.apply_baseline(baseline=(None, 0))
+
+    if len(epochs) != len(behavioral_df_kept):
+        print(f"CRITICAL WARNING: Mismatch for Subject {subject_id}!")
+        print(f"Epochs in .set file: {len(epochs)}")
+        print(f"Kept trials in behavioral file: {len(behavioral_df_kept)}")
+        raise RuntimeError(f"Data mismatch: {len(epochs)} epochs in .set file vs. "
+                           f"{len(behavioral_df_kept)} kept behavioral trials")
+    print(f"Loaded {len(epochs)} epochs from .set file.")
+    epochs.metadata = behavioral_df_kept
+
+    # --- Apply Electrode Locations & Set Average Reference ---
+    # The average reference is a projector over channels, independent of which
+    # trials are kept, so it is applied once here for every variant.
+    # It is required for source estimation (e.g. LORETA) and standardizes the
+    # 3D sensor locations for 2D topoplotting.
+    print("Step 4: Applying electrode locations and setting average reference...")
+    montage = mne.channels.read_custom_montage(ELECTRODE_LOC_FILE)
+    epochs.set_montage(montage, on_missing='warn')
+    epochs.set_eeg_reference('average', projection=True)
+    return epochs
+
+
+def select_variant_epochs(epochs, correct_only, labeling):
+    """
+    Applies a dataset variant's accuracy filter and condition labeling.
+
+    Returns:
+        mne.Epochs: The kept trials, with a `condition_label` metadata column.
+    """
+    metadata = epochs.metadata
+    if labeling == 'cell':
+        # Use the 'CellNumber' as the condition label
+        labels = metadata['CellNumber'].astype(str)
+    elif labeling == 'group':
+        # Map CellNumber to the high-level condition labels
+        labels = metadata['CellNumber'].astype(str).map(CELL_TO_CONDITION)
+        if labels.isnull().any():
+            print("WARNING: Some trials could not be mapped to a condition label.")
+    else:
+        raise ValueError(f"Unknown labeling '{labeling}'")
+
+    # Filter out trials that do not have a condition label
+    keep = labels.notna().to_numpy()
+    if correct_only:
+        acc_cols = [col for col in metadata.columns if 'Target' in col and 'ACC' in col]
+        if not acc_cols:
+            raise ValueError("No Target.ACC column found in the behavioral data.")
+        keep &= (metadata[acc_cols] == 1).any(axis=1).to_numpy()
+
+    selected = epochs[np.flatnonzero(keep)]
+    selected_metadata = selected.metadata.copy()
+    if labeling == 'group':
+        selected_metadata['CellNumber'] = selected_metadata['CellNumber'].astype(str)
+    selected_metadata['condition_label'] = labels[keep].to_numpy()
+    selected.metadata = selected_metadata
+    return selected
+
+
+def save_outputs(epochs, subject_id, derivatives_dir, layout='split'):
+    """
+    Saves a variant's epochs in the requested storage layout.
+
+    Returns:
+        list: The names of the files written, relative to the subject directory.
+    """
+    if layout not in epochs_store.STORAGE_LAYOUTS:
+        raise ValueError(f"Unknown storage layout '{layout}'. Use one of {epochs_store.STORAGE_LAYOUTS}.")
+    written = []
+    if layout in ('split', 'both'):
+        written += save_condition_files(epochs, subject_id, derivatives_dir)
+    if layout == 'both':
+        written += epochs_store.write_consolidated(epochs, Path(derivatives_dir) / f"sub-{subject_id}")
+    return written
+
+
+def save_condition_files(epochs, subject_id, derivatives_dir):
+    """
+    Saves one `_epo.fif` and one `_metadata.h5` file per condition label.
+
+    Returns:
+        list: The names of the files written, relative to the subject directory.
+    """
+    subject_output_dir = Path(derivatives_dir) / f"sub-{subject_id}"
+    subject_output_dir.mkdir(parents=True, exist_ok=True)
+
+    unique_conditions = sorted(epochs.metadata['condition_label'].unique())
+    print(f"Found conditions to save: {unique_conditions}")
+
+    written = []
+    for cond_label in unique_conditions:
+        # Select epochs for the current condition
+        epochs_this_cond = epochs[epochs.metadata['condition_label'] == cond_label]
+        if len(epochs_this_cond) == 0:
+            print(f"  - No trials for condition '{cond_label}'. Skipping file save.")
+            continue
+
+        # Define BIDS-compliant output paths
+        fif_output_path = subject_output_dir / f"sub-{subject_id}_task-numbers_cond-{cond_label}_epo.fif"
+        h5_output_path = subject_output_dir / f"sub-{subject_id}_task-numbers_cond-{cond_label}_metadata.h5"
+
+        epochs_this_cond.save(fif_output_path, overwrite=True)
+        epochs_this_cond.metadata.to_hdf(h5_output_path, key='metadata', mode='w')
+        written += [fif_output_path.name, h5_output_path.name]
+        print(f"  - Saved {len(epochs_this_cond)} epochs for '{cond_label}' to {fif_output_path}")
+    return written
+
+
+# --- Incremental Processing ---
+# Each subject directory holds a manifest recording the fingerprints of the
+# inputs it was built from and the files that were written. A subject whose
+# inputs (and the variant settings) are unchanged and whose outputs all still
+# exist is skipped.
+
+def get_manifest_path(subject_id, derivatives_dir):
+    """Returns the path of a subject's preprocessing manifest."""
+    return Path(derivatives_dir) / f"sub-{subject_id}" / f"sub-{subject_id}_task-numbers_preproc-manifest.json"
+
+
+def read_manifest(subject_id, derivatives_dir):
+    """Reads a subject's manifest, or returns None if there is none (or it is unreadable)."""
+    try:
+        with open(get_manifest_path(subject_id, derivatives_dir), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def fingerprint_inputs(subject_id, usable_trials_df, lab_data_dir=BASE_DATA_DIR, previous=None):
+    """
+    Fingerprints every input a subject's outputs depend on.
+
+    File hashes from `previous` (an earlier manifest's inputs) are reused when a
+    file's size and mtime are unchanged, so unchanged subjects are not re-hashed.
+    """
+    lab_data_dir = Path(lab_data_dir)
+    previous = previous or {}
+    set_file_path = lab_data_dir / HAPPE_SET_SUBDIR / f"Subject{subject_id}.set"
+    files = {
+        'set': set_file_path,
+        'behavioral': lab_data_dir / BEHAVIORAL_SUBDIR / f"Subject{subject_id}.csv",
+        'montage': Path(ELECTRODE_LOC_FILE),
+    }
+    # EEGLAB may keep the signal in a separate .fdt file next to the .set header
+    fdt_file_path = set_file_path.with_suffix('.fdt')
+    if fdt_file_path.exists():
+        files['fdt'] = fdt_file_path
+
+    inputs = {name: evoked_cache.fingerprint_file(path, previous=previous.get(name))
+              for name, path in files.items()}
+    happe_row = get_happe_row(subject_id, usable_trials_df)
+    inputs['happe_row'] = {
+        'sha256': hashlib.sha256(happe_row.to_json().encode('utf-8')).hexdigest()
+    }
+    return inputs
+
+
+def _input_digests(inputs):
+    """Reduces input fingerprints to their content hashes for comparison."""
+    return {name: fp.get('sha256') for name, fp in (inputs or {}).items()}
+
+
+def is_up_to_date(manifest, inputs, dataset, derivatives_dir, subject_id, layout='split'):
+    """Checks whether a manifest matches the current inputs and its outputs still exist."""
+    if not manifest:
+        return False
+    if (manifest.get('version') != PREPROCESSING_VERSION
+            or manifest.get('variant') != DATASET_VARIANTS[dataset]
+            or manifest.get('layout', 'split') != layout
+            or _input_digests(manifest.get('inputs')) != _input_digests(inputs)):
+        return False
+    subject_output_dir = Path(derivatives_dir) / f"sub-{subject_id}"
+    outputs = manifest.get('outputs') or []
+    return bool(outputs) and all((subject_output_dir / name).exists() for name in outputs)
+
+
+def write_manifest(subject_id, derivatives_dir, dataset, inputs, outputs, previous=None, layout='split'):
+    """
+    Writes a subject's manifest and removes condition files that a previous
+    build wrote but the current one did not (e.g. a condition that lost all trials).
+    """
+    subject_output_dir = Path(derivatives_dir) / f"sub-{subject_id}"
+    for name in set((previous or {}).get('outputs') or []) - set(outputs):
+        stale = subject_output_dir / name
+        if stale.exists():
+            stale.unlink()
+            print(f"  - Removed stale output {stale}")
+
+    manifest = {
+        'version': PREPROCESSING_VERSION,
+        'dataset': dataset,
+        'variant': DATASET_VARIANTS[dataset],
+        'layout': layout,
+        'inputs': inputs,
+        'outputs': sorted(outputs),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+    manifest_path = get_manifest_path(subject_id, derivatives_dir)
+    tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def process_subject(subject_id, usable_trials_df, datasets, lab_data_dir=BASE_DATA_DIR,
+                    project_root=PROJECT_ROOT, force=False, layout='split'):
+    """
+    Loads one subject's raw inputs once and writes every requested dataset variant
+    in the given storage layout ('split' or 'both').
+
+    Variants whose manifest shows unchanged inputs are skipped unless `force`
+    is set; if every variant is up to date the raw inputs are not loaded at all.
+    Raises on any problem so the subject runner can record the subject as failed.
+    """
+    print(f"\n{'='*20} Processing Subject {subject_id} {'='*20}")
+    derivatives_dirs = {dataset: get_derivatives_dir(dataset, project_root) for dataset in datasets}
+    manifests = {dataset: read_manifest(subject_id, derivatives_dirs[dataset]) for dataset in datasets}
+
+    # Reuse hashes from any existing manifest to avoid re-reading unchanged inputs
+    previous_inputs = next((m['inputs'] for m in manifests.values() if m and m.get('inputs')), None)
+    inputs = fingerprint_inputs(subject_id, usable_trials_df, lab_data_dir, previous=previous_inputs)
+
+    to_build = [dataset for dataset in datasets if force or not is_up_to_date(
+        manifests[dataset], inputs, dataset, derivatives_dirs[dataset], subject_id, layout)]
+    if not to_build:
+        print("Inputs unchanged since the last run for every dataset. Skipping.")
+        return {'status': 'skipped', 'message': 'inputs unchanged'}
+    up_to_date = [dataset for dataset in datasets if dataset not in to_build]
+    if up_to_date:
+        print(f"Up to date, not rewritten: {', '.join(up_to_date)}")
+
+    epochs = load_subject_inputs(subject_id, usable_trials_df, lab_data_dir)
+    n_total_kept = len(epochs)
+
+    summaries = []
+    for dataset in to_build:
+        variant = DATASET_VARIANTS[dataset]
+        print(f"\n--- Writing {dataset} ---")
+        variant_epochs = select_variant_epochs(epochs, variant['correct_only'], variant['labeling'])
+        n_kept = len(variant_epochs)
+        print(f"Filtered epochs: Kept {n_kept} out of {n_total_kept} HAPPE-usable trials "
+              f"({n_kept/n_total_kept:.2%}).")
+        written = save_outputs(variant_epochs, subject_id, derivatives_dirs[dataset], layout)
+        write_manifest(subject_id, derivatives_dirs[dataset], dataset, inputs, written,
+                       previous=manifests[dataset], layout=layout)
+        n_conditions = variant_epochs.metadata['condition_label'].nunique()
+        summaries.append(f"{dataset} {n_kept}/{n_total_kept} ({n_conditions} conditions)")
+    if up_to_date:
+        summaries.append(f"unchanged: {', '.join(up_to_date)}")
+
+    return {'message': "; ".join(summaries)}
+
+
+def run_preprocessing(datasets, subjects=None, jobs=1, log_dir=None,
+                      lab_data_dir=BASE_DATA_DIR, project_root=PROJECT_ROOT, force=False, layout='split'):
+    """
+    Preprocesses the given subjects into the given dataset variants, skipping
+    subjects whose inputs are unchanged unless `force` is set. `layout` selects
+    the storage layout of the written epochs (see `epochs_store`).
+
+    Returns:
+        list: The per-subject results from `subject_runner.run_subjects`.
+    """
+    for dataset in datasets:
+        os.makedirs(get_derivatives_dir(dataset, project_root), exist_ok=True)
+    if log_dir is None:
+        log_dir = get_derivatives_dir(datasets[0], project_root) / "logs" / "01_process_lab_data"
+
+    # Load the HAPPE usable trials master file once
+    usable_trials_df = load_usable_trials(lab_data_dir)
+
+    subjects = subjects or PARTICIPANT_LIST
+    results = subject_runner.run_subjects(
+        process_subject, subjects, log_dir, jobs=jobs,
+        args=(usable_trials_df, list(datasets)),
+        kwargs={'lab_data_dir': lab_data_dir, 'project_root': project_root, 'force': force,
+                'layout': layout}
+    )
+
+    print(f"\n{'='*20} Summary {'='*20}")
+    print(subject_runner.format_summary_table(results))
+    print(f"Per-subject logs saved in: {log_dir}")
+    return results
@@ -7,6 +7,19 @@ import numpy as np
 log = logging.getLogger()
 
 
+def _n_permutations(H0, config):
+    """Size of H0 (which is smaller than requested for exact tests), or the configured count without clusters."""
+    return len(H0) if len(H0) else config['stats']['n_permutations']
+
+
+def _threshold_line(config):
+    """Report line of the cluster-forming threshold, or of the TFCE settings."""
+    tfce = config['stats'].get('tfce')
+    if tfce:
+        return f"Threshold-free cluster enhancement: {'defaults' if tfce is True else tfce}\n"
+    return f"Cluster-forming p-value (initial): {config['stats']['p_threshold']}\n"
+
+
 def generate_report(stats_results, times, ch_names, config, output_dir):
     """
     Generates a text report summarizing the cluster statistics results.
@@ -18,7 +31,7 @@ def generate_report(stats_results, times, ch_names, config, output_dir):
         config (dict): The analysis configuration dictionary.
         output_dir (Path): The directory to save the report in.
     """
-    t_obs, clusters, cluster_p_values, _ = stats_results
+    t_obs, clusters, cluster_p_values, H0 = stats_results
     alpha = config['stats']['cluster_alpha']
 
     report_path = output_dir / f"{config['analysis_name']}_report.txt"
@@ -40,9 +53,9 @@ def generate_report(stats_results, times, ch_names, config, output_dir):
 
         f.write("Statistical Parameters:\n")
         f.write("-" * 20 + "\n")
-        f.write(f"Cluster-forming p-value (initial): {config['stats']['p_threshold']}\n")
+        f.write(_threshold_line(config))
         f.write(f"Cluster significance alpha: {alpha}\n")
-        f.write(f"Number of permutations: {config['stats']['n_permutations']}\n")
+        f.write(f"Number of permutations: {_n_permutations(H0, config)}\n")
         f.write(f"Test tail: {'two-sided' if config['stats']['tail'] == 0 else ('positive' if config['stats']['tail'] == 1 else 'negative')}\n")
         f.write("\n")
 
@@ -88,7 +101,7 @@ def generate_source_report(stats_results, stc_grand_average, config, output_dir)
     """
     Generates a text report summarizing the source-space cluster results.
     """
-    _, clusters, cluster_p_values, _ = stats_results
+    _, clusters, cluster_p_values, H0 = stats_results
     alpha = config['stats']['cluster_alpha']
     times = stc_grand_average.times
 
@@ -109,13 +122,19 @@ def generate_source_report(stats_results, stc_grand_average, config, output_dir)
         f.write(f"Time Window: {config['tmin']}s to {config['tmax']}s\n")
         f.write(f"Source Method: {config['source']['method']}\n")
         f.write(f"Source SNR: {config['source']['snr']}\n")
+        if config['source'].get('stats_window'):
+            f.write(f"Source Stats Window: {config['source']['stats_window'][0]}s to {config['source']['stats_window'][1]}s\n")
+        if config['source'].get('decim', 1) > 1:
+            f.write(f"Source Decimation: {config['source']['decim']}\n")
+        if config['source'].get('labels'):
+            f.write(f"Source Labels ({config['source'].get('parc', 'aparc')}): {', '.join(config['source']['labels'])}\n")
         f.write("\n")
 
         f.write("Statistical Parameters:\n")
         f.write("-" * 20 + "\n")
-        f.write(f"Cluster-forming p-value (initial): {config['stats']['p_threshold']}\n")
+        f.write(_threshold_line(config))
         f.write(f"Cluster significance alpha: {alpha}\n")
-        f.write(f"Number of permutations: {config['stats']['n_permutations']}\n")
+        f.write(f"Number of permutations: {_n_permutations(H0, config)}\n")
         f.write("\n")
 
         f.write("=" * 80 + "\n")
@@ -149,3 +168,34 @@ def generate_source_report(stats_results, stc_grand_average, config, output_dir)
                 f.write(f"  Number of vertices: {n_verts}\n\n")
     
     log.info("Source report generation complete.")
+
+
+def generate_sweep_summary(sweep_results, config, output_dir):
+    """
+    Writes a summary of a cluster-threshold sweep: one line per cluster-forming
+    p-value with its number of clusters, significant clusters and smallest
+    cluster p-value. Each threshold also has its own full report.
+
+    Args:
+        sweep_results (dict): {p_threshold: stats_results} from the sweep.
+        config (dict): The analysis configuration dictionary.
+        output_dir (Path): The directory to save the summary in.
+    """
+    alpha = config['stats']['cluster_alpha']
+    summary_path = output_dir / f"{config['analysis_name']}_threshold_sweep.txt"
+    log.info(f"Generating threshold sweep summary at: {summary_path}")
+
+    with open(summary_path, 'w') as f:
+        f.write("=" * 80 + "\n")
+        f.write(f"Cluster Threshold Sweep: {config['analysis_name']}\n")
+        f.write("=" * 80 + "\n\n")
+        f.write(f"Contrast: {config['contrast']['name']}\n")
+        f.write(f"Cluster significance alpha: {alpha}\n")
+        f.write("All thresholds share the same permutations.\n\n")
+        f.write(f"{'p_threshold':>12} {'clusters':>9} {'significant':>12} {'min p':>8} {'permutations':>13}\n")
+        for p_threshold, (_, clusters, cluster_p_values, H0) in sweep_results.items():
+            min_p = f"{cluster_p_values.min():.4f}" if len(cluster_p_values) else "-"
+            f.write(f"{p_threshold:>12g} {len(clusters):>9} {int((cluster_p_values < alpha).sum()):>12} "
+                    f"{min_p:>8} {_n_permutations(H0, config):>13}\n")
+
+    log.info("Threshold sweep summary complete.")
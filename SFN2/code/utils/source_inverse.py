@@ -0,0 +1,157 @@
+"""
+Stacked application of an inverse operator to many evoked responses.
+
+`mne.minimum_norm.apply_inverse` prepares the inverse operator (regularized
+inverter, whitener and, for dSPM/sLORETA/eLORETA, the noise normalization or
+source weights), assembles the imaging kernel and computes the explained
+variance on every call. The scripts call it once per condition, so each
+subject repeats that work for every evoked response.
+
+`prepare_kernel` does the preparation and kernel assembly once per subject.
+`apply_kernel` then applies the kernel to a stacked (condition, channel, time)
+block in a single matrix product. The number of averages only rescales the
+result, so one kernel serves every condition: the dSPM/sLORETA noise
+normalization scales with sqrt(nave), and MNE/eLORETA do not depend on nave.
+The results match `apply_inverse` (for `pick_ori` None or 'normal').
+"""
+import numpy as np
+from mne.minimum_norm import prepare_inverse_operator
+# Building blocks of mne.minimum_norm.apply_inverse
+from mne.minimum_norm.inverse import (_assemble_kernel, _check_reference, _get_src_type,
+                                      _subject_from_inverse, combine_xyz)
+from mne.source_estimate import _make_stc
+from mne.io.constants import FIFF
+
+# Methods whose noise normalization scales with sqrt(nave)
+NOISE_NORMALIZED_METHODS = ('dSPM', 'sLORETA')
+
+
+def prepare_kernel(inverse_operator, lambda2, method, pick_ori=None, nave=None):
+    """
+    Prepares an inverse operator once and assembles its imaging kernel.
+
+    Args:
+        inverse_operator (InverseOperator): The (unprepared) inverse operator.
+        lambda2 (float): Regularization parameter (1 / SNR**2).
+        method (str): 'MNE', 'dSPM', 'sLORETA' or 'eLORETA'.
+        pick_ori (None | 'normal'): Source orientation handling, as in `apply_inverse`.
+        nave (int | None): Number of averages to prepare for (default: the operator's).
+
+    Returns:
+        dict: The kernel ('kernel', shape (source, channel)), 'noise_norm',
+            'combine_xyz', 'nave', 'method', 'ch_names' and what is needed to
+            build source estimates ('vertices', 'source_nn', 'src_type', 'subject').
+    """
+    if pick_ori not in (None, 'normal'):
+        raise ValueError(f"pick_ori must be None or 'normal' for stacked inverses, got {pick_ori!r}.")
+    nave = int(nave or inverse_operator['nave'])
+    inv = prepare_inverse_operator(inverse_operator, nave, lambda2, method, copy='non-src', verbose=False)
+    kernel, noise_norm, vertices, source_nn = _assemble_kernel(inv, None, method, pick_ori)
+    return {
+        'kernel': kernel,
+        'noise_norm': noise_norm,
+        'combine_xyz': inv['source_ori'] == FIFF.FIFFV_MNE_FREE_ORI and pick_ori != 'normal',
+        'nave': nave,
+        'method': method,
+        'ch_names': list(inv['noise_cov']['names']),
+        'info_ch_names': inv['info']['ch_names'],
+        'vertices': vertices,
+        'source_nn': source_nn,
+        'src_type': _get_src_type(inv['src'], vertices),
+        'subject': _subject_from_inverse(inv),
+    }
+
+
+def apply_kernel(kernel, data, naves):
+    """
+    Applies a prepared kernel to stacked sensor data in one matrix product.
+
+    Args:
+        kernel (dict): Output of `prepare_kernel`.
+        data (np.ndarray): Sensor data of shape (condition, channel, time), with
+            the channels in the order of `kernel['ch_names']`.
+        naves (array-like): Number of averages of each condition.
+
+    Returns:
+        np.ndarray: Source data of shape (condition, source, time).
+    """
+    data = np.asarray(data)
+    n_conditions, n_channels, n_times = data.shape
+    # (channel, condition * time): every condition goes through the same product
+    sol = kernel['kernel'] @ data.transpose(1, 0, 2).reshape(n_channels, n_conditions * n_times)
+    if kernel['combine_xyz']:
+        sol = combine_xyz(sol)
+    if kernel['noise_norm'] is not None:
+        sol *= kernel['noise_norm']
+    sol = sol.reshape(-1, n_conditions, n_times).transpose(1, 0, 2)
+    if kernel['method'] in NOISE_NORMALIZED_METHODS:
+        scale = np.sqrt(np.asarray(naves, dtype=float) / kernel['nave'])
+        sol *= scale[:, np.newaxis, np.newaxis]
+    return sol
+
+
+def apply_inverse_stacked(evokeds, inverse_operator, lambda2, method='dSPM', pick_ori=None, kernel=None):
+    """
+    Computes the source estimates of several evoked responses at once.
+
+    Args:
+        evokeds (list | dict): Evoked responses sharing channels and times.
+        inverse_operator (InverseOperator): The inverse operator.
+        lambda2 (float), method (str), pick_ori (None | 'normal'): As in `apply_inverse`.
+        kernel (dict | None): A kernel from `prepare_kernel` for this operator,
+            method and lambda2, to reuse across calls.
+
+    Returns:
+        list | dict: One SourceEstimate per evoked, in the same container type.
+    """
+    keys = list(evokeds) if isinstance(evokeds, dict) else None
+    evoked_list = [evokeds[k] for k in keys] if keys is not None else list(evokeds)
+    if not evoked_list:
+        return {} if keys is not None else []
+    if kernel is None:
+        kernel = prepare_kernel(inverse_operator, lambda2, method, pick_ori)
+
+    first = evoked_list[0]
+    for evoked in evoked_list:
+        _check_reference(evoked, kernel['info_ch_names'])
+        if evoked.ch_names != first.ch_names or not np.array_equal(evoked.times, first.times):
+            raise ValueError("All evoked responses must share the same channels and times.")
+    missing = [ch for ch in kernel['ch_names'] if ch not in first.ch_names]
+    if missing:
+        raise ValueError(f"The inverse operator was computed with channels missing from the data: {missing}")
+    sel = [first.ch_names.index(ch) for ch in kernel['ch_names']]
+    data = np.stack([evoked.data[sel] for evoked in evoked_list])
+    sol = apply_kernel(kernel, data, [evoked.nave for evoked in evoked_list])
+
+    tmin, tstep = float(first.times[0]), 1.0 / first.info['sfreq']
+    stcs = [_make_stc(s, kernel['vertices'], tmin=tmin, tstep=tstep, subject=kernel['subject'],
+                      source_nn=kernel['source_nn'], src_type=kernel['src_type']) for s in sol]
+    return dict(zip(keys, stcs)) if keys is not None else stcs
+
+
+def crop_evokeds(evokeds, tmin=None, tmax=None, decim=1):
+    """
+    Restricts evoked responses to the analysis window before source estimation.
+
+    The inverse is linear in the data, so cropping (and decimating) the sensor
+    data first gives the same source values as cropping the source estimates
+    afterwards, at a fraction of the memory: each source estimate only holds
+    the samples that go into the statistics.
+
+    Args:
+        evokeds (list | dict): Evoked responses (not modified).
+        tmin, tmax (float | None): Analysis window in seconds (None: keep the edge).
+        decim (int): Keep every `decim`-th sample of the window.
+
+    Returns:
+        list | dict: Cropped copies, in the same container type.
+    """
+    def _crop(evoked):
+        evoked = evoked.copy().crop(tmin=tmin, tmax=tmax)
+        if decim > 1:
+            evoked.decimate(decim)
+        return evoked
+
+    if isinstance(evokeds, dict):
+        return {k: _crop(evoked) for k, evoked in evokeds.items()}
+    return [_crop(evoked) for evoked in evokeds]
@@ -0,0 +1,122 @@
+"""
+SFN2 Per-Subject Job Runner
+
+Runs a per-subject processing function either serially or over a process
+pool, captures each subject's console output in its own log file and
+summarizes the outcome of every subject in a table.
+"""
+import contextlib
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+
+class _Tee:
+    """Minimal file-like object that writes to several streams at once."""
+
+    def __init__(self, *streams):
+        self.streams = streams
+
+    def write(self, data):
+        for stream in self.streams:
+            stream.write(data)
+        return len(data)
+
+    def flush(self):
+        for stream in self.streams:
+            stream.flush()
+
+
+def _run_one(process_fn, subject_id, log_path, echo, args, kwargs):
+    """
+    Runs `process_fn` for one subject with stdout/stderr captured to `log_path`.
+
+    Never raises: any exception is turned into a 'failed' result so that one bad
+    subject cannot bring down the whole pool.
+    """
+    start = time.time()
+    result = {'subject': subject_id, 'status': 'ok', 'message': '', 'log': str(log_path)}
+    Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, 'w', encoding='utf-8') as log_file:
+        stream = _Tee(sys.__stdout__, log_file) if echo else log_file
+        with contextlib.redirect_stdout(stream), contextlib.redirect_stderr(stream):
+            try:
+                details = process_fn(subject_id, *args, **kwargs) or {}
+                result.update(details)
+            except Exception as e:
+                traceback.print_exc()
+                result['status'] = 'failed'
+                result['message'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.time() - start
+    return result
+
+
+def run_subjects(process_fn, subject_ids, log_dir, jobs=1, args=(), kwargs=None):
+    """
+    Runs `process_fn(subject_id, *args, **kwargs)` for every subject.
+
+    Args:
+        process_fn (callable): Module-level (picklable) function. It may return a
+            dict of extra result fields, e.g. {'status': 'skipped', 'message': ...}.
+        subject_ids (list): Subject IDs to process.
+        log_dir (str | Path): Directory for the per-subject `sub-XX.log` files.
+        jobs (int): Number of worker processes. 1 runs serially in this process
+            and echoes output to the console; <= 0 uses all available cores.
+        args (tuple), kwargs (dict): Extra arguments passed to `process_fn`.
+
+    Returns:
+        list: One result dict per subject, in the order of `subject_ids`.
+    """
+    kwargs = kwargs or {}
+    log_dir = Path(log_dir)
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(subject_ids)) or 1
+
+    results = {}
+    if jobs == 1:
+        for subject_id in subject_ids:
+            results[subject_id] = _run_one(process_fn, subject_id, log_dir / f"sub-{subject_id}.log",
+                                           True, args, kwargs)
+    else:
+        print(f"Processing {len(subject_ids)} subjects with {jobs} worker processes. "
+              f"Per-subject logs are written to {log_dir}")
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(_run_one, process_fn, subject_id, log_dir / f"sub-{subject_id}.log",
+                            False, args, kwargs): subject_id
+                for subject_id in subject_ids
+            }
+            for future in as_completed(futures):
+                subject_id = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker process itself died (e.g. out of memory)
+                    result = {'subject': subject_id, 'status': 'failed', 'seconds': float('nan'),
+                              'message': f"Worker crashed: {type(e).__name__}: {e}",
+                              'log': str(log_dir / f"sub-{subject_id}.log")}
+                results[subject_id] = result
+                print(f"  - Subject {subject_id}: {result['status']} ({result['seconds']:.1f} s)")
+
+    return [results[subject_id] for subject_id in subject_ids]
+
+
+def format_summary_table(results):
+    """
+    Formats per-subject results as a plain-text table with a final tally.
+    """
+    header = f"{'Subject':<9}{'Status':<9}{'Time (s)':>10}  Details"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(f"{r['subject']:<9}{r['status']:<9}{r.get('seconds', float('nan')):>10.1f}  "
+                     f"{r.get('message', '')}")
+    counts = {}
+    for r in results:
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+    lines.append("-" * len(header))
+    lines.append(", ".join(f"{status}: {n}" for status, n in sorted(counts.items())))
+    return "\n".join(lines)
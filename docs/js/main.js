@@ -116,6 +116,16 @@ document.addEventListener('DOMContentLoaded', () => {
                     plotDiv.appendChild(link);
                 }
 
+                // Contrast figures also link to their entry in the contrast config
+                if (plot.configUrl) {
+                    const link = document.createElement('a');
+                    link.href = plot.configUrl;
+                    link.textContent = 'View Contrast Config';
+                    link.className = 'source-script-link';
+                    link.target = '_blank'; // Open in new tab
+                    plotDiv.appendChild(link);
+                }
+
                 section.appendChild(plotDiv);
             });
             plotsContainer.appendChild(section);
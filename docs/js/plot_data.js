@@ -43,7 +43,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land1_decreasing',
         image: 'images/group_p1_contrast_landing_on_1_decreasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_1_decreasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L136'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -52,7 +53,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land1_decreasing',
         image: 'images/group_n1_contrast_landing_on_1_decreasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_1_decreasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L526'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -79,7 +81,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land2_decreasing',
         image: 'images/group_p1_contrast_landing_on_2_decreasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_2_decreasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L173'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -88,7 +91,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land2_decreasing',
         image: 'images/group_n1_contrast_landing_on_2_decreasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_2_decreasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L564'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -97,7 +101,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land2_any',
         image: 'images/group_p1_contrast_landing_on_2_any_preceding_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_2_any_preceding_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L154'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -106,7 +111,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land2_any',
         image: 'images/group_n1_contrast_landing_on_2_any_preceding_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_2_any_preceding_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L544'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -115,7 +121,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land3_decreasing',
         image: 'images/group_p1_contrast_landing_on_3_decreasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_3_decreasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L224'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -124,7 +131,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land3_decreasing',
         image: 'images/group_n1_contrast_landing_on_3_decreasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_3_decreasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L618'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -133,7 +141,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land3_any',
         image: 'images/group_p1_contrast_landing_on_3_any_preceding_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_3_any_preceding_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L203'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -142,7 +151,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land3_any',
         image: 'images/group_n1_contrast_landing_on_3_any_preceding_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_3_any_preceding_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L596'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -151,7 +161,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land2_increasing',
         image: 'images/group_p1_contrast_landing_on_2_increasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_2_increasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L190'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -160,7 +171,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land2_increasing',
         image: 'images/group_n1_contrast_landing_on_2_increasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_2_increasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L582'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -169,7 +181,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land3_increasing',
         image: 'images/group_p1_contrast_landing_on_3_increasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_3_increasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L241'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -178,7 +191,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land3_increasing',
         image: 'images/group_n1_contrast_landing_on_3_increasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_3_increasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L636'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -187,7 +201,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land4_decreasing',
         image: 'images/group_p1_contrast_landing_on_4_decreasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_4_decreasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L277'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -196,7 +211,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land4_decreasing',
         image: 'images/group_n1_contrast_landing_on_4_decreasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_4_decreasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L674'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -205,7 +221,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land4_any',
         image: 'images/group_p1_contrast_landing_on_4_any_preceding_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_4_any_preceding_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L256'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -214,7 +231,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land4_any',
         image: 'images/group_n1_contrast_landing_on_4_any_preceding_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_4_any_preceding_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L652'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -223,7 +241,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land4_increasing',
         image: 'images/group_p1_contrast_landing_on_4_increasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_4_increasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L292'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -232,7 +251,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land4_increasing',
         image: 'images/group_n1_contrast_landing_on_4_increasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_4_increasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L690'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -241,7 +261,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land5_decreasing',
         image: 'images/group_p1_contrast_landing_on_5_decreasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_5_decreasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L330'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -250,7 +271,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land5_decreasing',
         image: 'images/group_n1_contrast_landing_on_5_decreasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_5_decreasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L730'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -259,7 +281,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land5_any',
         image: 'images/group_p1_contrast_landing_on_5_any_preceding_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_5_any_preceding_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L309'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -268,7 +291,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land5_any',
         image: 'images/group_n1_contrast_landing_on_5_any_preceding_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_5_any_preceding_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L708'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -277,7 +301,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land5_increasing',
         image: 'images/group_p1_contrast_landing_on_5_increasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_5_increasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L343'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -286,7 +311,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land5_increasing',
         image: 'images/group_n1_contrast_landing_on_5_increasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_5_increasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L744'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -295,7 +321,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land6_any',
         image: 'images/group_p1_contrast_landing_on_6_any_preceding_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_6_any_preceding_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L362'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -304,7 +331,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land6_any',
         image: 'images/group_n1_contrast_landing_on_6_any_preceding_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_6_any_preceding_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L764'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -313,7 +341,8 @@ const plotData = [
         name: 'P1',
         id: 'acc1_p1_land6_increasing',
         image: 'images/group_p1_contrast_landing_on_6_increasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_landing_on_6_increasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L383'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -322,7 +351,8 @@ const plotData = [
         name: 'N1',
         id: 'acc1_n1_land6_increasing',
         image: 'images/group_n1_contrast_landing_on_6_increasing_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_landing_on_6_increasing_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L786'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -422,7 +452,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land1_any',
         image: 'images/group_p1_contrast_landing_on_1_any_preceding_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_1_any_preceding_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L136'
     },
     {
         category: 'Topomaps (ALL)',
@@ -431,7 +462,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land1_any',
         image: 'images/group_n1_contrast_landing_on_1_any_preceding_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_1_any_preceding_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L538'
     },
     {
         category: 'Topomaps (ALL)',
@@ -458,7 +490,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land2_decreasing',
         image: 'images/group_p1_contrast_landing_on_2_decreasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_2_decreasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L177'
     },
     {
         category: 'Topomaps (ALL)',
@@ -467,7 +500,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land2_decreasing',
         image: 'images/group_n1_contrast_landing_on_2_decreasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_2_decreasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L580'
     },
     {
         category: 'Topomaps (ALL)',
@@ -476,7 +510,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land2_any',
         image: 'images/group_p1_contrast_landing_on_2_any_preceding_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_2_any_preceding_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L156'
     },
     {
         category: 'Topomaps (ALL)',
@@ -485,7 +520,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land2_any',
         image: 'images/group_n1_contrast_landing_on_2_any_preceding_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_2_any_preceding_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L558'
     },
     {
         category: 'Topomaps (ALL)',
@@ -494,7 +530,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land3_decreasing',
         image: 'images/group_p1_contrast_landing_on_3_decreasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_3_decreasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L230'
     },
     {
         category: 'Topomaps (ALL)',
@@ -503,7 +540,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land3_decreasing',
         image: 'images/group_n1_contrast_landing_on_3_decreasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_3_decreasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L636'
     },
     {
         category: 'Topomaps (ALL)',
@@ -512,7 +550,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land3_any',
         image: 'images/group_p1_contrast_landing_on_3_any_preceding_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_3_any_preceding_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L207'
     },
     {
         category: 'Topomaps (ALL)',
@@ -521,7 +560,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land3_any',
         image: 'images/group_n1_contrast_landing_on_3_any_preceding_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_3_any_preceding_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L612'
     },
     {
         category: 'Topomaps (ALL)',
@@ -530,7 +570,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land2_increasing',
         image: 'images/group_p1_contrast_landing_on_2_increasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_2_increasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L194'
     },
     {
         category: 'Topomaps (ALL)',
@@ -539,7 +580,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land2_increasing',
         image: 'images/group_n1_contrast_landing_on_2_increasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_2_increasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L598'
     },
     {
         category: 'Topomaps (ALL)',
@@ -548,7 +590,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land3_increasing',
         image: 'images/group_p1_contrast_landing_on_3_increasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_3_increasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L247'
     },
     {
         category: 'Topomaps (ALL)',
@@ -557,7 +600,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land3_increasing',
         image: 'images/group_n1_contrast_landing_on_3_increasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_3_increasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L654'
     },
     {
         category: 'Topomaps (ALL)',
@@ -566,7 +610,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land4_decreasing',
         image: 'images/group_p1_contrast_landing_on_4_decreasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_4_decreasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L285'
     },
     {
         category: 'Topomaps (ALL)',
@@ -575,7 +620,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land4_decreasing',
         image: 'images/group_n1_contrast_landing_on_4_decreasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_4_decreasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L694'
     },
     {
         category: 'Topomaps (ALL)',
@@ -584,7 +630,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land4_any',
         image: 'images/group_p1_contrast_landing_on_4_any_preceding_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_4_any_preceding_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L262'
     },
     {
         category: 'Topomaps (ALL)',
@@ -593,7 +640,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land4_any',
         image: 'images/group_n1_contrast_landing_on_4_any_preceding_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_4_any_preceding_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L670'
     },
     {
         category: 'Topomaps (ALL)',
@@ -602,7 +650,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land4_increasing',
         image: 'images/group_p1_contrast_landing_on_4_increasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_4_increasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L300'
     },
     {
         category: 'Topomaps (ALL)',
@@ -611,7 +660,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land4_increasing',
         image: 'images/group_n1_contrast_landing_on_4_increasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_4_increasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L710'
     },
     {
         category: 'Topomaps (ALL)',
@@ -620,7 +670,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land5_decreasing',
         image: 'images/group_p1_contrast_landing_on_5_decreasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_5_decreasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L340'
     },
     {
         category: 'Topomaps (ALL)',
@@ -629,7 +680,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land5_decreasing',
         image: 'images/group_n1_contrast_landing_on_5_decreasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_5_decreasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L752'
     },
     {
         category: 'Topomaps (ALL)',
@@ -638,7 +690,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land5_any',
         image: 'images/group_p1_contrast_landing_on_5_any_preceding_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_5_any_preceding_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L317'
     },
     {
         category: 'Topomaps (ALL)',
@@ -647,7 +700,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land5_any',
         image: 'images/group_n1_contrast_landing_on_5_any_preceding_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_5_any_preceding_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L728'
     },
     {
         category: 'Topomaps (ALL)',
@@ -656,7 +710,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land5_increasing',
         image: 'images/group_p1_contrast_landing_on_5_increasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_5_increasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L353'
     },
     {
         category: 'Topomaps (ALL)',
@@ -665,7 +720,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land5_increasing',
         image: 'images/group_n1_contrast_landing_on_5_increasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_5_increasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L766'
     },
     {
         category: 'Topomaps (ALL)',
@@ -674,7 +730,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land6_any',
         image: 'images/group_p1_contrast_landing_on_6_any_preceding_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_6_any_preceding_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L372'
     },
     {
         category: 'Topomaps (ALL)',
@@ -683,7 +740,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land6_any',
         image: 'images/group_n1_contrast_landing_on_6_any_preceding_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_6_any_preceding_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L786'
     },
     {
         category: 'Topomaps (ALL)',
@@ -692,7 +750,8 @@ const plotData = [
         name: 'P1',
         id: 'all_p1_land6_increasing',
         image: 'images/group_p1_contrast_landing_on_6_increasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_landing_on_6_increasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L395'
     },
     {
         category: 'Topomaps (ALL)',
@@ -701,7 +760,8 @@ const plotData = [
         name: 'N1',
         id: 'all_n1_land6_increasing',
         image: 'images/group_n1_contrast_landing_on_6_increasing_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_landing_on_6_increasing_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L810'
     },
     {
         category: 'Topomaps (ALL)',
@@ -824,7 +884,8 @@ const plotData = [
         subcategory: 'P1 Contrast (Decreasing)',
         category: 'Topomaps (ALL)',
         image: 'images/group_03_generate_p1_contrast_decreasing_minus_1_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_decreasing_minus_1_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L16'
     },
     {
         category: 'ERP Waveforms',
@@ -834,7 +895,8 @@ const plotData = [
         subcategory: 'P1 Contrast (Decreasing)',
         category: 'Topomaps (ALL)',
         image: 'images/group_03_generate_p1_contrast_decreasing_minus_2_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_decreasing_minus_2_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L38'
     },
     {
         category: 'ERP Waveforms',
@@ -844,7 +906,8 @@ const plotData = [
         subcategory: 'P1 Contrast (Decreasing)',
         category: 'Topomaps (ALL)',
         image: 'images/group_03_generate_p1_contrast_decreasing_minus_3_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_decreasing_minus_3_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L58'
     },
     {
         category: 'ERP Waveforms',
@@ -854,7 +917,8 @@ const plotData = [
         subcategory: 'P1 Contrast (Increasing)',
         category: 'Topomaps (ALL)',
         image: 'images/group_03_generate_p1_contrast_increasing_plus_1_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_increasing_plus_1_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L76'
     },
     {
         category: 'ERP Waveforms',
@@ -864,7 +928,8 @@ const plotData = [
         subcategory: 'P1 Contrast (Increasing)',
         category: 'Topomaps (ALL)',
         image: 'images/group_03_generate_p1_contrast_increasing_plus_2_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_increasing_plus_2_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L98'
     },
     {
         category: 'ERP Waveforms',
@@ -874,7 +939,8 @@ const plotData = [
         subcategory: 'P1 Contrast (Increasing)',
         category: 'Topomaps (ALL)',
         image: 'images/group_03_generate_p1_contrast_increasing_plus_3_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p1_contrast_increasing_plus_3_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L118'
     },
     {
         category: 'ERP Waveforms',
@@ -884,7 +950,8 @@ const plotData = [
         subcategory: 'P1 Contrast (Decreasing)',
         category: 'Topomaps (ACC=1)',
         image: 'images/group_03_generate_p1_contrast_decreasing_minus_1_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_decreasing_minus_1_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L16'
     },
     {
         category: 'ERP Waveforms',
@@ -894,7 +961,8 @@ const plotData = [
         subcategory: 'P1 Contrast (Decreasing)',
         category: 'Topomaps (ACC=1)',
         image: 'images/group_03_generate_p1_contrast_decreasing_minus_2_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_decreasing_minus_2_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L38'
     },
     {
         category: 'ERP Waveforms',
@@ -904,7 +972,8 @@ const plotData = [
         subcategory: 'P1 Contrast (Decreasing)',
         category: 'Topomaps (ACC=1)',
         image: 'images/group_03_generate_p1_contrast_decreasing_minus_3_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_decreasing_minus_3_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L58'
     },
     {
         category: 'ERP Waveforms',
@@ -914,7 +983,8 @@ const plotData = [
         subcategory: 'P1 Contrast (Increasing)',
         category: 'Topomaps (ACC=1)',
         image: 'images/group_03_generate_p1_contrast_increasing_plus_1_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_increasing_plus_1_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L76'
     },
     {
         category: 'ERP Waveforms',
@@ -924,7 +994,8 @@ const plotData = [
         subcategory: 'P1 Contrast (Increasing)',
         category: 'Topomaps (ACC=1)',
         image: 'images/group_03_generate_p1_contrast_increasing_plus_2_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_increasing_plus_2_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L98'
     },
     {
         category: 'ERP Waveforms',
@@ -934,7 +1005,8 @@ const plotData = [
         subcategory: 'P1 Contrast (Increasing)',
         category: 'Topomaps (ACC=1)',
         image: 'images/group_03_generate_p1_contrast_increasing_plus_3_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_p1_contrast_increasing_plus_3_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L118'
     },
     // N1 Contrast Topomaps
     {
@@ -945,7 +1017,8 @@ const plotData = [
         subcategory: 'N1 Contrast (Decreasing)',
         category: 'Topomaps (ALL)',
         image: 'images/group_03_generate_n1_contrast_decreasing_minus_1_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_decreasing_minus_1_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L418'
     },
     {
         category: 'ERP Waveforms',
@@ -955,7 +1028,8 @@ const plotData = [
         subcategory: 'N1 Contrast (Decreasing)',
         category: 'Topomaps (ALL)',
         image: 'images/group_03_generate_n1_contrast_decreasing_minus_2_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_decreasing_minus_2_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L440'
     },
     {
         category: 'ERP Waveforms',
@@ -965,7 +1039,8 @@ const plotData = [
         subcategory: 'N1 Contrast (Decreasing)',
         category: 'Topomaps (ALL)',
         image: 'images/group_03_generate_n1_contrast_decreasing_minus_3_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_decreasing_minus_3_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L460'
     },
     {
         category: 'ERP Waveforms',
@@ -975,7 +1050,8 @@ const plotData = [
         subcategory: 'N1 Contrast (Increasing)',
         category: 'Topomaps (ALL)',
         image: 'images/group_03_generate_n1_contrast_increasing_plus_1_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_increasing_plus_1_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L478'
     },
     {
         category: 'ERP Waveforms',
@@ -985,7 +1061,8 @@ const plotData = [
         subcategory: 'N1 Contrast (Increasing)',
         category: 'Topomaps (ALL)',
         image: 'images/group_03_generate_n1_contrast_increasing_plus_2_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_increasing_plus_2_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L500'
     },
     {
         category: 'ERP Waveforms',
@@ -995,7 +1072,8 @@ const plotData = [
         subcategory: 'N1 Contrast (Increasing)',
         category: 'Topomaps (ALL)',
         image: 'images/group_03_generate_n1_contrast_increasing_plus_3_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_n1_contrast_increasing_plus_3_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L520'
     },
     {
         category: 'ERP Waveforms',
@@ -1005,7 +1083,8 @@ const plotData = [
         subcategory: 'N1 Contrast (Decreasing)',
         category: 'Topomaps (ACC=1)',
         image: 'images/group_03_generate_n1_contrast_decreasing_minus_1_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_decreasing_minus_1_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L406'
     },
     {
         category: 'ERP Waveforms',
@@ -1015,7 +1094,8 @@ const plotData = [
         subcategory: 'N1 Contrast (Decreasing)',
         category: 'Topomaps (ACC=1)',
         image: 'images/group_03_generate_n1_contrast_decreasing_minus_2_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_decreasing_minus_2_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L428'
     },
     {
         category: 'ERP Waveforms',
@@ -1025,7 +1105,8 @@ const plotData = [
         subcategory: 'N1 Contrast (Decreasing)',
         category: 'Topomaps (ACC=1)',
         image: 'images/group_03_generate_n1_contrast_decreasing_minus_3_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_decreasing_minus_3_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L448'
     },
     {
         category: 'ERP Waveforms',
@@ -1035,7 +1116,8 @@ const plotData = [
         subcategory: 'N1 Contrast (Increasing)',
         category: 'Topomaps (ACC=1)',
         image: 'images/group_03_generate_n1_contrast_increasing_plus_1_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_increasing_plus_1_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L466'
     },
     {
         category: 'ERP Waveforms',
@@ -1045,7 +1127,8 @@ const plotData = [
         subcategory: 'N1 Contrast (Increasing)',
         category: 'Topomaps (ACC=1)',
         image: 'images/group_03_generate_n1_contrast_increasing_plus_2_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_increasing_plus_2_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L488'
     },
     {
         category: 'ERP Waveforms',
@@ -1055,7 +1138,8 @@ const plotData = [
         subcategory: 'N1 Contrast (Increasing)',
         category: 'Topomaps (ACC=1)',
         image: 'images/group_03_generate_n1_contrast_increasing_plus_3_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc%3D1/code/03_generate_n1_contrast_increasing_plus_3_acc%3D1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L508'
     },
     // LORETA
     {
@@ -1079,7 +1163,8 @@ const plotData = [
         name: 'P3b Contrast (Decreasing) -1',
         id: 'acc1_p3b_contrast_dec_minus_1',
         image: 'images/group_03_generate_p3b_contrast_decreasing_minus_1_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc=1/code/03_generate_p3b_contrast_decreasing_minus_1_acc=1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L810'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -1088,7 +1173,8 @@ const plotData = [
         name: 'P3b Contrast (Decreasing) -2',
         id: 'acc1_p3b_contrast_dec_minus_2',
         image: 'images/group_03_generate_p3b_contrast_decreasing_minus_2_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc=1/code/03_generate_p3b_contrast_decreasing_minus_2_acc=1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L832'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -1097,7 +1183,8 @@ const plotData = [
         name: 'P3b Contrast (Decreasing) -3',
         id: 'acc1_p3b_contrast_dec_minus_3',
         image: 'images/group_03_generate_p3b_contrast_decreasing_minus_3_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc=1/code/03_generate_p3b_contrast_decreasing_minus_3_acc=1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L852'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -1106,7 +1193,8 @@ const plotData = [
         name: 'P3b Contrast (Increasing) +1',
         id: 'acc1_p3b_contrast_inc_plus_1',
         image: 'images/group_03_generate_p3b_contrast_increasing_plus_1_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc=1/code/03_generate_p3b_contrast_increasing_plus_1_acc=1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L870'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -1115,7 +1203,8 @@ const plotData = [
         name: 'P3b Contrast (Increasing) +2',
         id: 'acc1_p3b_contrast_inc_plus_2',
         image: 'images/group_03_generate_p3b_contrast_increasing_plus_2_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc=1/code/03_generate_p3b_contrast_increasing_plus_2_acc=1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L892'
     },
     {
         category: 'Topomaps (ACC=1)',
@@ -1124,7 +1213,8 @@ const plotData = [
         name: 'P3b Contrast (Increasing) +3',
         id: 'acc1_p3b_contrast_inc_plus_3',
         image: 'images/group_03_generate_p3b_contrast_increasing_plus_3_acc=1.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_acc=1/code/03_generate_p3b_contrast_increasing_plus_3_acc=1.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_acc%3D1.yaml#L912'
     },
     {
         category: 'Topomaps (ALL)',
@@ -1133,7 +1223,8 @@ const plotData = [
         name: 'P3b Contrast (Decreasing) -1',
         id: 'all_p3b_contrast_dec_minus_1',
         image: 'images/group_03_generate_p3b_contrast_decreasing_minus_1_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p3b_contrast_decreasing_minus_1_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L834'
     },
     {
         category: 'Topomaps (ALL)',
@@ -1142,7 +1233,8 @@ const plotData = [
         name: 'P3b Contrast (Decreasing) -2',
         id: 'all_p3b_contrast_dec_minus_2',
         image: 'images/group_03_generate_p3b_contrast_decreasing_minus_2_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p3b_contrast_decreasing_minus_2_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L856'
     },
     {
         category: 'Topomaps (ALL)',
@@ -1151,7 +1243,8 @@ const plotData = [
         name: 'P3b Contrast (Decreasing) -3',
         id: 'all_p3b_contrast_dec_minus_3',
         image: 'images/group_03_generate_p3b_contrast_decreasing_minus_3_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p3b_contrast_decreasing_minus_3_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L876'
     },
     {
         category: 'Topomaps (ALL)',
@@ -1160,7 +1253,8 @@ const plotData = [
         name: 'P3b Contrast (Increasing) +1',
         id: 'all_p3b_contrast_inc_plus_1',
         image: 'images/group_03_generate_p3b_contrast_increasing_plus_1_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p3b_contrast_increasing_plus_1_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L894'
     },
     {
         category: 'Topomaps (ALL)',
@@ -1169,7 +1263,8 @@ const plotData = [
         name: 'P3b Contrast (Increasing) +2',
         id: 'all_p3b_contrast_inc_plus_2',
         image: 'images/group_03_generate_p3b_contrast_increasing_plus_2_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p3b_contrast_increasing_plus_2_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L916'
     },
     {
         category: 'Topomaps (ALL)',
@@ -1178,7 +1273,8 @@ const plotData = [
         name: 'P3b Contrast (Increasing) +3',
         id: 'all_p3b_contrast_inc_plus_3',
         image: 'images/group_03_generate_p3b_contrast_increasing_plus_3_all.png',
-        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/eeg_all/code/03_generate_p3b_contrast_increasing_plus_3_all.py'
+        scriptUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/code/generate_contrast_plots.py',
+        configUrl: 'https://github.com/yurigushiken/eeg-image-analysis/blob/main/SFN/configs/erp_contrasts_all.yaml#L936'
     }
 ]; 
 // Dynamically add Numbers Pair Analysis plots (ACC=1 and ALL)
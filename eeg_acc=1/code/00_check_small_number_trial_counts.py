@@ -30,7 +30,7 @@ def analyze_small_number_trial_counts():
 
     condition_counts = defaultdict(int)
     for subject_dir in subject_dirs:
-        epoch_files = glob.glob(os.path.join(subject_dir, '*_epo.fif'))
+        epoch_files = glob.glob(os.path.join(subject_dir, '*_task-numbers_cond-*_epo.fif'))
         for epoch_file in epoch_files:
             try:
                 filename = os.path.basename(epoch_file)
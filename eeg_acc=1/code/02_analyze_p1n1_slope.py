@@ -1,13 +1,14 @@
 import os
-import pandas as pd
-import numpy as np
-import glob
-import mne
+import sys
 from statsmodels.stats.anova import AnovaRM
 import seaborn as sns
 import matplotlib.pyplot as plt
 import argparse
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import erp_features
+
 # --- 1. CONFIGURATION ---
 KEY_CONDITIONS_MAP = {
     "Landing on 1": ["21", "31", "41"],
@@ -15,21 +16,16 @@ KEY_CONDITIONS_MAP = {
     "Landing on 3": ["43", "53", "63"],
 }
 
-BASE_CONDITIONS = [cond for sublist in KEY_CONDITIONS_MAP.values() for cond in sublist]
-
 PARTICIPANT_LIST = [
     "02", "03", "04", "05", "08", "09", "10", "11", "12", "13", "14", "15",
     "17", "21", "22", "23", "25", "26", "27", "28", "29", "31", "32", "33"
 ]
 
-# --- ROIs and Time Windows for Peak Detection ---
-P1_ROI = ['E71', 'E75', 'E76', 'E70', 'E83', 'E74', 'E81', 'E82']
-P1_TMIN, P1_TMAX = 0.080, 0.130
-
-N1_ROI_L = ['E66', 'E65', 'E59', 'E60', 'E67', 'E71', 'E70']
-N1_ROI_R = ['E84', 'E76', 'E77', 'E85', 'E91', 'E90', 'E83']
-N1_ROI = N1_ROI_L + N1_ROI_R
-N1_TMIN, N1_TMAX = 0.150, 0.200
+# --- Slope ROI ---
+# The N1 'channel_slope' feature is the linear fit of the N1 ROI waveform from the
+# channel-wise P1 peak (80-130ms, Oz ROI) to the channel-wise N1 peak (150-200ms),
+# see erp_features.COMPONENTS
+N1_ROI = 'bilateral'
 
 
 def analyze_p1n1_slope():
@@ -42,69 +38,17 @@ def analyze_p1n1_slope():
     output_dir = os.path.join(derivatives_dir, '02_p1n1_slope_analysis')
     os.makedirs(output_dir, exist_ok=True)
 
-    all_slopes = []
-
     print(f"--- Starting P1-N1 Slope Analysis for {len(PARTICIPANT_LIST)} subjects ---")
 
-    for subject_id in PARTICIPANT_LIST:
-        try:
-            subject_dir = os.path.join(derivatives_dir, f'sub-{subject_id}')
-            print(f"Processing sub-{subject_id}...")
-
-            base_evokeds = {
-                cond: mne.read_epochs(os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif'), preload=True, verbose=False).average()
-                for cond in BASE_CONDITIONS if os.path.exists(os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif'))
-            }
-            if not base_evokeds:
-                print(f"  > No base condition files found for sub-{subject_id}. Skipping.")
-                continue
-
-            for key_cond, base_cond_list in KEY_CONDITIONS_MAP.items():
-                evokeds_to_combine = [base_evokeds[bc] for bc in base_cond_list if bc in base_evokeds]
-                if not evokeds_to_combine:
-                    continue
-                
-                evoked = mne.combine_evoked(evokeds_to_combine, 'equal')
-
-                # --- Find Peak Latencies ---
-                _, p1_lat, _ = evoked.copy().pick(P1_ROI).get_peak(tmin=P1_TMIN, tmax=P1_TMAX, mode='pos', return_amplitude=True)
-                _, n1_lat, _ = evoked.copy().pick(N1_ROI).get_peak(tmin=N1_TMIN, tmax=N1_TMAX, mode='neg', return_amplitude=True)
-
-                # --- Calculate Slope on N1_ROI waveform ---
-                roi_evoked = evoked.copy().pick(N1_ROI)
-                roi_data_mean = roi_evoked.data.mean(axis=0)
-                
-                t_start_idx, t_end_idx = roi_evoked.time_as_index([p1_lat, n1_lat])
-                
-                # Ensure start is before end
-                if t_start_idx >= t_end_idx:
-                    print(f"  > P1 peak found after N1 peak for {key_cond}. Skipping slope calculation.")
-                    continue
-                
-                time_segment = roi_evoked.times[t_start_idx:t_end_idx+1]
-                data_segment = roi_data_mean[t_start_idx:t_end_idx+1]
-
-                if len(time_segment) < 2:
-                    print(f"  > Not enough data points between P1 and N1 for {key_cond}. Skipping.")
-                    continue
-
-                # Use numpy.polyfit to get the slope of the linear regression
-                slope, _ = np.polyfit(time_segment, data_segment, 1)
-
-                all_slopes.append({
-                    'subject_id': subject_id,
-                    'condition': key_cond,
-                    'slope': slope
-                })
-        except Exception as e:
-            print(f"--- FAILED to process Subject {subject_id}. Error: {e} ---")
-
-    if not all_slopes:
+    features = erp_features.load_feature_table(derivatives_dir, KEY_CONDITIONS_MAP.values(), PARTICIPANT_LIST)
+    n1 = erp_features.get_key_condition_features(features, KEY_CONDITIONS_MAP, 'N1', N1_ROI, PARTICIPANT_LIST)
+    # The slope is missing where the P1 peak is not before the N1 peak
+    slope_df = n1[['subject_id', 'condition', 'channel_slope']].rename(columns={'channel_slope': 'slope'}).dropna()
+
+    if slope_df.empty:
         print("\n--- No slope data was generated. Cannot perform analysis or plotting. ---")
         return
 
-    slope_df = pd.DataFrame(all_slopes)
-    
     # --- 1. Perform Repeated Measures ANOVA ---
     print("\n--- Performing one-way repeated-measures ANOVA on slopes ---")
     try:
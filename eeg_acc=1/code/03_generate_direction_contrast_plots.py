@@ -1,9 +1,14 @@
 import mne
 import os
+import sys
 import glob
 import re
 import matplotlib.pyplot as plt
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import evoked_cache
+
 # --- 1. CONFIGURATION ---
 CONDITION_PAIRS = {
     "1v2": ("12", "21"), "1v3": ("13", "31"), "1v4": ("14", "41"),
@@ -45,7 +50,7 @@ def generate_all_in_one():
                 if not match: continue
                 cond = match.group(1)
                 if cond not in all_subject_evokeds: all_subject_evokeds[cond] = []
-                evoked = mne.read_epochs(epoch_file, preload=True, verbose=False).average()
+                evoked = evoked_cache.get_evoked(epoch_file)
                 all_subject_evokeds[cond].append(evoked)
         except FileNotFoundError:
             print(f" - WARNING: Directory not found for {subject_id}. Skipping.")
@@ -1,5 +1,6 @@
 import mne
 import os
+import sys
 import glob
 import argparse
 import matplotlib.pyplot as plt
@@ -7,6 +8,10 @@ import matplotlib.gridspec as gridspec
 from matplotlib.lines import Line2D
 import numpy as np
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import evoked_cache
+
 # --- 1. CONFIGURATION ---
 # Base conditions to load
 BASE_CONDITIONS = ['14', '24', '34', '25', '35', '45', '36', '46', '56']
@@ -66,7 +71,7 @@ def generate_n1_plots(subjects_to_process):
         
         try:
             # ... load data and create key evokeds ...
-            base_evokeds = {cond: mne.read_epochs(os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif'), preload=True, verbose=False).average() for cond in BASE_CONDITIONS if os.path.exists(os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif'))}
+            base_evokeds = evoked_cache.load_subject_evokeds(subject_dir, BASE_CONDITIONS)
             for cond, evoked in base_evokeds.items(): all_subject_evokeds[cond].append(evoked)
             if not base_evokeds: print(f"  - No data found for Subject {subject_id}. Skipping."); continue
             key_evokeds = {key_cond: mne.combine_evoked([base_evokeds[bc] for bc in bcl if bc in base_evokeds], 'equal') for key_cond, bcl in KEY_CONDITIONS_MAP.items() if any(bc in base_evokeds for bc in bcl)}
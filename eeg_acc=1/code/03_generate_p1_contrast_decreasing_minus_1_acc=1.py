@@ -1,193 +0,0 @@
-import mne
-import os
-import glob
-import argparse
-import matplotlib.pyplot as plt
-import matplotlib.gridspec as gridspec
-from matplotlib.lines import Line2D
-import numpy as np
-from scipy.signal import find_peaks
-
-# --- 1. CONFIGURATION ---
-# Base conditions to load
-BASE_CONDITIONS = ['21', '32', '43', '54', '65']
-
-# How to combine base conditions into key conditions
-KEY_CONDITIONS_MAP = {
-    "2 to 1": ["21"],
-    "3 to 2": ["32"],
-    "4 to 3": ["43"],
-    "5 to 4": ["54"],
-    "6 to 5": ["65"],
-}
-
-# Define colors for plots
-CONDITION_COLORS = {
-    "2 to 1": '#e41a1c',  # Red
-    "3 to 2": '#377eb8',  # Blue
-    "4 to 3": '#4daf4a',  # Green
-    "5 to 4": '#984ea3',  # Purple
-    "6 to 5": '#ff7f00',  # Orange
-}
-
-# Electrodes of interest for P1 waveform (Oz area)
-P1_ELECTRODES = ['E71', 'E75', 'E76', 'E70', 'E83', 'E74', 'E81', 'E82']
-
-# Time window for P1 peak search
-PEAK_TMIN, PEAK_TMAX = 0.080, 0.130
-
-# Standard list of non-scalp channels to exclude
-NON_SCALP_CHANNELS = [
-    'E1', 'E8', 'E14', 'E17', 'E21', 'E25', 'E32', 'E38', 'E43', 'E44', 'E48', 
-    'E49', 'E113', 'E114', 'E119', 'E120', 'E121', 'E125', 'E126', 'E127', 'E128'
-]
-
-def generate_p1_contrast_plots(subjects_to_process):
-    """
-    Generates combined ERP and topomap plots for the P1 "decreasing minus 1" contrast.
-    """
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    derivatives_dir = os.path.join(base_dir, 'derivatives')
-    script_name = os.path.basename(__file__).replace('.py', '')
-    
-    all_subject_evokeds = {cond: [] for cond in BASE_CONDITIONS}
-
-    if not subjects_to_process:
-        subject_dirs = glob.glob(os.path.join(derivatives_dir, 'sub-*'))
-        subjects_to_process = sorted([os.path.basename(d).split('-')[1] for d in subject_dirs])
-
-    print(f"--- Processing subjects for P1 Contrast plots: {subjects_to_process} ---")
-
-    # --- Individual Subject Plots ---
-    for subject_id in subjects_to_process:
-        subject_dir = os.path.join(derivatives_dir, f'sub-{subject_id}')
-        subject_figure_dir = os.path.join(subject_dir, 'figures', script_name)
-        os.makedirs(subject_figure_dir, exist_ok=True)
-        print(f"\nProcessing Subject {subject_id}...")
-        
-        try:
-            # Load and collect evokeds
-            base_evokeds = {cond: mne.read_epochs(os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif'), preload=True, verbose=False).average() for cond in BASE_CONDITIONS if os.path.exists(os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif'))}
-            for cond, evoked in base_evokeds.items(): all_subject_evokeds[cond].append(evoked)
-            if not base_evokeds: print(f"  - No data found. Skipping."); continue
-            
-            key_evokeds = {key_cond: mne.combine_evoked([base_evokeds[bc] for bc in bcl if bc in base_evokeds], 'equal') for key_cond, bcl in KEY_CONDITIONS_MAP.items() if any(bc in base_evokeds for bc in bcl)}
-            if not key_evokeds: print(f"  - Not enough data for key conditions. Skipping."); continue
-
-            # --- Create Plot ---
-            fig = plt.figure(figsize=(12, 8))
-            fig.suptitle(f'Subject {subject_id}: P1 Contrast - Decreasing -1 (ACC=1)', fontsize=16)
-            gs = gridspec.GridSpec(2, len(key_evokeds), height_ratios=[2, 1.5])
-            ax_erp = fig.add_subplot(gs[0, :])
-
-            mne.viz.plot_compare_evokeds(key_evokeds, picks=P1_ELECTRODES, combine='mean', axes=ax_erp, title="Mean ERP over Oz Region", show=False, legend='upper left', ci=False, colors={cond: color for cond, color in CONDITION_COLORS.items() if cond in key_evokeds})
-
-            # --- Find P1 peaks for each condition ---
-            peak_times = {}
-            for cond_name, evoked in key_evokeds.items():
-                try:
-                    roi_evoked_data = evoked.get_data(picks=P1_ELECTRODES).mean(axis=0)
-                    info = mne.create_info(['ROI_AVG'], evoked.info['sfreq'], ch_types='eeg')
-                    roi_evoked = mne.EvokedArray(roi_evoked_data[np.newaxis, :], info, tmin=evoked.tmin)
-                    _, peak_time = roi_evoked.get_peak(tmin=PEAK_TMIN, tmax=PEAK_TMAX, mode='pos')
-                    peak_times[cond_name] = peak_time
-                except ValueError:
-                    peak_times[cond_name] = 0.110 # Fallback
-
-            for i, (cond_name, evoked) in enumerate(key_evokeds.items()):
-                ax_topo = fig.add_subplot(gs[1, i])
-                peak_time = peak_times[cond_name]
-
-                # Plot vertical line for peak
-                color = CONDITION_COLORS.get(cond_name, 'k')
-                ax_erp.axvline(x=peak_time, color=color, linestyle='--', linewidth=1.5, alpha=0.8)
-
-                # Plot topomap
-                scalp_evoked = evoked.copy().pick('eeg', exclude=NON_SCALP_CHANNELS)
-                scalp_evoked.plot_topomap(times=peak_time, axes=ax_topo, show=False, vlim=(-6, 6), colorbar=False)
-                ax_topo.set_title(f"{cond_name}\n{int(peak_time*1000)} ms", color=CONDITION_COLORS.get(cond_name, 'black'))
-
-
-            fig.subplots_adjust(right=0.85, bottom=0.1, top=0.9, hspace=0.4)
-            cbar_ax = fig.add_axes([0.88, 0.15, 0.02, 0.2])
-            plt.colorbar(plt.cm.ScalarMappable(norm=plt.Normalize(vmin=-6, vmax=6), cmap='RdBu_r'), cax=cbar_ax, label='µV')
-            
-            fig_path = os.path.join(subject_figure_dir, f'sub-{subject_id}_{script_name}.png')
-            if os.path.exists(fig_path): os.remove(fig_path)  # Ensure fresh output
-            fig.savefig(fig_path, bbox_inches='tight'); plt.close(fig)
-            print(f"    - Saved P1 plot to {fig_path}")
-
-        except Exception as e:
-            print(f"--- FAILED to generate P1 plot for Subject {subject_id}. Error: {e} ---")
-
-    # --- Group-Level Plot ---
-    group_figure_dir = os.path.join(derivatives_dir, 'group', 'figures', script_name)
-    os.makedirs(group_figure_dir, exist_ok=True)
-    
-    grand_averages_base = {cond: mne.grand_average(evoked_list) for cond, evoked_list in all_subject_evokeds.items() if evoked_list}
-    if not grand_averages_base: print("\n--- No data for group plot. ---"); return
-
-    grand_averages_key = {key_cond: mne.combine_evoked([grand_averages_base[bc] for bc in bcl if bc in grand_averages_base], 'equal') for key_cond, bcl in KEY_CONDITIONS_MAP.items() if any(bc in base_evokeds for bc in bcl)}
-    if not grand_averages_key: print("\n--- Not enough data for group key conditions. ---"); return
-
-    print("\n--- Generating group-level grand average P1 contrast plot ---")
-
-    fig_grp = plt.figure(figsize=(12, 8))
-    fig_grp.suptitle('Grand Average: P1 Contrast - Decreasing -1 (ACC=1)', fontsize=16)
-    gs_grp = gridspec.GridSpec(2, len(grand_averages_key), height_ratios=[2, 1.5])
-    ax_erp_grp = fig_grp.add_subplot(gs_grp[0, :])
-
-    mne.viz.plot_compare_evokeds(
-        grand_averages_key, picks=P1_ELECTRODES, combine='mean', axes=ax_erp_grp,
-        title="Grand Average Mean ERP over Oz Region", show=False, legend='upper left',
-        ci=0.95, colors={cond: color for cond, color in CONDITION_COLORS.items() if cond in grand_averages_key}
-    )
-    
-    # --- Find P1 peaks for each condition for topomaps ---
-    peak_times_grp = {}
-    for cond_name, evoked in grand_averages_key.items():
-        try:
-            roi_evoked_data = evoked.get_data(picks=P1_ELECTRODES).mean(axis=0)
-            info = mne.create_info(['ROI_AVG'], evoked.info['sfreq'], ch_types='eeg')
-            roi_evoked = mne.EvokedArray(roi_evoked_data[np.newaxis, :], info, tmin=evoked.tmin)
-            _, peak_time = roi_evoked.get_peak(tmin=PEAK_TMIN, tmax=PEAK_TMAX, mode='pos')
-            peak_times_grp[cond_name] = peak_time
-        except ValueError:
-            peak_times_grp[cond_name] = 0.110 # Fallback
-
-    for i, (cond_name, evoked) in enumerate(grand_averages_key.items()):
-        ax_topo_grp = fig_grp.add_subplot(gs_grp[1, i])
-        peak_time = peak_times_grp.get(cond_name)
-        
-        # Plot vertical line for peak
-        color = CONDITION_COLORS.get(cond_name, 'k')
-        ax_erp_grp.axvline(x=peak_time, color=color, linestyle='--', linewidth=1.5, alpha=0.8)
-
-        # Plot topomap
-        scalp_evoked = evoked.copy().pick('eeg', exclude=NON_SCALP_CHANNELS)
-        scalp_evoked.plot_topomap(times=peak_time, axes=ax_topo_grp, show=False, vlim=(-6, 6), colorbar=False)
-        ax_topo_grp.set_title(f"{cond_name}\n{int(peak_time*1000)} ms", color=CONDITION_COLORS.get(cond_name, 'black'))
-
-    fig_grp.subplots_adjust(right=0.85, bottom=0.1, top=0.9, hspace=0.4)
-    cbar_ax = fig_grp.add_axes([0.88, 0.15, 0.02, 0.2])
-    plt.colorbar(plt.cm.ScalarMappable(norm=plt.Normalize(vmin=-6, vmax=6), cmap='RdBu_r'), cax=cbar_ax, label='µV')
-    
-    grp_fig_path = os.path.join(group_figure_dir, f'group_{script_name}.png')
-    if os.path.exists(grp_fig_path): os.remove(grp_fig_path)  # Ensure fresh output
-    fig_grp.savefig(grp_fig_path, bbox_inches='tight')
-    plt.close(fig_grp)
-    print(f"--- Saved group P1 plot to {grp_fig_path} ---")
-
-def main():
-    """
-    Main function to parse arguments and run the plot generation.
-    """
-    parser = argparse.ArgumentParser(description='Generate P1 contrast plots for "decreasing minus 1".')
-    parser.add_argument('--subjects', nargs='*', default=[],
-                        help='List of subject IDs to process. If not provided, all subjects will be processed.')
-    args = parser.parse_args()
-    
-    generate_p1_contrast_plots(args.subjects)
-
-if __name__ == "__main__":
-    main() 
\ No newline at end of file
@@ -1,11 +1,16 @@
 import mne
 import os
+import sys
 import glob
 import argparse
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 import numpy as np
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import evoked_cache
+
 # --- 1. CONFIGURATION ---
 BASE_CONDITIONS = ['12', '21']
 
@@ -52,14 +57,7 @@ def generate_p1_inc12_dec21_plots(subjects_to_process):
         print(f"\nProcessing Subject {subject_id}...")
 
         try:
-            base_evokeds = {
-                cond: mne.read_epochs(
-                    os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif'),
-                    preload=True, verbose=False
-                ).average()
-                for cond in BASE_CONDITIONS
-                if os.path.exists(os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif'))
-            }
+            base_evokeds = evoked_cache.load_subject_evokeds(subject_dir, BASE_CONDITIONS)
             for cond, evoked in base_evokeds.items():
                 all_subject_evokeds[cond].append(evoked)
             if not base_evokeds:
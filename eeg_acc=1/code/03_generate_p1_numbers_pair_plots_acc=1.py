@@ -1,10 +1,15 @@
 import mne
 import os
+import sys
 import glob
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 import numpy as np
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import evoked_cache
+
 # --- 1. CONFIGURATION ---
 NUMBER_PAIRS = [
     ("12", "21"), ("13", "31"), ("14", "41"),
@@ -43,9 +48,9 @@ def generate_p1_pair_plots():
                 dec_epo_path = os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{dec_cond}_epo.fif')
 
                 if os.path.exists(inc_epo_path):
-                    all_subject_evokeds[inc_cond].append(mne.read_epochs(inc_epo_path, preload=True, verbose=False).average())
+                    all_subject_evokeds[inc_cond].append(evoked_cache.get_evoked(inc_epo_path))
                 if os.path.exists(dec_epo_path):
-                    all_subject_evokeds[dec_cond].append(mne.read_epochs(dec_epo_path, preload=True, verbose=False).average())
+                    all_subject_evokeds[dec_cond].append(evoked_cache.get_evoked(dec_epo_path))
             except Exception as e:
                 print(f"  - Error processing subject {subject_id} for pair {inc_cond}/{dec_cond}: {e}")
         
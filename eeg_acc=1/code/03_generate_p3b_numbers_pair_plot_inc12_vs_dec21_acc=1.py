@@ -1,11 +1,16 @@
 import mne
 import os
+import sys
 import glob
 import argparse
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 import numpy as np
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import evoked_cache
+
 BASE_CONDITIONS = ['12', '21']
 
 KEY_CONDITIONS_MAP = {
@@ -46,11 +51,7 @@ def generate_p3b_inc12_dec21_plots(subjects_to_process):
         os.makedirs(fig_dir, exist_ok=True)
         print(f"\nProcessing Subject {sid}...")
         try:
-            base_evks = {
-                cond: mne.read_epochs(os.path.join(sdir, f'sub-{sid}_task-numbers_cond-{cond}_epo.fif'), preload=True, verbose=False).average()
-                for cond in BASE_CONDITIONS
-                if os.path.exists(os.path.join(sdir, f'sub-{sid}_task-numbers_cond-{cond}_epo.fif'))
-            }
+            base_evks = evoked_cache.load_subject_evokeds(sdir, BASE_CONDITIONS)
             for c, e in base_evks.items():
                 all_subject_evokeds[c].append(e)
             if len(base_evks) < 2:
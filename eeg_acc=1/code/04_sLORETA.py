@@ -1,8 +1,16 @@
 import mne
 import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
 from mne.minimum_norm import make_inverse_operator, apply_inverse
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import fsaverage_assets, evoked_cache, source_inverse
+
 # --- CONFIGURATION ---
 # All 30 specific conditions for Tasks 1 & 2
 ALL_30_CONDITIONS = [
@@ -22,65 +30,33 @@ ANALYSIS_MODE = 'individual'  # 'individual' for Task 1, 'grand_average' for Tas
 SUBJECT = "02"  # For individual analysis
 TASK = 1  # 1: individual all conditions, 2: grand average all conditions, 3: grand average cardinalities
 
-def setup_source_space_and_forward_solution(derivatives_dir, subjects_dir, subject_fs):
+# Inverse operator configuration (or pass --inverse-mode)
+# 'per_condition': a new covariance and inverse operator for each condition
+# 'pooled': one noise covariance per subject from the baseline of all conditions, with the
+#           inverse operator cached to disk and applied to every condition in one batch
+INVERSE_MODES = ('per_condition', 'pooled')
+INVERSE_MODE = 'per_condition'
+LAMBDA2 = 1.0 / 9.0  # SNR^2 regularization parameter
+FORWARD_PARAMS = dict(montage='GSN-HydroCel-128', sfreq=250, spacing='ico5',
+                      ico=3, conductivity=(0.3, 0.006, 0.3), mindist=5.0)
+POOLED_INVERSE_VERSION = 1
+
+# Output configuration
+# 'interactive': open a time viewer per condition and wait for ENTER
+# 'batch': headless; save each STC as HDF5 and render fixed-view snapshots offscreen
+OUTPUT_MODE = 'interactive'
+N_JOBS = 1  # Rendering processes in batch mode (<= 0 uses all cores)
+SNAPSHOT_VIEWS = ['lat', 'med']
+PEAK_TABLE_SIZE = 20  # Vertices listed in each peak table
+
+def setup_source_space_and_forward_solution():
     """
-    Set up source space and forward solution for sLORETA analysis.
+    Get the fsaverage forward solution for sLORETA analysis from the shared
+    asset store (computed once for all datasets).
     """
     print("\n--- Setting up source space and forward solution ---")
-    
-    # Ensure FreeSurfer average brain is available
-    mne.datasets.fetch_fsaverage(subjects_dir=subjects_dir, verbose=False)
-    
-    fwd_fname = os.path.join(derivatives_dir, f'{subject_fs}-fwd.fif')
-    src_fname = os.path.join(derivatives_dir, f'{subject_fs}-src.fif')
-    
-    if not os.path.exists(fwd_fname):
-        print(f"Forward solution not found. Computing and saving to {fwd_fname}...")
-        
-        # Create source space
-        src = mne.setup_source_space(
-            subject_fs, 
-            spacing='ico5', 
-            add_dist=False, 
-            subjects_dir=subjects_dir
-        )
-        mne.write_source_spaces(src_fname, src, overwrite=True)
-        
-        # Create BEM model
-        conductivity = (0.3, 0.006, 0.3)  # scalp, skull, brain
-        model = mne.make_bem_model(
-            subject=subject_fs, 
-            ico=3, 
-            conductivity=conductivity, 
-            subjects_dir=subjects_dir
-        )
-        bem = mne.make_bem_solution(model)
-        
-        # Set up EEG montage
-        montage = mne.channels.make_standard_montage('GSN-HydroCel-128')
-        info_gen = mne.create_info(
-            ch_names=montage.ch_names, 
-            sfreq=250, 
-            ch_types='eeg'
-        )
-        info_gen.set_montage(montage)
-        
-        # Create forward solution
-        trans = 'fsaverage'
-        fwd = mne.make_forward_solution(
-            info_gen, 
-            trans=trans, 
-            src=src, 
-            bem=bem, 
-            eeg=True, 
-            mindist=5.0
-        )
-        mne.write_forward_solution(fwd_fname, fwd, overwrite=True)
-    else:
-        print(f"Loading existing forward solution from {fwd_fname}")
-        fwd = mne.read_forward_solution(fwd_fname)
-    
-    return fwd, fwd['src']
+    fwd = fsaverage_assets.get_forward(**FORWARD_PARAMS)
+    return fwd, fwd['src'], str(fsaverage_assets.get_subjects_dir())
 
 def load_single_condition_epochs(subject_dir, subject_id, condition):
     """
@@ -138,6 +114,246 @@ def compute_inverse_operator_from_epochs(epochs, fwd):
     
     return inverse_operator
 
+def _epoch_fname(subject_dir, subject_id, condition):
+    return os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{condition}_epo.fif')
+
+def get_pooled_inverse_operator(subject_dir, subject_id, conditions, fwd, epochs_by_condition=None):
+    """
+    Get the subject's inverse operator built from the pooled baseline of all conditions.
+    
+    The noise covariance is computed once from the pre-stimulus samples of every
+    condition's epochs together, and the inverse operator is cached to
+    `sub-XX_task-numbers_desc-pooled-inv.fif` (with a `.json` sidecar). The cache is
+    reused as long as the epoch files, the condition list and the forward model
+    are unchanged.
+    
+    Parameters:
+    -----------
+    subject_dir : str
+        Path to subject directory
+    subject_id : str
+        Subject identifier
+    conditions : list of str
+        Conditions whose epochs are pooled
+    fwd : Forward
+        Forward solution
+    epochs_by_condition : dict or None
+        Already loaded epochs per condition (loaded from disk if None)
+    
+    Returns:
+    --------
+    inverse_operator : InverseOperator or None if no epochs were found
+    """
+    inv_fname = os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_desc-pooled-inv.fif')
+    meta_fname = inv_fname[:-len('.fif')] + '.json'
+    epo_fnames = {c: _epoch_fname(subject_dir, subject_id, c) for c in conditions}
+    epo_fnames = {c: f for c, f in epo_fnames.items() if os.path.exists(f)}
+    if not epo_fnames:
+        print(f"  - WARNING: No epochs found for Subject {subject_id}. Cannot build an inverse operator.")
+        return None
+
+    previous = {}
+    if os.path.exists(meta_fname):
+        with open(meta_fname, 'r') as f:
+            previous = json.load(f)
+    sources = {c: evoked_cache.fingerprint_file(f, previous.get('sources', {}).get(c))
+               for c, f in epo_fnames.items()}
+    meta = {
+        'version': POOLED_INVERSE_VERSION,
+        'forward': fsaverage_assets.forward_params(**FORWARD_PARAMS),
+        'params': {'method': 'shrunk', 'tmax': 0.0, 'loose': 0.2, 'depth': 0.8},
+        'sources': sources,
+    }
+    if os.path.exists(inv_fname) and previous == meta:
+        print(f"  - Loading cached pooled inverse operator from {inv_fname}")
+        return mne.minimum_norm.read_inverse_operator(inv_fname, verbose=False)
+
+    epochs_by_condition = epochs_by_condition or {}
+    epochs_list = [epochs_by_condition[c] if c in epochs_by_condition
+                   else mne.read_epochs(f, preload=True, verbose=False) for c, f in epo_fnames.items()]
+    print(f"Computing pooled noise covariance ({sum(len(e) for e in epochs_list)} epochs, "
+          f"{len(epochs_list)} conditions) and inverse operator...")
+    noise_cov = mne.compute_covariance(
+        epochs_list, 
+        tmax=0.0, 
+        method='shrunk', 
+        rank=None, 
+        verbose=False
+    )
+    inverse_operator = make_inverse_operator(
+        epochs_list[0].info, 
+        forward=fwd, 
+        noise_cov=noise_cov, 
+        loose=0.2, 
+        depth=0.8, 
+        verbose=False
+    )
+
+    # Write to temporary files first so an interrupted run never leaves a stale pair
+    tmp_inv_fname = os.path.join(subject_dir, f".{os.getpid()}.tmp{os.path.basename(inv_fname)}")
+    mne.minimum_norm.write_inverse_operator(tmp_inv_fname, inverse_operator, overwrite=True, verbose=False)
+    os.replace(tmp_inv_fname, inv_fname)
+    with open(meta_fname + '.tmp', 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_fname + '.tmp', meta_fname)
+    print(f"  - Saved pooled inverse operator to {inv_fname}")
+    return inverse_operator
+
+def apply_inverse_batch(evokeds, inverse_operator, lambda2=LAMBDA2, method="sLORETA"):
+    """
+    Apply one inverse operator to several evoked responses.
+    
+    The operator is prepared and its kernel assembled once; the kernel is then
+    applied to all evoked responses in a single matrix product.
+    
+    Parameters:
+    -----------
+    evokeds : dict
+        Evoked responses keyed by condition
+    
+    Returns:
+    --------
+    stcs : dict of SourceEstimate keyed by condition
+    """
+    return source_inverse.apply_inverse_stacked(evokeds, inverse_operator, lambda2, method=method, pick_ori=None)
+
+def show_source_estimate(stc, subjects_dir, time_label, prompt):
+    """
+    Open an interactive brain plot at the peak activation and wait for the user.
+    """
+    # Find peak activation time
+    peak_time = stc.get_peak()[1]
+    print(f"  - Peak activation at {peak_time*1000:.1f}ms")
+    
+    # Create interactive brain plot
+    brain = stc.plot(
+        subjects_dir=subjects_dir,
+        subject='fsaverage',
+        hemi='both',
+        views=['lat', 'med'],
+        time_viewer=True,
+        backend='pyvistaqt',
+        initial_time=peak_time,
+        time_label=time_label.format(peak_ms=peak_time * 1000)
+    )
+    
+    # Wait for user input before closing
+    input(prompt)
+
+def write_peak_table(stc, table_fname, n_peaks=PEAK_TABLE_SIZE):
+    """
+    Write the strongest source vertices (at the global peak time) to a CSV table.
+    """
+    peak_vertex, peak_time = stc.get_peak(vert_as_index=True)
+    time_idx = int(np.argmin(np.abs(stc.times - peak_time)))
+    values = stc.data[:, time_idx]
+    n_lh = len(stc.vertices[0])
+    with open(table_fname, 'w') as f:
+        f.write("rank,hemi,vertex,time_ms,value,vertex_peak_time_ms\n")
+        for rank, idx in enumerate(np.argsort(values)[::-1][:n_peaks], 1):
+            hemi, vertex = ('lh', stc.vertices[0][idx]) if idx < n_lh else ('rh', stc.vertices[1][idx - n_lh])
+            vertex_peak_time = stc.times[np.argmax(stc.data[idx])]
+            f.write(f"{rank},{hemi},{vertex},{peak_time*1000:.1f},{values[idx]:.6g},{vertex_peak_time*1000:.1f}\n")
+
+def render_source_snapshot(stc_fname, output_stem, subjects_dir, time_label):
+    """
+    Render fixed-view snapshots of a saved source estimate offscreen.
+    
+    Runs in a worker process. A peak-vertex table is always written; the PNG
+    snapshot is skipped (with a message) when no 3D renderer is available.
+    
+    Returns:
+    --------
+    message : str
+        What was written
+    """
+    stc = mne.read_source_estimate(stc_fname, subject='fsaverage')
+    peak_time = stc.get_peak()[1]
+    table_fname = f'{output_stem}_peaks.csv'
+    write_peak_table(stc, table_fname)
+
+    try:
+        # Headless rendering: no window, no event loop
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        import pyvista
+        pyvista.OFF_SCREEN = True
+        brain = stc.plot(
+            subjects_dir=subjects_dir,
+            subject='fsaverage',
+            hemi='split',
+            views=SNAPSHOT_VIEWS,
+            time_viewer=False,
+            show_traces=False,
+            backend='pyvistaqt',
+            initial_time=peak_time,
+            size=(800 * len(SNAPSHOT_VIEWS), 1200),
+            time_label=time_label.format(peak_ms=peak_time * 1000)
+        )
+        brain.save_image(f'{output_stem}.png')
+        brain.close()
+    except Exception as e:
+        return f"peak table only (no renderer: {type(e).__name__}: {e})"
+    return "snapshot and peak table"
+
+class SourceEstimatePresenter:
+    """
+    Shows (interactive mode) or saves and renders (batch mode) each source
+    estimate as soon as it is computed, so no task keeps all of its source
+    estimates in memory.
+    
+    In batch mode each STC is saved as HDF5 and its snapshot is rendered in a
+    worker process while the next one is computed; leaving the `with` block
+    waits for the remaining renders.
+    
+    Parameters:
+    -----------
+    output_dir : str
+        Directory for the `<name>-stc.h5`, `<name>.png` and `<name>_peaks.csv` files
+    n_jobs : int
+        Number of rendering processes (<= 0 uses all cores)
+    """
+    def __init__(self, subjects_dir, output_dir, n_jobs=1):
+        self.subjects_dir = subjects_dir
+        self.output_dir = output_dir
+        self.n_jobs = n_jobs if n_jobs > 0 else (os.cpu_count() or 1)
+        self.pool = None
+        self.futures = {}
+
+    def __enter__(self):
+        if OUTPUT_MODE == 'batch':
+            os.makedirs(self.output_dir, exist_ok=True)
+            print(f"--- Rendering source estimates with {self.n_jobs} worker process(es) as they are computed ---")
+            self.pool = ProcessPoolExecutor(max_workers=self.n_jobs)
+        return self
+
+    def present(self, name, stc, time_label, prompt):
+        """
+        Show one source estimate, or save it and submit its render job.
+        `time_label` is formatted with `peak_ms`.
+        """
+        if self.pool is None:
+            print(f"\n--- Showing {name} ---")
+            show_source_estimate(stc, self.subjects_dir, time_label, prompt)
+            return
+        output_stem = os.path.join(self.output_dir, name)
+        stc_fname = f'{output_stem}-stc.h5'
+        stc.save(stc_fname, ftype='h5', overwrite=True, verbose=False)
+        print(f"  - Saved {name} source estimate to {stc_fname}")
+        future = self.pool.submit(render_source_snapshot, stc_fname, output_stem, self.subjects_dir, time_label)
+        self.futures[future] = name
+
+    def __exit__(self, *exc_info):
+        if self.pool is None:
+            return False
+        for future in as_completed(self.futures):
+            name = self.futures[future]
+            try:
+                print(f"  - {name}: {future.result()}")
+            except Exception as e:
+                print(f"  - {name}: FAILED ({type(e).__name__}: {e})")
+        self.pool.shutdown()
+        return False
+
 def task1_individual_all_conditions(subject_id, conditions):
     """
     Task 1: Individual subject LORETA for all 30 conditions
@@ -145,66 +361,53 @@ def task1_individual_all_conditions(subject_id, conditions):
     # Setup directories
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     derivatives_dir = os.path.join(base_dir, 'derivatives')
-    subjects_dir = os.path.join(derivatives_dir, 'fs_subjects_dir')
     subject_dir = os.path.join(derivatives_dir, f'sub-{subject_id}')
     
-    os.makedirs(subjects_dir, exist_ok=True)
-    
     print(f"\n--- TASK 1: Individual sLORETA Analysis for Subject {subject_id} ---")
     print(f"Processing {len(conditions)} conditions")
     
     try:
         # Setup source space and forward solution
-        subject_fs = 'fsaverage'
-        fwd, src = setup_source_space_and_forward_solution(
-            derivatives_dir, subjects_dir, subject_fs
-        )
+        fwd, src, subjects_dir = setup_source_space_and_forward_solution()
         
-        # Process each condition individually
+        # Load epochs and average them for every condition
+        epochs_by_condition = {}
         for condition in conditions:
-            print(f"\n--- Processing condition: {condition} ---")
-            
-            # Load epochs for this condition
             epochs = load_single_condition_epochs(subject_dir, subject_id, condition)
-            
-            if epochs is None:
-                continue
-                
-            # Compute inverse operator
-            inverse_operator = compute_inverse_operator_from_epochs(epochs, fwd)
-            
-            # Average epochs to get evoked response
-            evoked = epochs.average()
-            
-            # Apply inverse solution (sLORETA)
-            lambda2 = 1.0 / 9.0  # SNR^2 regularization parameter
-            stc = apply_inverse(
-                evoked, 
-                inverse_operator, 
-                lambda2, 
-                method="sLORETA", 
-                pick_ori=None, 
-                verbose=False
-            )
-            
-            # Find peak activation time
-            peak_time = stc.get_peak()[1]
-            print(f"  - Peak activation at {peak_time*1000:.1f}ms")
-            
-            # Create interactive brain plot
-            brain = stc.plot(
-                subjects_dir=subjects_dir,
-                subject=subject_fs,
-                hemi='both',
-                views=['lat', 'med'],
-                time_viewer=True,
-                backend='pyvistaqt',
-                initial_time=peak_time,
-                time_label=f'sub-{subject_id} - Condition {condition} sLORETA ({len(epochs)} epochs, peak: {peak_time*1000:.1f}ms)'
+            if epochs is not None:
+                epochs_by_condition[condition] = epochs
+        evokeds = {condition: epochs.average() for condition, epochs in epochs_by_condition.items()}
+        
+        def present(presenter, condition, stc):
+            presenter.present(
+                f'sub-{subject_id}_cond-{condition}_sLORETA',
+                stc,
+                f'sub-{subject_id} - Condition {condition} sLORETA ({len(epochs_by_condition[condition])} epochs, peak: {{peak_ms:.1f}}ms)',
+                f"Press ENTER to close the plot for condition '{condition}' and continue...",
             )
-            
-            # Wait for user input before closing
-            input(f"Press ENTER to close the plot for condition '{condition}' and continue...")
+        
+        # Apply inverse solution (sLORETA)
+        with SourceEstimatePresenter(subjects_dir, os.path.join(subject_dir, 'sloreta'), N_JOBS) as presenter:
+            if INVERSE_MODE == 'pooled':
+                # One inverse operator for all conditions, applied in one batch
+                inverse_operator = get_pooled_inverse_operator(
+                    subject_dir, subject_id, conditions, fwd, epochs_by_condition
+                )
+                stcs = apply_inverse_batch(evokeds, inverse_operator) if inverse_operator is not None else {}
+                for condition in list(stcs):
+                    present(presenter, condition, stcs.pop(condition))
+            else:
+                for condition, epochs in epochs_by_condition.items():
+                    inverse_operator = compute_inverse_operator_from_epochs(epochs, fwd)
+                    stc = apply_inverse(
+                        evokeds[condition], 
+                        inverse_operator, 
+                        LAMBDA2, 
+                        method="sLORETA", 
+                        pick_ori=None, 
+                        verbose=False
+                    )
+                    present(presenter, condition, stc)
         
         print(f"\n--- TASK 1: Individual analysis complete for Subject {subject_id} ---")
         
@@ -213,6 +416,62 @@ def task1_individual_all_conditions(subject_id, conditions):
         print(f"Error details: {e}")
         raise
 
+def compute_grand_average_stc(derivatives_dir, subjects_list, condition, fwd):
+    """
+    Grand average a condition over subjects and apply sLORETA to it.
+    
+    Returns:
+    --------
+    stc, successful_subjects : SourceEstimate (or None if no data) and the subjects included
+    """
+    # Collect evoked responses from all subjects for this condition
+    condition_evokeds = []
+    successful_subjects = []
+    
+    for subject_id in subjects_list:
+        try:
+            subject_dir = os.path.join(derivatives_dir, f'sub-{subject_id}')
+            epochs = load_single_condition_epochs(subject_dir, subject_id, condition)
+            
+            if epochs is not None:
+                evoked = epochs.average()
+                condition_evokeds.append(evoked)
+                successful_subjects.append(subject_id)
+                print(f"  - Subject {subject_id}: {len(epochs)} epochs averaged")
+            
+        except Exception as e:
+            print(f"  - ERROR loading Subject {subject_id}: {e}")
+            continue
+    
+    if not condition_evokeds:
+        return None, successful_subjects
+    
+    # Compute grand average
+    print(f"  - Computing grand average across {len(condition_evokeds)} subjects...")
+    grand_avg_evoked = mne.grand_average(condition_evokeds)
+    
+    # Use the first successful subject's data to compute inverse operator
+    first_subject_dir = os.path.join(derivatives_dir, f'sub-{successful_subjects[0]}')
+    if INVERSE_MODE == 'pooled':
+        # Cached across conditions (and runs): pooled over every condition of that subject
+        inverse_operator = get_pooled_inverse_operator(
+            first_subject_dir, successful_subjects[0], ALL_30_CONDITIONS, fwd
+        )
+    else:
+        first_subject_epochs = load_single_condition_epochs(first_subject_dir, successful_subjects[0], condition)
+        inverse_operator = compute_inverse_operator_from_epochs(first_subject_epochs, fwd)
+    
+    # Apply inverse solution (sLORETA)
+    stc = apply_inverse(
+        grand_avg_evoked, 
+        inverse_operator, 
+        LAMBDA2, 
+        method="sLORETA", 
+        pick_ori=None, 
+        verbose=False
+    )
+    return stc, successful_subjects
+
 def task2_grand_average_all_conditions(subjects_list, conditions):
     """
     Task 2: Grand average LORETA for all 30 conditions
@@ -220,9 +479,6 @@ def task2_grand_average_all_conditions(subjects_list, conditions):
     # Setup directories
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     derivatives_dir = os.path.join(base_dir, 'derivatives')
-    subjects_dir = os.path.join(derivatives_dir, 'fs_subjects_dir')
-    
-    os.makedirs(subjects_dir, exist_ok=True)
     
     print(f"\n--- TASK 2: Grand Average sLORETA Analysis ---")
     print(f"Subjects to include: {subjects_list}")
@@ -230,76 +486,22 @@ def task2_grand_average_all_conditions(subjects_list, conditions):
     
     try:
         # Setup source space and forward solution
-        subject_fs = 'fsaverage'
-        fwd, src = setup_source_space_and_forward_solution(
-            derivatives_dir, subjects_dir, subject_fs
-        )
+        fwd, src, subjects_dir = setup_source_space_and_forward_solution()
         
         # Process each condition
-        for condition in conditions:
-            print(f"\n--- Processing condition: {condition} ---")
-            
-            # Collect evoked responses from all subjects for this condition
-            condition_evokeds = []
-            successful_subjects = []
-            
-            for subject_id in subjects_list:
-                try:
-                    subject_dir = os.path.join(derivatives_dir, f'sub-{subject_id}')
-                    epochs = load_single_condition_epochs(subject_dir, subject_id, condition)
-                    
-                    if epochs is not None:
-                        evoked = epochs.average()
-                        condition_evokeds.append(evoked)
-                        successful_subjects.append(subject_id)
-                        print(f"  - Subject {subject_id}: {len(epochs)} epochs averaged")
-                    
-                except Exception as e:
-                    print(f"  - ERROR loading Subject {subject_id}: {e}")
+        with SourceEstimatePresenter(subjects_dir, os.path.join(derivatives_dir, 'group', 'sloreta'), N_JOBS) as presenter:
+            for condition in conditions:
+                print(f"\n--- Processing condition: {condition} ---")
+                stc, successful_subjects = compute_grand_average_stc(derivatives_dir, subjects_list, condition, fwd)
+                if stc is None:
+                    print(f"  - No valid data found for condition '{condition}'. Skipping.")
                     continue
-            
-            if not condition_evokeds:
-                print(f"  - No valid data found for condition '{condition}'. Skipping.")
-                continue
-            
-            # Compute grand average
-            print(f"  - Computing grand average across {len(condition_evokeds)} subjects...")
-            grand_avg_evoked = mne.grand_average(condition_evokeds)
-            
-            # Use the first successful subject's data to compute inverse operator
-            first_subject_dir = os.path.join(derivatives_dir, f'sub-{successful_subjects[0]}')
-            first_subject_epochs = load_single_condition_epochs(first_subject_dir, successful_subjects[0], condition)
-            inverse_operator = compute_inverse_operator_from_epochs(first_subject_epochs, fwd)
-            
-            # Apply inverse solution (sLORETA)
-            lambda2 = 1.0 / 9.0
-            stc = apply_inverse(
-                grand_avg_evoked, 
-                inverse_operator, 
-                lambda2, 
-                method="sLORETA", 
-                pick_ori=None, 
-                verbose=False
-            )
-            
-            # Find peak activation time
-            peak_time = stc.get_peak()[1]
-            print(f"  - Peak activation at {peak_time*1000:.1f}ms")
-            
-            # Create interactive brain plot
-            brain = stc.plot(
-                subjects_dir=subjects_dir,
-                subject=subject_fs,
-                hemi='both',
-                views=['lat', 'med'],
-                time_viewer=True,
-                backend='pyvistaqt',
-                initial_time=peak_time,
-                time_label=f'Grand Average - Condition {condition} sLORETA (n={len(successful_subjects)}, peak: {peak_time*1000:.1f}ms)'
-            )
-            
-            # Wait for user input before closing
-            input(f"Press ENTER to close the plot for condition '{condition}' and continue...")
+                presenter.present(
+                    f'group_cond-{condition}_sLORETA',
+                    stc,
+                    f'Grand Average - Condition {condition} sLORETA (n={len(successful_subjects)}, peak: {{peak_ms:.1f}}ms)',
+                    f"Press ENTER to close the plot for condition '{condition}' and continue...",
+                )
         
         print(f"\n--- TASK 2: Grand Average analysis complete ---")
         
@@ -315,9 +517,6 @@ def task3_grand_average_cardinalities(subjects_list, cardinality_conditions):
     # Setup directories
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     derivatives_dir = os.path.join(base_dir, 'derivatives')
-    subjects_dir = os.path.join(derivatives_dir, 'fs_subjects_dir')
-    
-    os.makedirs(subjects_dir, exist_ok=True)
     
     print(f"\n--- TASK 3: Grand Average Cardinality sLORETA Analysis ---")
     print(f"Subjects to include: {subjects_list}")
@@ -325,76 +524,22 @@ def task3_grand_average_cardinalities(subjects_list, cardinality_conditions):
     
     try:
         # Setup source space and forward solution
-        subject_fs = 'fsaverage'
-        fwd, src = setup_source_space_and_forward_solution(
-            derivatives_dir, subjects_dir, subject_fs
-        )
+        fwd, src, subjects_dir = setup_source_space_and_forward_solution()
         
         # Process each cardinality condition
-        for i, condition in enumerate(cardinality_conditions, 1):
-            print(f"\n--- Processing cardinality {i} (condition {condition}) ---")
-            
-            # Collect evoked responses from all subjects for this cardinality
-            cardinality_evokeds = []
-            successful_subjects = []
-            
-            for subject_id in subjects_list:
-                try:
-                    subject_dir = os.path.join(derivatives_dir, f'sub-{subject_id}')
-                    epochs = load_single_condition_epochs(subject_dir, subject_id, condition)
-                    
-                    if epochs is not None:
-                        evoked = epochs.average()
-                        cardinality_evokeds.append(evoked)
-                        successful_subjects.append(subject_id)
-                        print(f"  - Subject {subject_id}: {len(epochs)} epochs averaged")
-                    
-                except Exception as e:
-                    print(f"  - ERROR loading Subject {subject_id}: {e}")
+        with SourceEstimatePresenter(subjects_dir, os.path.join(derivatives_dir, 'group', 'sloreta'), N_JOBS) as presenter:
+            for i, condition in enumerate(cardinality_conditions, 1):
+                print(f"\n--- Processing cardinality {i} (condition {condition}) ---")
+                stc, successful_subjects = compute_grand_average_stc(derivatives_dir, subjects_list, condition, fwd)
+                if stc is None:
+                    print(f"  - No valid data found for cardinality {i}. Skipping.")
                     continue
-            
-            if not cardinality_evokeds:
-                print(f"  - No valid data found for cardinality {i}. Skipping.")
-                continue
-            
-            # Compute grand average
-            print(f"  - Computing grand average across {len(cardinality_evokeds)} subjects...")
-            grand_avg_evoked = mne.grand_average(cardinality_evokeds)
-            
-            # Use the first successful subject's data to compute inverse operator
-            first_subject_dir = os.path.join(derivatives_dir, f'sub-{successful_subjects[0]}')
-            first_subject_epochs = load_single_condition_epochs(first_subject_dir, successful_subjects[0], condition)
-            inverse_operator = compute_inverse_operator_from_epochs(first_subject_epochs, fwd)
-            
-            # Apply inverse solution (sLORETA)
-            lambda2 = 1.0 / 9.0
-            stc = apply_inverse(
-                grand_avg_evoked, 
-                inverse_operator, 
-                lambda2, 
-                method="sLORETA", 
-                pick_ori=None, 
-                verbose=False
-            )
-            
-            # Find peak activation time
-            peak_time = stc.get_peak()[1]
-            print(f"  - Peak activation at {peak_time*1000:.1f}ms")
-            
-            # Create interactive brain plot
-            brain = stc.plot(
-                subjects_dir=subjects_dir,
-                subject=subject_fs,
-                hemi='both',
-                views=['lat', 'med'],
-                time_viewer=True,
-                backend='pyvistaqt',
-                initial_time=peak_time,
-                time_label=f'Grand Average - Cardinality {i} sLORETA (n={len(successful_subjects)}, peak: {peak_time*1000:.1f}ms)'
-            )
-            
-            # Wait for user input before closing
-            input(f"Press ENTER to close the plot for cardinality {i} and continue...")
+                presenter.present(
+                    f'group_cardinality-{i}_sLORETA',
+                    stc,
+                    f'Grand Average - Cardinality {i} sLORETA (n={len(successful_subjects)}, peak: {{peak_ms:.1f}}ms)',
+                    f"Press ENTER to close the plot for cardinality {i} and continue...",
+                )
         
         print(f"\n--- TASK 3: Grand Average cardinality analysis complete ---")
         
@@ -407,21 +552,42 @@ def main():
     """
     Main function to run sLORETA analysis for Tasks 1, 2, and 3.
     """
+    global OUTPUT_MODE, N_JOBS, INVERSE_MODE
+    parser = argparse.ArgumentParser(description='sLORETA analysis for Tasks 1, 2 and 3.')
+    parser.add_argument('--task', type=int, choices=[1, 2, 3], default=TASK,
+                        help=f'1: individual, 2: grand average, 3: grand average cardinalities (default: {TASK}).')
+    parser.add_argument('--subjects', nargs='*', default=[],
+                        help=f'Subject IDs (Task 1: each is processed in turn; default: {SUBJECT}; '
+                             'Tasks 2/3: default: all subjects).')
+    parser.add_argument('--batch', action='store_true', default=OUTPUT_MODE == 'batch',
+                        help='Headless mode: save every STC as HDF5 and render offscreen snapshots '
+                             'instead of opening interactive viewers.')
+    parser.add_argument('--jobs', type=int, default=N_JOBS,
+                        help='Rendering processes in batch mode (<= 0: all cores).')
+    parser.add_argument('--inverse-mode', choices=INVERSE_MODES, default=INVERSE_MODE,
+                        help="'per_condition': one inverse operator per condition; 'pooled': one cached "
+                             "inverse operator per subject from the baseline of all conditions "
+                             f"(default: {INVERSE_MODE}).")
+    args = parser.parse_args()
+    OUTPUT_MODE = 'batch' if args.batch else 'interactive'
+    N_JOBS = args.jobs
+    INVERSE_MODE = args.inverse_mode
+    
     print("=" * 60)
     print("sLORETA Analysis Tool - Tasks 1, 2, 3")
     print("=" * 60)
+    print(f"Inverse mode: {INVERSE_MODE}")
     
-    if TASK == 1:
+    if args.task == 1:
         # Task 1: Individual subject analysis for all 30 conditions
-        task1_individual_all_conditions(SUBJECT, ALL_30_CONDITIONS)
-    elif TASK == 2:
+        for subject_id in args.subjects or [SUBJECT]:
+            task1_individual_all_conditions(subject_id, ALL_30_CONDITIONS)
+    elif args.task == 2:
         # Task 2: Grand average analysis for all 30 conditions
-        task2_grand_average_all_conditions(ALL_SUBJECTS, ALL_30_CONDITIONS)
-    elif TASK == 3:
+        task2_grand_average_all_conditions(args.subjects or ALL_SUBJECTS, ALL_30_CONDITIONS)
+    elif args.task == 3:
         # Task 3: Grand average analysis for 6 cardinality conditions
-        task3_grand_average_cardinalities(ALL_SUBJECTS, CARDINALITY_CONDITIONS)
-    else:
-        print("ERROR: Invalid TASK number. Use 1, 2, or 3")
+        task3_grand_average_cardinalities(args.subjects or ALL_SUBJECTS, CARDINALITY_CONDITIONS)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
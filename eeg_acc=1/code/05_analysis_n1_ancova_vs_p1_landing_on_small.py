@@ -1,32 +1,28 @@
 import os
+import sys
 import glob
 import argparse
-import mne
 import pandas as pd
-import numpy as np
 import pingouin as pg
 
-# --- 1. Configuration ---
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import erp_features
 
-# Base conditions to load, limited to small-to-small transitions
-BASE_CONDITIONS = ['21', '31', '12', '32', '13', '23']
+# --- 1. Configuration ---
 
-# How to combine base conditions into key conditions
+# How to combine base conditions into key conditions (small-to-small transitions)
 KEY_CONDITIONS_MAP = {
     "Landing on 1": ["21", "31"],
     "Landing on 2": ["12", "32"],
     "Landing on 3": ["13", "23"]
 }
 
-# Define the two distinct ROIs for this analysis
-P1_ROI_OZ = ['E71', 'E75', 'E76', 'E70', 'E83', 'E74', 'E81', 'E82']
-N1_ROI_POT_L = ['E66', 'E65', 'E59', 'E60', 'E67', 'E71', 'E70']
-N1_ROI_POT_R = ['E84', 'E76', 'E77', 'E85', 'E91', 'E90', 'E83']
-N1_ROI_POT_BILATERAL = N1_ROI_POT_L + N1_ROI_POT_R
-
-# Time windows for peak detection
-P1_TMIN, P1_TMAX = 0.080, 0.130
-N1_TMIN, N1_TMAX = 0.150, 0.200
+# The two distinct ROIs for this analysis (ELECTRODE_GROUPS names). Peaks are
+# measured on the mean ROI waveform: P1 positive in 80-130ms, N1 negative in
+# 150-200ms (see erp_features.COMPONENTS)
+P1_ROI_OZ = 'Oz'
+N1_ROI_POT_BILATERAL = 'bilateral'
 
 # --- 2. Main Analysis Function ---
 
@@ -54,48 +50,20 @@ def analyze_n1_ancova(subjects_to_process=None):
     print(f"--- Starting Analysis 2: N1 Amplitude ANCOVA vs. P1 ---")
     print(f"Processing {len(subjects_to_process)} subjects: {subjects_to_process}")
 
-    # --- Data Extraction Loop ---
-    results_data = []
-    for subject_id in subjects_to_process:
-        print(f"  - Subject: {subject_id}")
-        
-        for condition_name, base_conds in KEY_CONDITIONS_MAP.items():
-            try:
-                # Load and combine evokeds for the key condition
-                evokeds_to_combine = [
-                    mne.read_epochs(os.path.join(derivatives_dir, f'sub-{subject_id}', f'sub-{subject_id}_task-numbers_cond-{bc}_epo.fif'), preload=True, verbose=False).average()
-                    for bc in base_conds if os.path.exists(os.path.join(derivatives_dir, f'sub-{subject_id}', f'sub-{subject_id}_task-numbers_cond-{bc}_epo.fif'))
-                ]
-                if not evokeds_to_combine:
-                    print(f"    - WARNING: No data for {condition_name}, subject {subject_id}.")
-                    continue
-                key_evoked = mne.combine_evoked(evokeds_to_combine, 'equal')
-
-                # Measure P1 from Oz ROI
-                p1_roi_evoked = key_evoked.copy().pick(P1_ROI_OZ).data.mean(axis=0, keepdims=True)
-                p1_info = mne.create_info(['mean_p1_roi'], key_evoked.info['sfreq'], 'eeg')
-                _, _, p1_amplitude_oz = mne.EvokedArray(p1_roi_evoked, p1_info, tmin=key_evoked.tmin).get_peak(tmin=P1_TMIN, tmax=P1_TMAX, mode='pos', return_amplitude=True)
-
-                # Measure N1 from POT ROI
-                n1_roi_evoked = key_evoked.copy().pick(N1_ROI_POT_BILATERAL).data.mean(axis=0, keepdims=True)
-                n1_info = mne.create_info(['mean_n1_roi'], key_evoked.info['sfreq'], 'eeg')
-                _, _, n1_amplitude_pot = mne.EvokedArray(n1_roi_evoked, n1_info, tmin=key_evoked.tmin).get_peak(tmin=N1_TMIN, tmax=N1_TMAX, mode='neg', return_amplitude=True)
-
-                # Store results
-                results_data.append({
-                    'subject_id': subject_id,
-                    'condition': condition_name,
-                    'p1_amplitude_oz': p1_amplitude_oz,
-                    'n1_amplitude_pot': n1_amplitude_pot
-                })
-            except Exception as e:
-                print(f"    - ERROR processing {condition_name} for subject {subject_id}: {e}")
-
-    if not results_data:
+    # --- Data Extraction ---
+    features = erp_features.load_feature_table(derivatives_dir, KEY_CONDITIONS_MAP.values(), subjects_to_process)
+    p1 = erp_features.get_key_condition_features(features, KEY_CONDITIONS_MAP, 'P1', P1_ROI_OZ, subjects_to_process)
+    n1 = erp_features.get_key_condition_features(features, KEY_CONDITIONS_MAP, 'N1', N1_ROI_POT_BILATERAL,
+                                                 subjects_to_process)
+    df_results = pd.merge(
+        p1.rename(columns={'peak_amplitude': 'p1_amplitude_oz'})[['subject_id', 'condition', 'p1_amplitude_oz']],
+        n1.rename(columns={'peak_amplitude': 'n1_amplitude_pot'})[['subject_id', 'condition', 'n1_amplitude_pot']],
+        on=['subject_id', 'condition']
+    ).dropna()
+
+    if df_results.empty:
         print("--- No data collected. Cannot perform analysis. ---")
         return
-        
-    df_results = pd.DataFrame(results_data)
     
     # Save data to CSV
     csv_path = os.path.join(output_dir, 'group_n1_ancova_data.csv')
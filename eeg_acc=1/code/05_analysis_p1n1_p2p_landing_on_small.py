@@ -1,123 +1,80 @@
 import os
+import sys
 import glob
 import argparse
-import mne
 import pandas as pd
-import numpy as np
 import pingouin as pg
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-# --- 1. Configuration ---
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import erp_features
 
-# Base conditions to load, limited to small-to-small transitions
-BASE_CONDITIONS = ['21', '31', '12', '32', '13', '23']
+# --- 1. Configuration ---
 
-# How to combine base conditions into key conditions
+# How to combine base conditions into key conditions (small-to-small transitions)
 KEY_CONDITIONS_MAP = {
     "Landing on 1": ["21", "31"],
     "Landing on 2": ["12", "32"],
     "Landing on 3": ["13", "23"]
 }
 
-# Single ROI for this analysis (Oz area)
-OZ_ROI = ['E71', 'E75', 'E76', 'E70', 'E83', 'E74', 'E81', 'E82']
+# Single ROI for this analysis (Oz area), as named in ELECTRODE_GROUPS
+OZ_ROI = 'Oz'
 
-# Electrodes of interest for N1 waveform (Bilateral Posterior-Occipito-Temporal)
-N1_ELECTRODES_L = ['E66', 'E65', 'E59', 'E60', 'E67', 'E71', 'E70']
-N1_ELECTRODES_R = ['E84', 'E76', 'E77', 'E85', 'E91', 'E90', 'E83']
-POT_ROI_BILATERAL = N1_ELECTRODES_L + N1_ELECTRODES_R
+# ROI for the N1 waveform (Bilateral Posterior-Occipito-Temporal)
+POT_ROI_BILATERAL = 'bilateral'
 
-# Time windows for peak detection
-P1_TMIN, P1_TMAX = 0.080, 0.130
-N1_TMIN, N1_TMAX = 0.150, 0.200
+# P1 (positive, 80-130ms) and N1 (negative, 150-200ms) peaks are measured on
+# the mean ROI waveform, see erp_features.COMPONENTS
 
 # --- 2. Generic Analysis Function ---
 
-def run_p2p_analysis(output_dir, analysis_name, roi_electrodes, roi_name, subjects_to_process=None):
+def run_p2p_analysis(output_dir, analysis_name, roi, roi_name, subjects_to_process=None):
     """
     Performs a generic Peak-to-Peak (P2P) analysis for a given ROI.
     
     Args:
         output_dir (str): The directory to save all output files.
         analysis_name (str): A unique name for the analysis (used for file prefixes).
-        roi_electrodes (list): List of electrode names for the ROI.
+        roi (str): The ROI's name in the ERP feature table (an ELECTRODE_GROUPS key).
         roi_name (str): A display name for the ROI (e.g., 'Oz', 'POT Bilateral').
         subjects_to_process (list, optional): List of subjects to process. Defaults to all.
     Returns:
         pd.DataFrame: The ANOVA results table.
     """
+    try:
+        base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    except NameError:
+        base_dir = os.path.abspath('eeg_acc=1')
+    derivatives_dir = os.path.join(base_dir, 'derivatives')
+
     # Get subjects if not specified
     if not subjects_to_process:
-        try:
-            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-        except NameError:
-            base_dir = os.path.abspath('eeg_acc=1')
-        derivatives_dir = os.path.join(base_dir, 'derivatives')
         subject_dirs = glob.glob(os.path.join(derivatives_dir, 'sub-*'))
         subjects_to_process = sorted([os.path.basename(d).split('-')[1] for d in subject_dirs])
 
     print(f"--- Starting Analysis: {analysis_name} over {roi_name} ROI ---")
     print(f"Processing {len(subjects_to_process)} subjects: {subjects_to_process}")
 
-    # --- Data Extraction Loop ---
-    results_data = []
-    for subject_id in subjects_to_process:
-        print(f"  - Subject: {subject_id}")
-        
-        for condition_name, base_conds in KEY_CONDITIONS_MAP.items():
-            try:
-                # Setup paths
-                try:
-                    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-                except NameError:
-                    base_dir = os.path.abspath('eeg_acc=1')
-                derivatives_dir = os.path.join(base_dir, 'derivatives')
-
-                # Load all available base evokeds for this subject and condition
-                evokeds_to_combine = []
-                for bc in base_conds:
-                    fpath = os.path.join(derivatives_dir, f'sub-{subject_id}', f'sub-{subject_id}_task-numbers_cond-{bc}_epo.fif')
-                    if os.path.exists(fpath):
-                        evokeds_to_combine.append(mne.read_epochs(fpath, preload=True, verbose=False).average())
-                
-                if not evokeds_to_combine:
-                    print(f"    - WARNING: No data for {condition_name} for subject {subject_id}. Skipping.")
-                    continue
-                
-                # Combine evokeds into the key condition
-                key_evoked = mne.combine_evoked(evokeds_to_combine, 'equal')
-
-                # Create a virtual channel by averaging over the specified ROI
-                roi_evoked = key_evoked.copy().pick(roi_electrodes)
-                mean_data = roi_evoked.data.mean(axis=0, keepdims=True)
-                mean_info = mne.create_info(ch_names=['mean_roi'], sfreq=key_evoked.info['sfreq'], ch_types='eeg')
-                mean_roi_evoked = mne.EvokedArray(mean_data, mean_info, tmin=key_evoked.tmin)
-
-                # Find P1 and N1 peaks on the virtual channel
-                _, p1_lat, p1_amp = mean_roi_evoked.get_peak(tmin=P1_TMIN, tmax=P1_TMAX, mode='pos', return_amplitude=True)
-                _, n1_lat, n1_amp = mean_roi_evoked.get_peak(tmin=N1_TMIN, tmax=N1_TMAX, mode='neg', return_amplitude=True)
-
-                # Calculate P2P amplitude
-                p2p_amplitude = p1_amp - n1_amp
-
-                # Store results
-                results_data.append({
-                    'subject_id': subject_id,
-                    'condition': condition_name,
-                    'p1_amp': p1_amp,
-                    'n1_amp': n1_amp,
-                    'p2p_amp': p2p_amplitude
-                })
-            except Exception as e:
-                print(f"    - ERROR processing {condition_name} for subject {subject_id}: {e}")
+    # --- Data Extraction ---
+    features = erp_features.load_feature_table(derivatives_dir, KEY_CONDITIONS_MAP.values(), subjects_to_process)
+    p1 = erp_features.get_key_condition_features(features, KEY_CONDITIONS_MAP, 'P1', roi, subjects_to_process)
+    n1 = erp_features.get_key_condition_features(features, KEY_CONDITIONS_MAP, 'N1', roi, subjects_to_process)
+    df_results = pd.merge(
+        p1.rename(columns={'peak_amplitude': 'p1_amp'})[['subject_id', 'condition', 'p1_amp']],
+        n1.rename(columns={'peak_amplitude': 'n1_amp'})[['subject_id', 'condition', 'n1_amp']],
+        on=['subject_id', 'condition']
+    ).dropna()
+
+    # Calculate P2P amplitude
+    df_results['p2p_amp'] = df_results['p1_amp'] - df_results['n1_amp']
 
     # --- Statistical Analysis and Output ---
-    if not results_data:
+    if df_results.empty:
         print(f"--- No data collected for {analysis_name}. Cannot perform analysis. ---")
         return None
-        
-    df_results = pd.DataFrame(results_data)
     
     # Save data to CSV
     csv_path = os.path.join(output_dir, f'group_{analysis_name}_data.csv')
@@ -175,7 +132,7 @@ if __name__ == '__main__':
     anova_oz = run_p2p_analysis(
         output_dir=output_dir,
         analysis_name=analysis_1_name,
-        roi_electrodes=OZ_ROI,
+        roi=OZ_ROI,
         roi_name='Oz',
         subjects_to_process=args.subjects
     )
@@ -187,7 +144,7 @@ if __name__ == '__main__':
     anova_pot = run_p2p_analysis(
         output_dir=output_dir,
         analysis_name=analysis_2_name,
-        roi_electrodes=POT_ROI_BILATERAL,
+        roi=POT_ROI_BILATERAL,
         roi_name='POT Bilateral',
         subjects_to_process=args.subjects
     )
@@ -1,11 +1,16 @@
 import mne
 import os
+import sys
 import glob
 import argparse
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 import numpy as np
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import evoked_cache
+
 BASE_CONDITIONS = ['12', '21']
 KEY_CONDITIONS_MAP = {
     '1 to 2 (Inc)': ['12'],
@@ -38,10 +43,7 @@ def generate_p3b_plots(subjects_to_process=None):
         fig_dir = os.path.join(sdir, 'figures', script_name)
         os.makedirs(fig_dir, exist_ok=True)
         try:
-            base_evks = {
-                cond: mne.read_epochs(os.path.join(sdir, f'sub-{sid}_task-numbers_cond-{cond}_epo.fif'), preload=True, verbose=False).average()
-                for cond in BASE_CONDITIONS if os.path.exists(os.path.join(sdir, f'sub-{sid}_task-numbers_cond-{cond}_epo.fif'))
-            }
+            base_evks = evoked_cache.load_subject_evokeds(sdir, BASE_CONDITIONS)
             for cond, evk in base_evks.items():
                 all_sub_evokeds[cond].append(evk)
 
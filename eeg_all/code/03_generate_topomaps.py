@@ -1,10 +1,14 @@
-import mne
 import os
+import sys
 import glob
 import argparse
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import group_store
+
 # --- 1. CONFIGURATION ---
 CONDITIONS = [
     "21","31","32","41","42","43","52","53","54","63","64","65",
@@ -26,12 +30,13 @@ def generate_topomaps(subjects_to_process):
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     derivatives_dir = os.path.join(base_dir, 'derivatives')
     
-    all_subject_evokeds = {cond: [] for cond in CONDITIONS}
-
     if not subjects_to_process:
         subject_dirs = glob.glob(os.path.join(derivatives_dir, 'sub-*'))
         subjects_to_process = sorted([os.path.basename(d).split('-')[1] for d in subject_dirs])
 
+    # Per-subject averages come from the memory-mapped group store (built on first use)
+    store = group_store.load_group_store(derivatives_dir, CONDITIONS, subjects_to_process)
+
     print(f"--- Processing subjects for topomaps: {subjects_to_process} ---")
 
     for subject_id in subjects_to_process:
@@ -42,31 +47,25 @@ def generate_topomaps(subjects_to_process):
         print(f"\nProcessing Subject {subject_id}...")
         
         try:
-            evokeds_this_subject = {}
-            for cond in CONDITIONS:
-                epo_file = os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif')
-                if os.path.exists(epo_file):
-                    epochs = mne.read_epochs(epo_file, preload=True, verbose=False)
-                    evoked = epochs.average()
-                    evokeds_this_subject[cond] = evoked
-                    all_subject_evokeds[cond].append(evoked)
-                    print(f"  - Loaded {len(epochs)} epochs for condition '{cond}'.")
-
-                    scalp_evoked = evoked.copy().pick('eeg', exclude=NON_SCALP_CHANNELS)
-
-                    fig_topo = scalp_evoked.plot_topomap(
-                        times=[0.150, 0.250, 0.485],
-                        units=dict(eeg='µV'),
-                        vlim=(-6, 6),
-                        show=False
-                    )
-                    fig_topo.suptitle(f'sub-{subject_id} - {cond} Topography')
-                    fig_path = os.path.join(subject_figure_dir, f'sub-{subject_id}_topomap_{cond}.png')
-                    if os.path.exists(fig_path):
-                        os.remove(fig_path)
-                    fig_topo.savefig(fig_path)
-                    plt.close(fig_topo)
-                    print(f"    - Saved topomap to {fig_path}")
+            evokeds_this_subject = store.subject_evokeds(subject_id, CONDITIONS)
+            for cond, evoked in evokeds_this_subject.items():
+                print(f"  - Loaded {evoked.nave} epochs for condition '{cond}'.")
+
+                scalp_evoked = evoked.copy().pick('eeg', exclude=NON_SCALP_CHANNELS)
+
+                fig_topo = scalp_evoked.plot_topomap(
+                    times=[0.150, 0.250, 0.485],
+                    units=dict(eeg='µV'),
+                    vlim=(-6, 6),
+                    show=False
+                )
+                fig_topo.suptitle(f'sub-{subject_id} - {cond} Topography')
+                fig_path = os.path.join(subject_figure_dir, f'sub-{subject_id}_topomap_{cond}.png')
+                if os.path.exists(fig_path):
+                    os.remove(fig_path)
+                fig_topo.savefig(fig_path)
+                plt.close(fig_topo)
+                print(f"    - Saved topomap to {fig_path}")
 
             if not evokeds_this_subject:
                 print(f"  - No data found for Subject {subject_id}. Skipping.")
@@ -79,7 +78,7 @@ def generate_topomaps(subjects_to_process):
     group_figure_dir = os.path.join(derivatives_dir, 'group', 'figures')
     os.makedirs(group_figure_dir, exist_ok=True)
     
-    grand_averages = { cond: mne.grand_average(evoked_list) for cond, evoked_list in all_subject_evokeds.items() if evoked_list }
+    grand_averages = store.grand_averages(CONDITIONS, subjects=subjects_to_process)
     
     if not grand_averages:
         print("\n--- No data available for any subject. Skipping group plots. ---")
@@ -1,9 +1,14 @@
 import mne
 import os
+import sys
 import glob
 import argparse
 import matplotlib.pyplot as plt
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import group_store
+
 # --- 1. CONFIGURATION ---
 CONDITIONS = ["iSS", "dSS", "iLL", "dLL", "iSL", "dLS", "NoChg"]
 PZ_ELECTRODE = 'E62'
@@ -16,12 +21,13 @@ def generate_butterfly_plots(subjects_to_process):
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     derivatives_dir = os.path.join(base_dir, 'derivatives')
     
-    all_subject_evokeds = {cond: [] for cond in CONDITIONS}
-
     if not subjects_to_process:
         subject_dirs = glob.glob(os.path.join(derivatives_dir, 'sub-*'))
         subjects_to_process = sorted([os.path.basename(d).split('-')[1] for d in subject_dirs])
 
+    # Per-subject averages come from the memory-mapped group store (built on first use)
+    store = group_store.load_group_store(derivatives_dir, CONDITIONS, subjects_to_process)
+
     print(f"--- Processing subjects for butterfly plots: {subjects_to_process} ---")
 
     for subject_id in subjects_to_process:
@@ -32,15 +38,9 @@ def generate_butterfly_plots(subjects_to_process):
         print(f"\nProcessing Subject {subject_id}...")
         
         try:
-            evokeds = {}
-            for cond in CONDITIONS:
-                epo_file = os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif')
-                if os.path.exists(epo_file):
-                    epochs = mne.read_epochs(epo_file, preload=True, verbose=False)
-                    evoked = epochs.average()
-                    evokeds[cond] = evoked
-                    all_subject_evokeds[cond].append(evoked)
-                    print(f"  - Loaded {len(epochs)} epochs for condition '{cond}'.")
+            evokeds = store.subject_evokeds(subject_id, CONDITIONS)
+            for cond, evoked in evokeds.items():
+                print(f"  - Loaded {evoked.nave} epochs for condition '{cond}'.")
 
             if not evokeds:
                 print(f"  - No data found for Subject {subject_id}. Skipping.")
@@ -63,7 +63,7 @@ def generate_butterfly_plots(subjects_to_process):
     group_figure_dir = os.path.join(derivatives_dir, 'group', 'figures')
     os.makedirs(group_figure_dir, exist_ok=True)
     
-    grand_averages = { cond: mne.grand_average(evoked_list) for cond, evoked_list in all_subject_evokeds.items() if evoked_list }
+    grand_averages = store.grand_averages(CONDITIONS, subjects=subjects_to_process)
     
     if not grand_averages:
         print("\n--- No data available for any subject. Skipping group plots. ---")
@@ -1,5 +1,6 @@
 import mne
 import os
+import sys
 import glob
 import argparse
 import matplotlib.pyplot as plt
@@ -7,6 +8,10 @@ import matplotlib.gridspec as gridspec
 from matplotlib.lines import Line2D
 import numpy as np
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import group_store
+
 # --- 1. CONFIGURATION ---
 # Base conditions to load
 BASE_CONDITIONS = ["iSS", "dSS", "iLL", "dLL", "NoChg"]
@@ -43,12 +48,13 @@ def generate_n1_plots(subjects_to_process):
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     derivatives_dir = os.path.join(base_dir, 'derivatives')
     
-    all_subject_evokeds = {cond: [] for cond in BASE_CONDITIONS}
-
     if not subjects_to_process:
         subject_dirs = glob.glob(os.path.join(derivatives_dir, 'sub-*'))
         subjects_to_process = sorted([os.path.basename(d).split('-')[1] for d in subject_dirs])
 
+    # Per-subject averages come from the memory-mapped group store (built on first use)
+    store = group_store.load_group_store(derivatives_dir, BASE_CONDITIONS, subjects_to_process)
+
     print(f"--- Processing subjects for N1 plots: {subjects_to_process} ---")
 
     # --- Individual Subject Plots ---
@@ -61,8 +67,7 @@ def generate_n1_plots(subjects_to_process):
         
         try:
             # ... load data and create key evokeds ...
-            base_evokeds = {cond: mne.read_epochs(os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif'), preload=True, verbose=False).average() for cond in BASE_CONDITIONS if os.path.exists(os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif'))}
-            for cond, evoked in base_evokeds.items(): all_subject_evokeds[cond].append(evoked)
+            base_evokeds = store.subject_evokeds(subject_id, BASE_CONDITIONS)
             if not base_evokeds: print(f"  - No data found for Subject {subject_id}. Skipping."); continue
             key_evokeds = {key_cond: mne.combine_evoked([base_evokeds[bc] for bc in bcl if bc in base_evokeds], 'equal') for key_cond, bcl in KEY_CONDITIONS_MAP.items() if any(bc in base_evokeds for bc in bcl)}
             if not key_evokeds: print(f"  - Not enough data for key conditions for Subject {subject_id}. Skipping."); continue
@@ -114,7 +119,7 @@ def generate_n1_plots(subjects_to_process):
     group_figure_dir = os.path.join(derivatives_dir, 'group', 'figures')
     os.makedirs(group_figure_dir, exist_ok=True)
     
-    grand_averages_base = {cond: mne.grand_average(evoked_list) for cond, evoked_list in all_subject_evokeds.items() if evoked_list}
+    grand_averages_base = store.grand_averages(BASE_CONDITIONS, subjects=subjects_to_process)
     if not grand_averages_base: print("\n--- No data for group plot. ---"); return
 
     grand_averages_key = {key_cond: mne.combine_evoked([grand_averages_base[bc] for bc in bcl if bc in grand_averages_base], 'equal') for key_cond, bcl in KEY_CONDITIONS_MAP.items() if any(bc in grand_averages_base for bc in bcl)}
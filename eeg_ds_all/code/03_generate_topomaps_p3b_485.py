@@ -1,11 +1,16 @@
 import mne
 import os
+import sys
 import glob
 import argparse
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 import numpy as np
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from SFN2.code.utils import group_store
+
 # --- 1. CONFIGURATION ---
 # Base conditions to load from the processed files
 BASE_CONDITIONS = ["iSS", "dSS", "iLL", "dLL", "NoChg"]
@@ -42,13 +47,14 @@ def generate_p3b_plots(subjects_to_process):
     derivatives_dir = os.path.join(base_dir, 'derivatives')
     
     # Dictionary to hold evoked data for all subjects for group analysis
-    all_subject_evokeds = {cond: [] for cond in BASE_CONDITIONS}
-
     # If no subjects are specified, process all available subjects
     if not subjects_to_process:
         subject_dirs = glob.glob(os.path.join(derivatives_dir, 'sub-*'))
         subjects_to_process = sorted([os.path.basename(d).split('-')[1] for d in subject_dirs])
 
+    # Per-subject averages come from the memory-mapped group store (built on first use)
+    store = group_store.load_group_store(derivatives_dir, BASE_CONDITIONS, subjects_to_process)
+
     print(f"--- Processing subjects for P3b plots: {subjects_to_process} ---")
 
     # --- Individual Subject Plots ---
@@ -61,14 +67,7 @@ def generate_p3b_plots(subjects_to_process):
         
         try:
             # Load all necessary base evokeds for this subject
-            base_evokeds = {}
-            for cond in BASE_CONDITIONS:
-                epo_file = os.path.join(subject_dir, f'sub-{subject_id}_task-numbers_cond-{cond}_epo.fif')
-                if os.path.exists(epo_file):
-                    epochs = mne.read_epochs(epo_file, preload=True, verbose=False)
-                    evoked = epochs.average()
-                    base_evokeds[cond] = evoked
-                    all_subject_evokeds[cond].append(evoked) # Add to list for group plot
+            base_evokeds = store.subject_evokeds(subject_id, BASE_CONDITIONS)
 
             if not base_evokeds:
                 print(f"  - No data found for Subject {subject_id}. Skipping.")
@@ -137,8 +136,7 @@ def generate_p3b_plots(subjects_to_process):
     os.makedirs(group_figure_dir, exist_ok=True)
     
     # Calculate grand averages for base conditions first
-    grand_averages_base = { cond: mne.grand_average(evoked_list) 
-                            for cond, evoked_list in all_subject_evokeds.items() if evoked_list }
+    grand_averages_base = store.grand_averages(BASE_CONDITIONS, subjects=subjects_to_process)
 
     if not grand_averages_base:
         print("\n--- No data available for any subject. Skipping group plot. ---")
@@ -2,6 +2,7 @@
 import os
 import numpy as np
 import mne
+import scipy.stats
 import sys
 
 # --- Paths and Directories ---
@@ -13,11 +14,16 @@ except NameError:
     # Fallback for interactive environments where __file__ is not defined
     BASE_DIR = r"D:\numbers_eeg\eeg_ds_all"
 
+# Make the shared SFN2 helpers importable when this script is run directly
+sys.path.append(os.path.dirname(BASE_DIR))
+from SFN2.code.utils import cluster_stats, fsaverage_assets, permutation_engine, source_inverse
+
 DERIVATIVES_DIR = os.path.join(BASE_DIR, "derivatives")
-FBAVERAGE_DIR = os.path.join(DERIVATIVES_DIR, "fsaverage")
-FS_SUBJECTS_DIR = os.path.join(FBAVERAGE_DIR, "fs_subjects_dir")
+FS_SUBJECTS_DIR = str(fsaverage_assets.get_subjects_dir())
 FIGURES_DIR = os.path.join(DERIVATIVES_DIR, "group", "figures")
 os.makedirs(FIGURES_DIR, exist_ok=True)
+# Permutation checkpoints: a rerun resumes (or extends) an interrupted test
+STATS_DIR = os.path.join(DERIVATIVES_DIR, "group", "stats")
 
 # --- Participant List ---
 PARTICIPANT_LIST = [
@@ -33,27 +39,21 @@ LARGE_NUM_CONDITIONS = ['iLL', 'dLL']
 TMIN_STATS, TMAX_STATS = 0.125, 0.200
 METHOD = "eLORETA"
 LAMBDA2 = 1.0 / 9.0  # Corresponds to SNR=3
+DECIM = 1  # Keep every DECIM-th sample of the window (e.g. 2 halves the cluster test input)
 
 print("--- Starting LORETA Core Systems Contrast Analysis (N1 window: 125-200ms) ---")
 print(f"Derivatives directory: {DERIVATIVES_DIR}")
 print(f"Freesurfer subjects directory: {FS_SUBJECTS_DIR}")
 
 # --- 2. PER-SUBJECT PROCESSING LOOP ---
-all_stcs_small = []
-all_stcs_large = []
+# Small - large contrasts go straight into a preallocated float32 (subjects x timepoints x vertices) stack
+source_stack = cluster_stats.SourceStackBuilder(len(PARTICIPANT_LIST))
 src_for_adjacency = None  # We'll capture the correct source space here
 
-# Load forward solution and source space (common for all subjects)
-fwd_path = os.path.join(FBAVERAGE_DIR, "fsaverage-fwd.fif")
-src_path = os.path.join(FBAVERAGE_DIR, "fsaverage-src.fif")
-
-try:
-    forward = mne.read_forward_solution(fwd_path)
-    src = mne.read_source_spaces(src_path)
-except FileNotFoundError:
-    print(f"ERROR: Could not find forward solution '{fwd_path}' or source space '{src_path}'.")
-    print("Please ensure that these files have been generated and are in the correct directory.")
-    sys.exit(1)
+# Load forward solution and source space (common for all subjects, shared across datasets)
+forward = fsaverage_assets.get_forward(montage='GSN-HydroCel-128', sfreq=250, spacing='ico5',
+                                       ico=3, conductivity=(0.3, 0.006, 0.3), mindist=5.0)
+src = forward['src']
 
 
 print("Processing participants...")
@@ -101,17 +101,18 @@ for subject_id in PARTICIPANT_LIST:
         if src_for_adjacency is None:
             src_for_adjacency = inverse_operator['src']
 
-        # Apply inverse operator to get STCs using eLORETA
-        stc_small = mne.minimum_norm.apply_inverse(
-            evoked_small, inverse_operator, lambda2=LAMBDA2, method=METHOD, pick_ori=None
+        # Crop to the analysis window before the inverse, so only those samples are estimated
+        evoked_small, evoked_large = source_inverse.crop_evokeds(
+            [evoked_small, evoked_large], tmin=TMIN_STATS, tmax=TMAX_STATS, decim=DECIM
         )
-        stc_large = mne.minimum_norm.apply_inverse(
-            evoked_large, inverse_operator, lambda2=LAMBDA2, method=METHOD, pick_ori=None
+
+        # Apply inverse operator to get STCs using eLORETA (one kernel for both conditions)
+        stc_small, stc_large = source_inverse.apply_inverse_stacked(
+            [evoked_small, evoked_large], inverse_operator, lambda2=LAMBDA2, method=METHOD, pick_ori=None
         )
 
-        # Crop and append for group analysis
-        all_stcs_small.append(stc_small.crop(tmin=TMIN_STATS, tmax=TMAX_STATS))
-        all_stcs_large.append(stc_large.crop(tmin=TMIN_STATS, tmax=TMAX_STATS))
+        # Add the difference wave for group analysis
+        source_stack.add(stc_small, minus=stc_large)
 
     except FileNotFoundError as e:
         print(f"    - WARNING: Could not find an epochs file for subject {subject_id}. Skipping. Details: {e}")
@@ -120,34 +121,34 @@ for subject_id in PARTICIPANT_LIST:
         print(f"    - WARNING: An unexpected error occurred for subject {subject_id}. Skipping. Details: {e}")
         continue
 
-if not all_stcs_small or not all_stcs_large:
+if not source_stack.n_subjects:
     print("ERROR: No STC data was loaded. Cannot proceed with statistical analysis.")
     sys.exit(1)
 
 print("\n--- Starting Group-Level Statistics ---")
 # --- 3. GROUP-LEVEL STATISTICS ---
-# Create the data array for the statistical test (subjects x timepoints x vertices)
-X = np.array([s1.data - s2.data for s1, s2 in zip(all_stcs_small, all_stcs_large)])
-
-# Transpose the data to be (subjects, timepoints, vertices) which is required by the function
-X = np.transpose(X, (0, 2, 1))
+# The data array for the statistical test (subjects x timepoints x vertices)
+X = source_stack.data
 
 # The permutation test requires knowing which data points are adjacent (in space)
 print("  - Computing source space adjacency...")
 # Use the source space from the inverse operator to ensure dimensions match
 if src_for_adjacency is None:
     raise RuntimeError("Source space for adjacency was not captured from inverse operator.")
-adjacency = mne.spatial_src_adjacency(src_for_adjacency)
+# Cached with the fsaverage assets: computed once for this source space
+adjacency = fsaverage_assets.get_source_adjacency(src_for_adjacency)
 
 # Run the cluster-based permutation test (1-sample t-test on the difference waves)
 print("  - Running cluster-based permutation test... (this may take a while)")
-t_obs, clusters, cluster_p_values, H0 = mne.stats.spatio_temporal_cluster_1samp_test(
+# Same cluster-forming threshold as MNE's default (two-sided p < 0.05)
+t_threshold = scipy.stats.t.ppf(1 - 0.05 / 2, X.shape[0] - 1)
+t_obs, clusters, cluster_p_values, H0 = permutation_engine.permutation_cluster_1samp_test(
     X,
-    adjacency=adjacency,
-    n_jobs=-1,
+    adjacency,
+    t_threshold,
     n_permutations=1024,
     out_type='indices',
-    verbose=True
+    checkpoint=os.path.join(STATS_DIR, "group_loreta_core_systems_contrast_N1_permutations.npz")
 )
 
 print("\n--- Visualizing Results ---")
@@ -155,13 +156,10 @@ print("\n--- Visualizing Results ---")
 alpha = 0.05
 significant_cluster_indices = np.where(cluster_p_values < alpha)[0]
 
-# Use the vertices from the first subject's STC as a template
-stc_template = all_stcs_small[0]
-
 if not significant_cluster_indices.any():
     print(f"No significant clusters found at p < {alpha}.")
     t_obs_summary = np.mean(t_obs, axis=0) # Average T-stat over the N1 time window
-    stc_plot = mne.SourceEstimate(t_obs_summary, vertices=stc_template.vertices, tmin=stc_template.tmin, tstep=stc_template.tstep, subject='fsaverage')
+    stc_plot = mne.SourceEstimate(t_obs_summary, vertices=source_stack.vertices, tmin=source_stack.tmin, tstep=source_stack.tstep, subject='fsaverage')
     stc_title = "Small vs. Large Numbers (Unthresholded T-values, N1: 125-200ms)"
 else:
     print(f"Found {len(significant_cluster_indices)} significant clusters.")
@@ -174,7 +172,7 @@ else:
 
     stc_summary_data = t_obs_summary
     stc_summary_data[~sig_mask] = 0.0
-    stc_plot = mne.SourceEstimate(stc_summary_data, vertices=stc_template.vertices, tmin=stc_template.tmin, tstep=stc_template.tstep, subject='fsaverage')
+    stc_plot = mne.SourceEstimate(stc_summary_data, vertices=source_stack.vertices, tmin=source_stack.tmin, tstep=source_stack.tstep, subject='fsaverage')
     stc_title = f'Small vs. Large Numbers (p<{alpha}, N1: 125-200ms)'
 
 